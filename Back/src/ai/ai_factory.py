@@ -1,15 +1,19 @@
 from .model.gemini import GeminiAPI
 from .model.ollama import OllamaRunner
 from .model.groq import GroqAPI
+from .model.fake import FakeAI
 from .ai_instance import AI_Instance
 
 class AI_Factory:
-    def __init__(self, api_keys: dict):
+    def __init__(self, api_keys: dict, fake_config: dict = None):
         """
         필요한 API 키를 저장합니다.
         예: {"GEMINI": "GEMINI_API_KEY", "GROQ": "GROQ_API_KEY"}
+        fake_config: config.yaml의 fake_ai 항목. enabled면 "FAKE", "FAKE:이름" 모델 사용 가능,
+                     override_all이면 모든 AI 유형을 FakeAI로 대체 (네트워크 없이 부하 테스트)
         """
         self.api = api_keys
+        self.fake_config = dict(fake_config or {})
 
         # Groq에서 지원하는 모델 목록
         self.groq_models = [
@@ -42,9 +46,15 @@ class AI_Factory:
     def create_ai_instance(self, ai_type: str) -> AI_Instance:
         """
         AI 유형 또는 모델 이름을 기반으로 적절한 인스턴스를 생성하는 메서드
-        :param ai_type: "ollama", "GEMINI", "GROQ" 또는 모델명 자체
+        :param ai_type: "ollama", "GEMINI", "GROQ", "FAKE" 또는 모델명 자체
         :return: 해당 AI 인스턴스 또는 None
         """
+        # 가짜 AI (외부 서비스 없이 형식만 맞는 응답)
+        if self.fake_config.get("enabled") and (self.fake_config.get("override_all")
+                                                or ai_type == "FAKE" or str(ai_type).startswith("FAKE:")):
+            options = {key: value for key, value in self.fake_config.items() if key not in ("enabled", "override_all")}
+            return FakeAI(model_name=ai_type or "FAKE", **options)
+
         # 사용자가 모델 이름을 직접 입력한 경우
         if ai_type in self.groq_models:
             if "GROQ" in self.api:
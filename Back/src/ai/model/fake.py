@@ -0,0 +1,165 @@
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from ..ai_instance import AI_Instance
+
+# 응답 본문을 채울 단어 (토큰 하나 = 단어 하나로 취급)
+WORDS = ("근거", "주장", "반박", "사례", "데이터", "논리", "결론", "따라서", "그러나", "또한",
+         "evidence", "argument", "because", "therefore", "however", "example", "impact", "policy")
+
+
+class FakeAI(AI_Instance):
+    """
+    외부 서비스 없이 형식만 맞는 응답을 돌려주는 AI 인스턴스 (오프라인 부하 테스트용).
+    같은 seed, 같은 model_name, 같은 호출 순서면 항상 같은 응답을 만든다.
+    프롬프트를 보고 각 토론 엔진이 파싱하는 형식으로 응답한다.
+    - debate   : "Final Score - Pro: NN, Con: NN"
+    - debate_2 : "(pos): NN", "(neg): NN" 줄
+    - debate_3 : 발언/발언자 선택은 ```json``` 블록, 심판 평가(logicality_pos 등)는 json.loads 되는 JSON
+    - 주제 확인/생성 : "True", 한 문장 주제
+    """
+    LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+    def __init__(self, model_name:str="FAKE", seed:int=0, latency:dict=None, tokens_per_second:float=0,
+                 response_tokens:list=None, error_rate:float=0, error_mode:str="message"):
+        """
+        :param model_name: 모델 이름 (seed와 같이 난수 초기값에 사용. "FAKE:이름"으로 서로 다른 가짜 모델 구분)
+        :param seed: 난수 초기값
+        :param latency: 첫 토큰까지의 지연(초) 분포. {"distribution": fixed|uniform|normal|lognormal|exponential,
+                        "mean", "std", "min", "max"}. 없으면 지연 없음
+        :param tokens_per_second: 초당 생성 토큰 수. 0이면 생성 시간 없음
+        :param response_tokens: 일반 발언 길이 범위 [최소, 최대] (max_tokens를 넘지 않음)
+        :param error_rate: 호출이 실패할 확률 (0~1)
+        :param error_mode: "message"면 다른 AI 구현처럼 "Error: ..." 문자열 반환, "raise"면 RuntimeError 발생
+        """
+        super().__init__(model_name=model_name)
+        self.model_name = model_name
+        self.personality = ""
+        self.seed = seed
+        self.latency = latency or {}
+        if self.latency and self.latency.get("distribution", "fixed") not in self.LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"지원되지 않는 지연 분포입니다 : {self.latency.get('distribution')}")
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens or [80, 200]
+        self.error_rate = error_rate
+        self.error_mode = error_mode
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.tokens = 0
+
+    def set_personality(self, personality_text:str):
+        self.personality = personality_text
+
+    def rng(self, prompt:str) -> random.Random:
+        # 호출 순서 + 프롬프트로 난수 생성기를 만들어서 같은 입력 순서면 같은 결과
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+        return random.Random(f"{self.seed}:{self.model_name}:{call}:{digest}")
+
+    def sample_latency(self, rng:random.Random) -> float:
+        distribution = self.latency.get("distribution", "fixed")
+        mean = float(self.latency.get("mean", 0))
+        std = float(self.latency.get("std", 0))
+        if distribution == "uniform":
+            value = rng.uniform(self.latency.get("min", 0), self.latency.get("max", mean * 2))
+        elif distribution == "normal":
+            value = rng.gauss(mean, std)
+        elif distribution == "lognormal":
+            # mean, std는 실제 지연(초)의 평균, 표준편차 기준
+            if mean <= 0:
+                value = 0
+            else:
+                sigma2 = math.log(1 + (std / mean) ** 2)
+                value = rng.lognormvariate(math.log(mean) - sigma2 / 2, sigma2 ** 0.5)
+        elif distribution == "exponential":
+            value = rng.expovariate(1 / mean) if mean > 0 else 0
+        else:
+            value = mean
+        return min(max(value, self.latency.get("min", 0)), self.latency.get("max", float("inf")))
+
+    def words(self, rng:random.Random, count:int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(count))
+
+    def respond(self, prompt:str, max_tokens:int, rng:random.Random) -> str:
+        """
+        프롬프트에 맞는 형식의 응답 생성
+        """
+        body_tokens = max(1, min(max_tokens or self.response_tokens[1], rng.randint(*self.response_tokens)))
+        # debate_3 심판 평가 - json.loads로 바로 읽음
+        for metric in ("logicality", "rebuttal", "persuasion"):
+            if f'"{metric}_pos"' in prompt:
+                return json.dumps({f"{metric}_pos": rng.randint(40, 95), f"{metric}_neg": rng.randint(40, 95),
+                                   "message": self.words(rng, min(body_tokens, 20))}, ensure_ascii=False)
+        # debate_3 발언자 선택 - 후보 중 하나
+        candidates = re.search(r"후보는 다음과 같습니다: \[(.*?)\]", prompt)
+        if candidates:
+            names = re.findall(r"'([^']+)'", candidates.group(1)) or ["neg"]
+            speaker = rng.choice(names)
+            return self.json_block(speaker, f"다음 발언자로 {speaker}가 적합합니다.")
+        # debate_3 발언, 판결 - ```json``` 블록
+        speaker = re.search(r'"speaker": "([^"<]+)"', prompt)
+        if speaker and "```json" in prompt:
+            return self.json_block(speaker.group(1), self.words(rng, body_tokens))
+        # debate_2 심판 - (pos): 점수, (neg): 점수
+        if "(pos): 점수" in prompt:
+            return (f"- **찬성측 분석:** {self.words(rng, body_tokens // 2)}\n"
+                    f"- **찬성측 점수 (pos): {rng.randint(40, 95)}**\n\n"
+                    f"- **반대측 분석:** {self.words(rng, body_tokens // 2)}\n"
+                    f"- **반대측 점수 (neg): {rng.randint(40, 95)}**")
+        # debate 심판 - Final Score - Pro: NN, Con: NN
+        if "Final Score - Pro" in prompt:
+            pro = rng.randint(20, 80)
+            return f"{self.words(rng, body_tokens)}\nFinal Score - Pro: {pro}, Con: {100 - pro}."
+        # 주제 확인 / 주제 생성
+        if "Respond only with 'True' or 'False'" in prompt:
+            return "True"
+        if "Return a single debate topic" in prompt:
+            return f"Should {rng.choice(WORDS)} {rng.choice(WORDS)} be required by law?"
+        return self.words(rng, body_tokens)
+
+    @staticmethod
+    def json_block(speaker:str, message:str) -> str:
+        return "```json\n" + json.dumps({"speaker": speaker, "message": message}, ensure_ascii=False) + "\n```"
+
+    def generate_text(self, user_prompt:str, max_tokens:int, temperature:float) -> str:
+        """
+        지연 분포 + 토큰 생성 시간만큼 기다린 다음 형식에 맞는 응답 반환. error_rate 확률로 실패
+        """
+        rng = self.rng(user_prompt)
+        delay = self.sample_latency(rng) if self.latency else 0
+        if rng.random() < self.error_rate:
+            time.sleep(delay)
+            with self.lock:
+                self.errors += 1
+            if self.error_mode == "raise":
+                raise RuntimeError("FakeAI 주입된 오류")
+            return "Error: FakeAI 주입된 오류"
+        content = self.respond(user_prompt, max_tokens, rng)
+        tokens = len(content.split())
+        if self.tokens_per_second:
+            delay += tokens / self.tokens_per_second
+        time.sleep(delay)
+        with self.lock:
+            self.tokens += tokens
+        return content
+
+    def generate_text_with_vectorstore(self, user_prompt:str, max_tokens:int, temperature:float, vectorstore, k:int) -> str:
+        # 벡터스토어가 있으면 실제 구현처럼 검색까지는 함 (검색 비용도 부하에 포함)
+        context = ""
+        if vectorstore is not None:
+            try:
+                context = "\n".join(doc.page_content for doc in vectorstore.similarity_search(user_prompt, k=k))
+            except Exception as e:
+                print(f"벡터스토어 검색 실패: {e}")
+        return self.generate_text(f"Context: {context}\nUser: {user_prompt}" if context else user_prompt,
+                                  max_tokens, temperature)
+
+    def stats(self) -> dict:
+        return {"model": self.model_name, "calls": self.calls, "errors": self.errors, "tokens": self.tokens}
@@ -5,8 +5,8 @@ project_root = Path(__file__).resolve().parent.parent
 sys.path.append(str(project_root))
 
 
-from fastapi import FastAPI, Form, Query, File, UploadFile
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Form, Query, File, UploadFile, Request
+from fastapi.responses import StreamingResponse
 import os
 import yaml
 import json
@@ -15,33 +15,59 @@ import asyncio
 from dotenv import load_dotenv
 from src.ai.ai_factory import AI_Factory
 from src.utils.progress_manager import ProgressManager
+from src.progress.progress import Progress
 from src.utils.participant_factory import ParticipantFactory
-from src.utils.mongodb_connection import MongoDBConnection
+from src.utils.storage_backend import create_storage
 from src.utils.vectorstorehandler import VectorStoreHandler
 from src.utils.profile_manager import ProfileManager
 from src.yolo.yolo_detect import YOLODetect
+from src.yolo.detect_cache import DetectCache
 from src.utils.image_manager import ImageManager
+from src.utils.image_cache import ImageCache
 from src.utils.detect_persona import DetectPersona
+from src.utils.event_publisher import EventPublisher
+from src.utils.progress_hub import ProgressHub
+from src.utils.progress_archiver import ProgressArchiver
+from src.utils.step_journal import StepJournal
+from src.utils.progress_lease import ProgressLease
+from src.utils.job_queue import JobQueue
+from src.utils.tournament import TournamentScheduler
+from src.utils.rating_manager import RatingManager
+from src.utils.score_analytics import ScoreAnalytics
+from src.utils.parquet_exporter import ParquetExporter
 from src.utils.web_scrapper import WebScrapper
-from src.schema.schema import ProfileCreateRequestData, ProgressCreateRequestData
+from src.schema.schema import ProfileCreateRequestData, ProfileBulkCreateRequestData, ProgressCreateRequestData
 import base64
 import copy
 
 # 환경 변수 로드
 load_dotenv()
 
-# MongoDB 연결
-MONGO_URI = os.getenv("MONGO_URI")
-DB_NAME = os.getenv("DB_NAME")
-
-if not MONGO_URI or not DB_NAME:
-    raise ValueError("MONGO_URI 또는 DB_NAME이 .env 파일에서 설정되지 않았습니다.")
+## config.yaml 불러와서 변수에 저장해두기
+config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../config/config.yaml"))
+with open(config_path, "r", encoding="utf-8") as file:
+    config = yaml.safe_load(file)
 
-mongodb_connection = MongoDBConnection(MONGO_URI, DB_NAME)
+# 저장소 연결 - storage.backend가 "mongodb"면 .env의 MONGO_URI, DB_NAME 필요, "sqlite"면 내장 파일 DB
+# 연결 풀 설정 - 동기(pymongo), 비동기(Motor) 연결이 같은 설정을 씀
+mongodb_config = config.get("mongodb", {})
+mongodb_pool_options = {
+    "maxPoolSize": mongodb_config.get("max_pool_size", 100),
+    "minPoolSize": mongodb_config.get("min_pool_size", 0),
+    "maxIdleTimeMS": mongodb_config.get("max_idle_time_ms", 60000),
+    "serverSelectionTimeoutMS": mongodb_config.get("server_selection_timeout_ms", 30000),
+}
+# async 엔드포인트, 토론 저장에서 쓰는 비동기 연결 (event loop를 막지 않음)
+mongodb_connection, async_mongodb_connection = create_storage(config.get("storage"), mongodb_pool_options,
+                                                              base_dir=os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+# 자주 쓰는 조회 조건 인덱스 + (name, ai) unique 인덱스 생성 (이미 있으면 그대로)
+mongodb_connection.ensure_indexes()
 
 # AI API 키 불러오기
-AI_API_KEY = json.loads(os.getenv("AI_API_KEY"))
-ai_factory = AI_Factory(AI_API_KEY)
+# fake_ai.override_all이면 모든 AI를 FakeAI로 대체하므로 키 없이도 실행됨
+fake_ai_config = config.get("fake_ai", {})
+AI_API_KEY = json.loads(os.getenv("AI_API_KEY") or "{}")
+ai_factory = AI_Factory(AI_API_KEY, fake_config=fake_ai_config)
 
 # 벡터스토어 핸들러 생성
 vectorstore_handler = VectorStoreHandler(chunk_size=500, chunk_overlap=50)
@@ -51,14 +77,13 @@ vectorstore_handler = VectorStoreHandler(chunk_size=500, chunk_overlap=50)
 participant_factory = ParticipantFactory(vectorstore_handler, ai_factory)
 
 
-# YOLO 탐지 객체 생성
-yoloDetector = YOLODetect()
+# YOLO 탐지 결과 캐시 - 같은 사진을 다시 올리면 추론 건너뛰기
+detect_cache_config = config.get("detect_cache", {})
+detect_cache = DetectCache(max_entries=detect_cache_config.get("max_entries", 1024),
+                           db=mongodb_connection if detect_cache_config.get("persistent") else None)
 
-
-## config.yaml 불러와서 변수에 저장해두기
-config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../config/config.yaml"))
-with open(config_path, "r", encoding="utf-8") as file:
-    config = yaml.safe_load(file)
+# YOLO 탐지 객체 생성 - config의 yolo 항목으로 백엔드(torch/onnx) 선택
+yoloDetector = YOLODetect(**config.get("yolo", {}), cache=detect_cache)
 
 
 # 이미지 관리자 - MongoDB에 업로드, MongoDB에서 다운로드 시켜주는 관리자
@@ -67,8 +92,20 @@ real_image_save_path = os.path.join(os.getcwd(), IMAGE_SAVE_PATH)
 os.makedirs(real_image_save_path, exist_ok=True)
 image_manager = ImageManager(db=mongodb_connection, img_path=real_image_save_path)
 
-#persona 생성기
-detect_persona = DetectPersona(GEMINI_API_KEY=AI_API_KEY["GEMINI"])
+# 프로필 이미지 HTTP 캐시 - ETag/Cache-Control + 자주 보는 이미지는 메모리에서 바로 응답
+image_cache_config = config.get("image_cache", {})
+image_cache = ImageCache(image_store=image_manager.image_store,
+                         max_bytes=image_cache_config.get("max_bytes", 64*1024*1024),
+                         max_age=image_cache_config.get("max_age", 31536000))
+
+# 데이터 변경 이벤트 발행 - Web 조회 캐시를 바로 비우게 알려줌
+event_publisher_config = config.get("event_publisher", {})
+event_publisher = EventPublisher(subscribers=event_publisher_config.get("subscribers", []),
+                                 timeout=event_publisher_config.get("timeout", 2.0),
+                                 token=os.getenv("CACHE_TOKEN"))
+
+#persona 생성기 - 한 번 분석한 객체는 persona 컬렉션에 캐싱
+detect_persona = DetectPersona(GEMINI_API_KEY=AI_API_KEY.get("GEMINI"), db=mongodb_connection)
 
 #프로필 관리 객체 생성
 profile_manager = ProfileManager(db=mongodb_connection, detect_persona=detect_persona)
@@ -80,12 +117,76 @@ web_scrapper = WebScrapper()
 topic_checker = ai_factory.create_ai_instance("GEMINI")
 
 #토론 관리 인스턴스 생성
+# step 결과를 DB 저장 전에 먼저 기록하는 저널 (save 전에 죽어도 생성된 발언 복구)
+step_journal_config = config.get("step_journal", {})
+step_journal = None
+if step_journal_config.get("enabled", True):
+    step_journal = StepJournal(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..",
+                                                            step_journal_config.get("path", "data/step_journal.jsonl"))))
+
+# 토론 lease - Back 여러 개가 진행 중인 토론을 나눠서 진행 (죽은 프로세스의 토론은 lease 만료 후 이어받음)
+progress_lease_config = config.get("progress_lease", {})
+progress_lease = None
+if progress_lease_config.get("enabled", True):
+    progress_lease = ProgressLease(mongodb_connection,
+                                   owner=progress_lease_config.get("owner"),
+                                   ttl_seconds=progress_lease_config.get("ttl_seconds", 60))
+
+# 토론 생성 job 큐 (토너먼트 대진 하나당 job 하나)
+job_queue_config = config.get("job_queue", {})
+job_queue = JobQueue(mongodb_connection,
+                     owner=progress_lease.owner if progress_lease else None,
+                     lease_seconds=job_queue_config.get("lease_seconds", 600),
+                     max_attempts=job_queue_config.get("max_attempts", 3))
+
+# 토너먼트 스케줄러 (round_robin / swiss / knockout)
+tournament_config = config.get("tournament", {})
+tournament_scheduler = TournamentScheduler(mongodb_connection, job_queue,
+                                           tokens_per_debate=tournament_config.get("tokens_per_debate", 20000),
+                                           default_max_concurrent=tournament_config.get("max_concurrent", 4),
+                                           decisive_margin=tournament_config.get("decisive_margin", 15))
+
+# 프로필 Elo 레이팅 (토론이 끝날 때마다 갱신)
+rating_config = config.get("rating", {})
+rating_manager = RatingManager(mongodb_connection,
+                               k_factor=rating_config.get("k_factor", 32),
+                               initial_rating=rating_config.get("initial_rating", 1500))
+
+# 토론 점수 집계 (첫 조회 때 DB에서 적재, 이후 이 워커에서 끝난 토론은 바로 추가하고 다른 워커 토론은 조회 때 DB에서 갱신)
+score_analytics = ScoreAnalytics(mongodb_connection, cache_size=config.get("score_analytics", {}).get("cache_size", 64),
+                                 refresh_seconds=config.get("score_analytics", {}).get("refresh_seconds", 10))
+
+# 끝난 토론, 프로필을 Parquet 파일로 증분 내보내기 (분석용)
+parquet_export_config = config.get("parquet_export", {})
+parquet_exporter = ParquetExporter(mongodb_connection,
+                                   os.path.abspath(os.path.join(os.path.dirname(__file__), "../..",
+                                                                parquet_export_config.get("out_dir", "data/export"))),
+                                   batch_size=parquet_export_config.get("batch_size", 1000),
+                                   pending_max_age_hours=parquet_export_config.get("pending_max_age_hours", 24))
+
 progress_manager = ProgressManager(participant_factory=participant_factory,
                                     web_scrapper=web_scrapper,
                                     mongoDBConnection=mongodb_connection,
                                     topic_checker=topic_checker,
                                     vectorstore_handler=vectorstore_handler,
-                                    generate_text_config=config["generate_text_config"])
+                                    generate_text_config=config["generate_text_config"],
+                                    asyncMongoDBConnection=async_mongodb_connection,
+                                    step_journal=step_journal,
+                                    progress_lease=progress_lease)
+
+# progress 변경 구독 허브 - change stream(또는 save 훅) 하나로 SSE 구독자 전체에 전달
+progress_hub_config = config.get("progress_hub", {})
+progress_hub = ProgressHub(db=mongodb_connection,
+                           buffer_size=progress_hub_config.get("buffer_size", 256),
+                           source=progress_hub_config.get("source", "auto"))
+progress_manager.save_hooks.append(progress_hub.on_save)
+
+# 오래된 종료 토론 보관 - progress_archive 컬렉션에 요약 + zstd 압축 본문으로 옮김
+progress_archive_config = config.get("progress_archive", {})
+progress_archiver = ProgressArchiver(db=mongodb_connection,
+                                     max_age_days=progress_archive_config.get("max_age_days", 30),
+                                     level=progress_archive_config.get("level", 10),
+                                     batch_size=progress_archive_config.get("batch_size", 100))
 
 ################################## 이 아래로 작성 필요
 
@@ -99,6 +200,9 @@ async def auto_progressing():
     while (True):
         try:
             count = 0
+            # 다른 Back 프로세스가 만든 토론도 진행 후보로 등록
+            if progress_lease:
+                await asyncio.to_thread(progress_manager.load_new_from_db)
             progress_list = copy.deepcopy([progresses.data for progresses in progress_manager.progress_pool.values()])
             for progressdata in progress_list:
                 #progress가 종료되지 않았다면
@@ -107,9 +211,21 @@ async def auto_progressing():
                     #계속 progress 진행하기
                     id = str(progressdata.get("_id", ""))
                     if id and id in progress_manager.progress_pool.keys():
-                        result = progress_manager.progress_pool[id].progress()
+                        # 다른 프로세스가 lease를 잡고 있으면 건너뜀
+                        if not await asyncio.to_thread(progress_manager.claim, id):
+                            continue
+                        # step 진행 -> 저널 기록 -> 저장 -> 저널 commit
+                        result = await progress_manager.run_step(id)
+                        # 저장 전에 lease를 잃었으면 다른 프로세스가 진행 중 (결과는 버려짐)
+                        if result.get("lease_lost"):
+                            continue
                         print(f"===={progress_manager.progress_pool[id].data['topic']}====\n====\nprogress step : {result.get('step')}\n{result['speaker']} 가 말했음")
-                        print(progress_manager.save(id))
+                        # 끝난 progress는 목록 상태, 프로필 전적이 바뀜
+                        if progress_manager.progress_pool[id].data["status"].get("type") == "end":
+                            # 두 참가자 레이팅만 갱신
+                            await asyncio.to_thread(rating_manager.update_from_progress, progress_manager.progress_pool[id].data)
+                            score_analytics.add(progress_manager.progress_pool[id].data)
+                            event_publisher.publish("progress", id)
                 await asyncio.sleep(1)
             # if count == 0 and (auto_progress_create_task is None or auto_progress_create_task.done()):
             #     print("자동 주제 생성 시작")
@@ -120,12 +236,106 @@ async def auto_progressing():
         await asyncio.sleep(1)
 
 
+# 주기적으로 오래된 종료 토론을 보관 컬렉션으로 옮기고 progress_pool에서도 뺌
+async def archive_progressing():
+    interval = progress_archive_config.get("interval_seconds", 3600)
+    while progress_archive_config.get("enabled", True):
+        try:
+            while True:
+                archived = await asyncio.to_thread(progress_archiver.archive_old)
+                for id in archived:
+                    progress_manager.progress_pool.pop(id, None)
+                if archived:
+                    print(f"{len(archived)} 개의 Progress 보관됨")
+                    event_publisher.publish("progress")
+                if len(archived) < progress_archiver.batch_size:
+                    break
+        except Exception as e:
+            print(f"progress 보관 중 오류 발생 : {e}")
+        await asyncio.sleep(interval)
+
+
+# 주기적으로 지난번 이후 끝난 토론, 새 프로필을 Parquet로 내보냄
+async def export_progressing():
+    interval = parquet_export_config.get("interval_seconds", 3600)
+    while True:
+        try:
+            exported = await asyncio.to_thread(parquet_exporter.export)
+            if exported["files"]:
+                print(f"Parquet 내보내기 : 토론 {exported['debates']} 개, 프로필 {exported['objects']} 개")
+        except Exception as e:
+            print(f"Parquet 내보내기 중 오류 발생 : {e}")
+        await asyncio.sleep(interval)
+
+
+# 진행 중인 토너먼트의 결과 반영, 다음 대진 등록, 다음 라운드 생성
+async def tournament_progressing():
+    interval = tournament_config.get("interval_seconds", 10)
+    while True:
+        try:
+            await asyncio.to_thread(tournament_scheduler.advance_all)
+        except Exception as e:
+            print(f"토너먼트 진행 중 오류 발생 : {e}")
+        await asyncio.sleep(interval)
+
+
+# job 큐에서 토론 생성 작업을 하나씩 가져와 처리 (실패하면 max_attempts까지 다시 시도)
+async def job_worker():
+    poll_interval = job_queue_config.get("poll_interval", 2)
+    while True:
+        try:
+            job = await asyncio.to_thread(job_queue.claim, "progress_create")
+            if not job:
+                await asyncio.sleep(poll_interval)
+                continue
+            try:
+                result = await asyncio.to_thread(progress_manager.run_create_job, job)
+                await asyncio.to_thread(job_queue.complete, job["_id"], result)
+            except Exception as e:
+                status = await asyncio.to_thread(job_queue.fail, job["_id"], str(e))
+                print(f"job {job['_id']} 실패 ({status}) : {e}")
+        except Exception as e:
+            print(f"job 처리 중 오류 발생 : {e}")
+            await asyncio.sleep(poll_interval)
+
+
+# 잡고 있는 lease를 ttl보다 자주 연장 (step이 오래 걸려도 다른 프로세스가 가져가지 않도록)
+async def lease_heartbeat():
+    interval = max(progress_lease.ttl.total_seconds() / 3, 1)
+    while True:
+        try:
+            lost = await asyncio.to_thread(progress_lease.renew_all)
+            if lost:
+                print(f"lease 잃음 : {lost}")
+        except Exception as e:
+            print(f"lease 연장 중 오류 발생 : {e}")
+        await asyncio.sleep(interval)
+
+
 # 백그라운드에서 자동으로 토론 계속 진행시키기
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    progress_hub.start()
     task = asyncio.create_task(auto_progressing())
+    archive_task = asyncio.create_task(archive_progressing())
+    heartbeat_task = asyncio.create_task(lease_heartbeat()) if progress_lease else None
+    job_tasks = [asyncio.create_task(job_worker()) for _ in range(job_queue_config.get("workers", 1))]
+    job_tasks.append(asyncio.create_task(tournament_progressing()))
+    if parquet_export_config.get("enabled", False):
+        job_tasks.append(asyncio.create_task(export_progressing()))
     yield
+    for job_task in job_tasks:
+        job_task.cancel()
     task.cancel()
+    archive_task.cancel()
+    if heartbeat_task:
+        heartbeat_task.cancel()
+        # 다른 프로세스가 만료를 기다리지 않고 바로 이어받도록 반납
+        await asyncio.to_thread(progress_lease.release_all)
+    progress_hub.stop()
+    if step_journal:
+        step_journal.close()
+    async_mongodb_connection.close_connection()
 
 
 
@@ -173,7 +383,10 @@ app = FastAPI(lifespan=lifespan)
 #사용 가능한 ai 목록 반환
 @app.get("/ai")
 async def get_ai_list():
-    return config["ai"]
+    # 가짜 AI는 켜져 있을 때만 보여줌
+    if fake_ai_config.get("enabled"):
+        return config["ai"]
+    return {provider: models for provider, models in config["ai"].items() if provider != "fake"}
 
 
 #실행중인 토론 목록 받아오기
@@ -181,11 +394,14 @@ async def get_ai_list():
 @app.get("/progress/list")
 async def get_progress_list():
     progresslist = {}
-    for id in progress_manager.progress_pool.keys():
+    # 다른 프로세스가 진행 중인 토론은 pool이 예전 상태라서 status만 DB에서 한 번에 읽음
+    remote_statuses = await asyncio.to_thread(progress_manager.remote_statuses) if progress_lease else {}
+    for id in list(progress_manager.progress_pool.keys()):
         progress = progress_manager.progress_pool[id]
+        status = remote_statuses.get(id) or progress.data["status"]
         progresslist[id] = {
             "topic": progress.data["topic"],
-            "stauts": progress.data["status"]["type"],
+            "stauts": status.get("type"),
             "participants": [{"position":position,
                               "name": obj.name,
                               "id":obj.id,
@@ -194,13 +410,35 @@ async def get_progress_list():
                               "object_attribute":obj.object_attribute}
                             for position, obj in progress.participant.items()]
         }
+    # 보관된 토론은 요약 문서로 뒤에 붙임
+    summaries = await asyncio.to_thread(lambda: list(progress_archiver.iter_summaries({"topic": 1, "status": 1, "participants": 1})))
+    for summary in summaries:
+        progresslist.setdefault(str(summary["_id"]), {
+            "topic": summary.get("topic"),
+            "stauts": (summary.get("status") or {}).get("type"),
+            "participants": [{"position":position, **participant}
+                             for position, participant in (summary.get("participants") or {}).items()]
+        })
     return progresslist
 
 
 # progress session 받아오기
 @app.get("/progress/detail")
-async def get_progress_detail(id:str = Query(..., description="토론 id")):
-    progress = progress_manager.progress_pool.get(id)
+async def get_progress_detail(id:str = Query(..., description="토론 id"),
+                              since:int = Query(None, ge=0, description="이미 받은 debate_log 개수. 있으면 이후 발언만 반환")):
+    # 다른 프로세스가 진행 중인 토론은 DB에서 최신 문서를 읽음
+    progress = await asyncio.to_thread(progress_manager.current, id)
+    # rendered가 없는 예전 로그는 처음 조회될 때 채워서 저장 (진행중이면 다음 save 때 같이 저장됨)
+    if (progress and progress is progress_manager.progress_pool.get(id)
+            and progress.render_logs() and progress.data.get("status", {}).get("type") == "end"):
+        progress_manager.save(id)
+    if not progress:
+        # 보관된 토론이면 압축을 풀어서 같은 모양으로 반환
+        archived = await asyncio.to_thread(progress_archiver.load, id)
+        if archived:
+            progress = Progress(participant={}, data=archived, generate_text_config={})
+    if progress and since is not None:
+        return progress.data_since(since)
     if progress:
         progress_data = progress.data
         progress_data["_id"] = str(progress_data["_id"])
@@ -209,29 +447,173 @@ async def get_progress_detail(id:str = Query(..., description="토론 id")):
         return {}
 
 
+# progress 실시간 구독 (Server-Sent Events)
+# 처음에 since 이후 로그를 보내고, 이후에는 새 발언이 생길 때마다 {"since", "log_length", "debate_log", "status"} 전송
+# 받은 since가 가지고 있는 로그 길이보다 크면 버퍼가 넘쳐 빠진 구간이 있으므로 /progress/detail?since=로 다시 받으면 됨
+# 다른 프로세스가 진행 중인 토론은 change stream으로 받고, change stream이 없으면 DB를 주기적으로 확인
+@app.get("/progress/stream")
+async def stream_progress(request:Request,
+                          id:str = Query(..., description="토론 id"),
+                          since:int = Query(0, ge=0, description="이미 받은 debate_log 개수")):
+    progress = await asyncio.to_thread(progress_manager.current, id)
+    if not progress:
+        return {}
+    poll = not progress_manager.is_local(id) and progress_hub.source != "change_stream"
+
+    async def event_stream():
+        snapshot = progress.data_since(since)
+        queue = progress_hub.subscribe(id, snapshot["log_length"])
+        try:
+            yield f"data: {json.dumps(snapshot, ensure_ascii=False, default=str)}\n\n"
+            if (snapshot.get("status") or {}).get("type") == "end":
+                return
+            while not await request.is_disconnected():
+                try:
+                    ended, event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {event}\n\n"
+                if ended:
+                    return
+        finally:
+            progress_hub.unsubscribe(id, queue)
+
+    async def poll_stream():
+        # save 훅으로는 다른 프로세스의 저장이 들어오지 않으므로 DB 문서를 직접 비교
+        snapshot = progress.data_since(since)
+        yield f"data: {json.dumps(snapshot, ensure_ascii=False, default=str)}\n\n"
+        sent, status = snapshot["log_length"], snapshot.get("status")
+        interval = progress_lease_config.get("stream_poll_seconds", 2)
+        idle = 0
+        while (status or {}).get("type") != "end" and not await request.is_disconnected():
+            await asyncio.sleep(interval)
+            latest = await asyncio.to_thread(progress_manager.current, id)
+            log_length = len(latest.data.get("debate_log") or []) if latest else sent
+            if not latest or (log_length == sent and latest.data.get("status") == status):
+                idle += interval
+                if idle >= 15:
+                    idle = 0
+                    yield ": keep-alive\n\n"
+                continue
+            # 로그가 통째로 바뀐 경우 (Debate_3) 처음부터 다시 보냄
+            event = latest.data_since(0 if sent > log_length else sent)
+            yield f"data: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+            sent, status, idle = log_length, event.get("status"), 0
+
+    return StreamingResponse(poll_stream() if poll else event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/progress/stream/stats")
+async def stream_stats():
+    return progress_hub.stats()
+
+# 이 프로세스의 lease 상태 (owner, 잡고 있는 progress id)
+@app.get("/progress/lease/stats")
+async def lease_stats():
+    if not progress_lease:
+        return {"enabled": False}
+    return {"enabled": True, **progress_lease.stats()}
+
+
 # progress 생성, {result:성공여부, id:id} 반환
 @app.post("/progress/create")
 async def create_progress(progressData:ProgressCreateRequestData):
     progressType = progressData.type
     participants = progressData.participants
     topic = progressData.topic
-    return progress_manager.create_progress(progressType, participants, topic)
+    result = progress_manager.create_progress(progressType, participants, topic)
+    if result.get("result"):
+        event_publisher.publish("progress", result.get("id"))
+    return result
 
 
 # 자동 progress 생성 체크
+# 등록된 프로필 전체로 토너먼트 생성. 대진은 라운드 단위로, 동시 진행 수/토큰 예산 안에서 job으로 등록됨
 @app.get("/progress/autogenerate")
-async def progres_auto_generate(topic:str = None):
-    # Progress 자동생성중이 아닌 경우
-    if progress_manager.auto_progress_create_task is None or progress_manager.auto_progress_create_task.done():
-        try:
-            progress_manager.auto_progress_create_task = asyncio.create_task(progress_manager.auto_progress_create(profile_manager, topic))
-            return {"result":True, "message":"자동 대화 생성 요청에 성공했습니다."}
-        except Exception as e:
-            print(f"자동 Progress 생성 중 오류 발생 : {e}")
-            return {"result":False, "message":e}
-    # Progress 자동생성중인경우 -> 자동생성중이니 막기
-    else:
-        return {"result":False, "message":"이미 다른 주제로 자동 대화 생성중입니다."}
+async def progres_auto_generate(topic:str = None,
+                                format:str = Query(tournament_config.get("format", "round_robin")),
+                                max_concurrent:int = Query(None),
+                                budget_tokens:int = Query(tournament_config.get("budget_tokens", 0)),
+                                double:bool = Query(tournament_config.get("double", True))):
+    try:
+        tournament_id = await asyncio.to_thread(progress_manager.auto_progress_create, profile_manager, tournament_scheduler,
+                                                topic, format=format, max_concurrent=max_concurrent,
+                                                budget_tokens=budget_tokens, double=double)
+        # 첫 대진 job 바로 등록
+        await asyncio.to_thread(tournament_scheduler.advance, tournament_id)
+        return {"result":True, "message":"자동 대화 생성 요청에 성공했습니다.", "tournament_id":tournament_id}
+    except Exception as e:
+        print(f"자동 Progress 생성 중 오류 발생 : {e}")
+        return {"result":False, "message":str(e)}
+
+# 토너먼트 정보 + 순위 + 대진/job 진행 상황
+@app.get("/tournament/status")
+async def tournament_status(id:str):
+    tournament = await asyncio.to_thread(tournament_scheduler.summary, id)
+    if not tournament:
+        return {"result":False, "message":"토너먼트가 없습니다."}
+    tournament["jobs"] = await asyncio.to_thread(job_queue.group_stats, id)
+    return tournament
+
+# 토너먼트 목록 (대진 목록 제외)
+@app.get("/tournament/list")
+async def tournament_list():
+    tournaments = await async_mongodb_connection.select_data_from_query("tournament", {}, {"matches": 0})
+    for tournament in tournaments:
+        tournament["_id"] = str(tournament["_id"])
+    return tournaments
+
+
+# 레이팅 순위 (rating 인덱스 순으로 limit개)
+@app.get("/rating/leaderboard")
+async def rating_leaderboard(limit:int = Query(20, ge=1, le=500), min_games:int = 0):
+    ratings = await asyncio.to_thread(rating_manager.leaderboard, limit, min_games)
+    for rank, rating in enumerate(ratings, start=1):
+        profile = profile_manager.objectlist.get(rating["_id"])
+        rating["rank"] = rank
+        rating["name"] = profile.data.get("name") if profile else None
+        rating["ai"] = profile.data.get("ai") if profile else None
+    return ratings
+
+# 끝난 토론 전체로 레이팅 다시 계산 (백필, K값 변경 후)
+@app.post("/rating/recompute")
+async def rating_recompute():
+    count = await asyncio.to_thread(rating_manager.recompute)
+    event_publisher.publish("profile")
+    return {"result":True, "games":count}
+
+
+# 토론 점수 집계 - 데이터가 바뀌기 전까지는 캐시된 결과 반환
+@app.get("/analytics/profiles")
+async def analytics_profiles():
+    return await asyncio.to_thread(score_analytics.profiles)
+
+@app.get("/analytics/models")
+async def analytics_models():
+    return await asyncio.to_thread(score_analytics.models)
+
+@app.get("/analytics/topics")
+async def analytics_topics(limit:int = Query(50, ge=1, le=1000)):
+    return await asyncio.to_thread(score_analytics.topics, limit)
+
+@app.get("/analytics/distribution")
+async def analytics_distribution(bins:int = Query(10, ge=1, le=100)):
+    return await asyncio.to_thread(score_analytics.distribution, bins)
+
+@app.get("/analytics/head_to_head")
+async def analytics_head_to_head(limit:int = Query(20, ge=1, le=200)):
+    return await asyncio.to_thread(score_analytics.head_to_head, limit)
+
+@app.get("/analytics/stats")
+async def analytics_stats():
+    return score_analytics.stats()
+
+# Parquet 내보내기 바로 실행 (full=True면 처음부터 다시)
+@app.post("/export/run")
+async def export_run(full:bool = False):
+    exported = await asyncio.to_thread(parquet_exporter.export, full)
+    return {"result":True, **exported}
 
 
 ##이미 생성되어있는 사물 프로필 목록 반환
@@ -240,16 +622,21 @@ async def get_ai_list():
     # id - data 형태로 묶어서 데이터 전송
     result = {obj.data["_id"] : {key : value for key, value in obj.data.items()}
               for obj in profile_manager.objectlist.values()}
-    for id, obj in result.items():
-        img_id = obj["img"]
-        image_from_db = mongodb_connection.select_data_from_id("image", str(img_id))
-        image_from_local = os.path.join(IMAGE_SAVE_PATH, image_from_db.get("filename"))
-        result[id]["stats"] = profile_manager.get_stats_by_id(mongodb_connection.get_collection("progress"), id)
-        if not os.path.exists(image_from_local):
-            image_byte = base64.b64decode(image_from_db["data"])
-            with open(image_from_local, "wb") as f:
-                f.write(image_byte)
-        result[id]["img"] = image_from_db.get("filename")
+    # 이미지는 $in 한 번으로 조회
+    images = await async_mongodb_connection.select_data_from_ids("image", [obj["img"] for obj in result.values() if obj.get("img")])
+    images = {str(image["_id"]): image for image in images}
+    progress_collection = mongodb_connection.get_collection("progress")
+    stats = await asyncio.gather(*[asyncio.to_thread(profile_manager.get_stats_by_id, progress_collection, id)
+                                   for id in result.keys()])
+    # 레이팅은 rating 컬렉션에서 한 번에 조회 (없으면 초기값)
+    ratings = {rating["_id"]: rating for rating in
+               await async_mongodb_connection.select_data_from_query("rating", {"_id": {"$in": list(result.keys())}})}
+    for (id, obj), stat in zip(result.items(), stats):
+        result[id]["stats"] = stat
+        result[id]["rating"] = ratings.get(id, rating_manager.new_rating(id))["rating"]
+        image_from_db = images.get(str(obj.get("img")))
+        if image_from_db:
+            result[id]["img"] = await restore_image_file(image_from_db)
 
     return result
 
@@ -257,15 +644,24 @@ async def get_ai_list():
 async def get_profile(id:str):
     data = profile_manager.objectlist.get(id).data
     result = dict(data)
-    img_id = str(data.get("img"))
-    image_from_db = mongodb_connection.select_data_from_id("image", str(img_id))
+    image_from_db = await async_mongodb_connection.select_data_from_id("image", str(data.get("img")))
+    result["img"] = await restore_image_file(image_from_db)
+    return result
+
+
+async def restore_image_file(image_from_db:dict) -> str:
+    """
+    DB 이미지 문서를 로컬에 없으면 파일로 저장하고 파일 이름 반환
+    """
     image_from_local = os.path.join(IMAGE_SAVE_PATH, image_from_db.get("filename"))
     if not os.path.exists(image_from_local):
-        image_byte = base64.b64decode(image_from_db["data"])
-        with open(image_from_local, "wb") as f:
-            f.write(image_byte)
-    result["img"] = image_from_db.get("filename")
-    return result
+        await asyncio.to_thread(write_file, image_from_local, base64.b64decode(image_from_db["data"]))
+    return image_from_db.get("filename")
+
+
+def write_file(path:str, data:bytes):
+    with open(path, "wb") as f:
+        f.write(data)
 
 
 #최종적으로 이미지 포함 프로필 만들기
@@ -276,10 +672,35 @@ async def create_ai_profile(request_data:ProfileCreateRequestData):
         await profile_manager.create_profile(name=request_data.selected_object,
                                     img=save_result["file_id"],
                                     ai=request_data.ai)
+        event_publisher.publish("profile")
         return {"result":"success"}
     return {"result":"error"}
 
 
+#여러 프로필을 한 번에 만들기
+# 중복 확인 -> 이미지 일괄 업로드 -> 성격 일괄 분석 -> 프로필 insert_many
+@app.post("/profile/create/bulk")
+async def create_ai_profiles(request_data:ProfileBulkCreateRequestData):
+    items = [{"name":profile.selected_object, "img":profile.img, "ai":profile.ai}
+             for profile in request_data.profiles]
+    accepted, skipped = await asyncio.to_thread(profile_manager.split_duplicates, items)
+    saved_images = await asyncio.to_thread(image_manager.save_images_in_mongoDB_from_local,
+                                           [item["img"] for item in accepted])
+    ready = []
+    for item in accepted:
+        save_result = saved_images.get(item["img"], {})
+        if save_result.get("result") == "success":
+            ready.append({**item, "img":save_result["file_id"]})
+        else:
+            skipped.append({**item, "reason":"image error"})
+    created = await profile_manager.create_profiles(ready) if ready else {"ids":[], "skipped":[]}
+    # 동시에 같은 프로필이 먼저 저장돼서 unique 인덱스에 걸린 것도 skipped로 알려줌
+    skipped.extend(created["skipped"])
+    if created["ids"]:
+        event_publisher.publish("profile")
+    return {"result":"success", "created":created["ids"], "skipped":skipped}
+
+
 ##yolo로 이미지 판단해서 {result:(bool),data:(list)} 반환하기
 @app.post("/profile/objectdetect")
 async def object_detect(file: UploadFile = File(...)) -> dict:
@@ -304,17 +725,24 @@ async def object_detect(file: UploadFile = File(...)) -> dict:
 
 
 #webserver에서 profile 이미지 요청하면 건네주는 코드
+# variant : original, thumb, webp, thumb_webp 중 선택 (목록 페이지는 thumb 계열 사용)
 @app.get("/profile/image/{image_name}")
-async def send_image(image_name:str):
+async def send_image(request:Request, image_name:str, variant:str = Query("original", description="이미지 variant")):
+    return await image_cache.aresponse(image_name, variant, request.headers.get("if-none-match"), load_image_path)
+
+
+async def load_image_path(image_name:str, variant:str) -> str:
+    """
+    로컬에 이미지가 없으면 mongoDB에서 받아 저장하고, 요청한 variant의 로컬 경로 반환
+    """
     image = os.path.join(IMAGE_SAVE_PATH, image_name)
-    if os.path.exists(image):
-        return FileResponse(image, media_type="image/png")
-    image_from_db = mongodb_connection.select_data_from_query("image", {"filename":image_name})[0]
-    if image_from_db:
-        with open(image, "wb") as f: 
-            f.write(bytes(image_from_db["data"]))
-        return FileResponse(image, media_type="image/png")
-    return None
+    if not os.path.exists(image):
+        image_from_db = await async_mongodb_connection.select_data_from_query("image", {"filename":image_name})
+        if not image_from_db:
+            return None
+        await asyncio.to_thread(write_file, image, base64.b64decode(image_from_db[0]["data"]))
+    # variant가 없으면 Pillow로 만드므로 스레드에서
+    return await asyncio.to_thread(image_manager.image_store.variant_path, image_name, variant) or image
 
 
 ##실행코드
@@ -213,7 +213,7 @@ class Debate(Progress):
             For these reasons, the affirmative stance is not as strong as it may seem."  
 
             **Debate Topic:** {self.data['topic']}  
-            **Previous Statements:** {self.data['debate_log'][-3]}  
+            **Previous Statements:** {self.prompt_log(self.data['debate_log'][-3])}  
             """
 
             result["message"] = self.generate_text(result["speaker"],prompt)
@@ -253,7 +253,7 @@ class Debate(Progress):
             For these reasons, the opposition's stance is weaker than it appears."  
 
             **Debate Topic:** {self.data['topic']}  
-            **Previous Statements:** {self.data['debate_log'][-3]}  
+            **Previous Statements:** {self.prompt_log(self.data['debate_log'][-3])}  
             """
             result["message"] = self.generate_text(result["speaker"],prompt)
 
@@ -298,7 +298,7 @@ class Debate(Progress):
             Given the discussion we've had, it is clear that **{self.data['topic']}** is the most logical and justified stance."
 
             **Debate Topic:** {self.data['topic']}  
-            **Previous Statements:** {self.data['debate_log'][:-2]}  
+            **Previous Statements:** {self.prompt_log(self.data['debate_log'][:-2])}  
             """
 
             result["message"] = self.generate_text(result["speaker"],prompt)
@@ -338,7 +338,7 @@ class Debate(Progress):
             Given the discussion we've had, it is evident that **{self.data['topic']}** is not as justified as it seems, making the opposing stance the more reasonable conclusion."
 
             **Debate Topic:** {self.data['topic']}  
-            **Previous Statements:** {self.data['debate_log'][:-2]}  
+            **Previous Statements:** {self.prompt_log(self.data['debate_log'][:-2])}  
             """
             
             result["message"] = self.generate_text(result["speaker"],prompt)
@@ -354,14 +354,15 @@ class Debate(Progress):
             # 11. 판사가 최종 결론
             result["speaker"] = "judge"
             result["message"] = self.evaluate()
+            debate["end_time"] = datetime.now()
             debate["status"]["type"] = "end"
         
         else:
             result["speaker"] = "SYSTEM"
             result["message"] = "The debate has already concluded."
         
-        debate["debate_log"].append(result)
         result["timestamp"] = datetime.now()
+        self.append_log(result)
 
         if step < self.max_step:
             debate["status"]["step"] += 1
@@ -370,7 +371,7 @@ class Debate(Progress):
 
     def evaluate(self) -> str:
         # Generate the evaluation text from the judge
-        prompt = f"""Statement: {self.data['debate_log']}\n\n
+        prompt = f"""Statement: {self.prompt_log(self.data['debate_log'])}\n\n
             The debate has reached its final stage. It’s time to determine which side presented a stronger case.
 
             Let’s go over the key points made by both sides:  
@@ -223,7 +223,7 @@ class Debate_2(Progress):
             이러한 이유로 찬성 측의 주장은 그리 강력하지 않습니다."  
 
             **토론 주제:** {self.data['topic']}  
-            **이전 발언:** {self.data['debate_log'][-3]}  
+            **이전 발언:** {self.prompt_log(self.data['debate_log'][-3])}  
             """
 
             prompt += f"당신의 주장에서 당신의 특징을 강조하세요. {self.participant[result['speaker']].name}의 관점에서 생각해 보세요. **특유의 말투가 있다면 강조해주세요.**"
@@ -266,7 +266,7 @@ class Debate_2(Progress):
             이러한 이유로 반대 측의 주장은 그리 강력하지 않습니다."  
 
             **토론 주제:** {self.data['topic']}  
-            **이전 발언:** {self.data['debate_log'][-3]}  
+            **이전 발언:** {self.prompt_log(self.data['debate_log'][-3])}  
             """
             
 
@@ -316,7 +316,7 @@ class Debate_2(Progress):
             이번 토론을 통해 **{self.participant[result['speaker']].name}**의(가) 반대 의견이 가장 논리적이고 정당한 입장이라는 것이 명확해졌습니다."  
 
             **토론 주제:** {self.data['topic']}  
-            **이전 발언:** {self.data['debate_log'][:-2]}  
+            **이전 발언:** {self.prompt_log(self.data['debate_log'][:-2])}  
             """
             prompt += f"당신의 주장에서 당신의 특징을 강조하세요. {self.participant[result['speaker']].name}의 관점에서 생각해 보세요. **특유의 말투가 있다면 강조해주세요.**"
 
@@ -358,7 +358,7 @@ class Debate_2(Progress):
             이번 토론을 통해 *{self.participant[result['speaker']].name}**의(가) 반대 의견이 가장 논리적이고 정당한 입장이라는 것이 명확해졌습니다."  
 
             **토론 주제:** {self.data['topic']}  
-            **이전 발언:** {self.data['debate_log'][:-2]}  
+            **이전 발언:** {self.prompt_log(self.data['debate_log'][:-2])}  
             """
 
             prompt += f"당신의 주장에서 당신의 특징을 강조하세요. {self.participant[result['speaker']].name}의 관점에서 생각해 보세요. **특유의 말투가 있다면 강조해주세요.**"
@@ -377,6 +377,7 @@ class Debate_2(Progress):
             # 11. 판사가 최종 결론
             result["speaker"] = "judge"
             result["message"] = self.evaluate()
+            debate["end_time"] = datetime.now()
             debate["status"]["type"] = "end"
         
         else:
@@ -386,15 +387,14 @@ class Debate_2(Progress):
 
 
         
-        debate["debate_log"].append(result)
+        result["timestamp"] = datetime.now()
+        self.append_log(result)
 
         # if result["speaker"] == "pos":
         #     debate["debate_log_pos"].append(result["message"])
 
 
 
-        result["timestamp"] = datetime.now()
-
         if step < self.max_step:
             debate["status"]["step"] += 1
 
@@ -434,10 +434,10 @@ class Debate_2(Progress):
         4. 최종적으로 **점수를 포함한 평가 결과**를 제공하세요.  
 
         **[찬성측]**  
-        {pos_log}  
+        {self.prompt_log(pos_log)}  
 
         **[반대측]**  
-        {neg_log}  
+        {self.prompt_log(neg_log)}  
 
         ### **출력 형식:**  
 
@@ -471,10 +471,10 @@ class Debate_2(Progress):
         4. 최종적으로 **100점 척도의 반박 강도 점수를 포함한 평가**를 제공하세요.  
 
         **[찬성측 반박문]**  
-        {pos_rebuttal}  
+        {self.prompt_log(pos_rebuttal)}  
 
         **[반대측 반박문]**  
-        {neg_rebuttal}  
+        {self.prompt_log(neg_rebuttal)}  
 
         ### **출력 형식:**  
 
@@ -509,10 +509,10 @@ class Debate_2(Progress):
         4. 최종적으로 **100점 척도의 설득력 점수를 포함한 평가**를 제공하세요.  
 
         **[글 1]**  
-        {pos_log}  
+        {self.prompt_log(pos_log)}  
 
         **[글 2]**  
-        {neg_log}  
+        {self.prompt_log(neg_log)}  
 
         ### **foramat:**  
 
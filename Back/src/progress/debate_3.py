@@ -383,6 +383,7 @@ class Debate_3(Progress):
         self.memory_manager.save_message("Judge", f"반론 평가 결과: {result_rebuttal.get('message', '')}")
         self.memory_manager.save_message("Judge", f"설득력 평가 결과: {result_persuasion.get('message', '')}")
         self.data["debate_log"] = self.memory_manager.load_all()
+        self.render_logs()
 
         return {
             "result": self.data["result"],
@@ -456,6 +457,7 @@ class Debate_3(Progress):
         self.memory_manager.save_message("Judge", str(final_eval))
         debate["end_time"] = datetime.now()
         debate["debate_log"] = self.memory_manager.load_all()
+        self.render_logs()
         debate["status"]["type"] = "end"  # 종료 상태로 설정
         result = {"timestamp": datetime.now(), "speaker": "Judge", "message": str(final_eval)}
         return result
@@ -472,6 +474,6 @@ class Debate_3(Progress):
         "최종 판결": [토론의 결론 또는 심사 결과 요약]  
 
         아래는 토론 기록입니다:
-        {self.data['debate_log']}
+        {self.prompt_log(self.data['debate_log'])}
         """
         return self.generate_text("judge", prompt_summary)
\ No newline at end of file
@@ -1,3 +1,6 @@
+from datetime import datetime
+from ..utils.log_renderer import render_log, render_logs
+
 class Progress:
     """
     ai끼리의 대화를 진행시키기 위한 모듈의 상위 클래스
@@ -20,6 +23,47 @@ class Progress:
     def progress(self):
         pass
 
+    def append_log(self, log:dict) -> dict:
+        """
+        debate_log에 발언 추가. 화면 표시용 rendered(HTML 변환 메시지, 표시 시간)를 이때 한 번만 만든다
+        """
+        if not log.get("timestamp"):
+            log["timestamp"] = datetime.now()
+        render_log(log)
+        self.data.setdefault("debate_log", []).append(log)
+        return log
+
+    def render_logs(self) -> list:
+        """
+        rendered가 없는 debate_log(예전 문서, 통째로 바뀐 로그)를 채우고 채운 index 목록 반환
+        """
+        return render_logs(self.data.get("debate_log", []))
+
+    @staticmethod
+    def prompt_log(logs) -> str:
+        """
+        프롬프트에 넣을 발언 기록. rendered, timestamp 등은 빼고 speaker, message만 넣는다 (프롬프트 토큰 절약)
+        :param logs: debate_log 항목 하나 또는 목록
+        """
+        if isinstance(logs, dict):
+            logs = [logs]
+        return "\n".join(f"{log.get('speaker')}: {log.get('message')}" for log in logs)
+
+    def data_since(self, since:int) -> dict:
+        """
+        since번째 이후의 debate_log와 현재 상태만 반환 (실시간 보기에서 새 발언만 받아갈 때 사용)
+        :param since: 클라이언트가 이미 가지고 있는 debate_log 개수
+        """
+        debate_log = self.data.get("debate_log", [])
+        return {
+            "_id": str(self.data.get("_id")),
+            "status": self.data.get("status"),
+            "participants": self.data.get("participants"),
+            "since": since,
+            "log_length": len(debate_log),
+            "debate_log": debate_log[max(since, 0):],
+        }
+
     def evaluate(self):
         pass
 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Dict
+from typing import Dict, List
 
 class ProfileCreateRequestData(BaseModel):
     selected_object:str
@@ -7,6 +7,10 @@ class ProfileCreateRequestData(BaseModel):
     ai:str
 
 
+class ProfileBulkCreateRequestData(BaseModel):
+    profiles:List[ProfileCreateRequestData]
+
+
 class ProgressCreateRequestData(BaseModel):
     type:str
     topic:str
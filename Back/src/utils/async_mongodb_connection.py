@@ -0,0 +1,62 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from bson.objectid import ObjectId
+
+# MongoDB 비동기 연결 클래스 (Motor)
+# MongoDBConnection과 메서드 이름/인자가 같고, 전부 await로 호출한다.
+# async def 엔드포인트에서 DB를 기다리는 동안 event loop(토론 진행 등)를 막지 않기 위해 사용
+class AsyncMongoDBConnection:
+    def __init__(self, uri: str, db_name: str, **pool_options):
+        """
+        :param uri: MongoDB 연결 URI
+        :param db_name: 사용할 데이터베이스 이름
+        :param pool_options: maxPoolSize, minPoolSize, maxIdleTimeMS 등 MongoClient 연결 풀 옵션
+        """
+        self.client = AsyncIOMotorClient(uri, **pool_options)
+        self.db = self.client[db_name]
+
+    async def ping(self) -> bool:
+        try:
+            await self.client.admin.command('ping')
+            return True
+        except Exception as e:
+            print("❌ Connection failed:", e)
+            return False
+
+    def get_collection(self, collection_name: str):
+        """
+        :return: motor AsyncIOMotorCollection 객체
+        """
+        return self.db[collection_name]
+
+    async def insert_data(self, collection_name: str, data:dict):
+        return (await self.db[collection_name].insert_one(data)).inserted_id
+
+    async def insert_many_data(self, collection_name: str, data_list:list, ordered:bool=False) -> list:
+        if not data_list:
+            return []
+        return (await self.db[collection_name].insert_many(data_list, ordered=ordered)).inserted_ids
+
+    async def select_data_from_id(self, collection_name: str, id:str):
+        return await self.db[collection_name].find_one({"_id":ObjectId(id)})
+
+    async def select_data_from_ids(self, collection_name: str, ids:list) -> list:
+        """
+        id 여러 개를 $in 한 번으로 조회
+        """
+        return await self.db[collection_name].find({"_id":{"$in":[ObjectId(str(id)) for id in ids]}}).to_list(length=None)
+
+    async def select_data_from_query(self, collection_name:str, query:dict={}, projection:dict=None) -> list:
+        return await self.db[collection_name].find(query, projection).to_list(length=None)
+
+    async def update_data(self, collection_name: str, data:dict, query:dict=None):
+        # await 하는 동안 다른 코루틴이 data를 읽을 수 있으므로 원본의 _id는 건드리지 않고 복사본으로 저장
+        data = dict(data)
+        if type(data["_id"]) != ObjectId:
+            data["_id"] = ObjectId(data["_id"])
+        return await self.db[collection_name].update_one({"_id":data["_id"], **(query or {})}, {"$set":data})
+
+    async def upsert_data(self, collection_name: str, query:dict, data:dict):
+        return await self.db[collection_name].update_one(query, {"$set":data}, upsert=True)
+
+    def close_connection(self):
+        self.client.close()
@@ -1,37 +1,97 @@
 from langchain_community.retrievers import WikipediaRetriever
 from langchain.prompts import PromptTemplate
-import google.generativeai as genai 
+import google.generativeai as genai
+import asyncio
+import concurrent.futures
+import json
+import re
+from datetime import datetime
+from .lru_cache import LRUCache
 
 class DetectPersona:
     """
     객체 정보를 검색하고 성격을 분석하여 DB에 저장하는 클래스.
     - Wikipedia 또는 GEMINI API를 활용하여 정보 검색
     - 성격 분석을 GEMINI API 또는 Local 모델(Ollama) 중 선택 가능
-    - 결과를 MongoDB에 자동 저장
+    - 결과를 메모리 LRU + MongoDB(persona 컬렉션)에 캐싱
+    - 여러 객체는 get_traits_batch로 Wikipedia 동시 검색 + LLM 한 번 호출로 처리
     """
+    NOT_FOUND_MESSAGE = "❌ 해당 객체에 대한 정보를 찾을 수 없습니다."
+    FAILED_MESSAGE = "❌ 성격 분석 실패."
 
-    def __init__(self, GEMINI_API_KEY=None):
+    def __init__(self, GEMINI_API_KEY=None, db=None, cache_size:int=1024, max_workers:int=8, batch_size:int=20):
+        """
+        :param db: persona 캐시를 저장할 MongoDBConnection (None이면 메모리 캐시만 사용)
+        :param cache_size: 메모리 캐시 항목 수
+        :param max_workers: Wikipedia 동시 검색 스레드 수
+        :param batch_size: LLM 한 번 호출에 넣을 최대 객체 수
+        """
         self.source = "wikipedia"  # 검색 소스: "wikipedia" 또는 "gemini"
         self.local_model = "llama3.2"  # Local 모델 이름
         self.retriever = WikipediaRetriever()
+        self.db = db
+        self.cache = LRUCache(max_items=cache_size)
+        self.max_workers = max_workers
+        self.batch_size = batch_size
 
         if GEMINI_API_KEY:
             genai.configure(api_key=GEMINI_API_KEY)
             self.gemini_model = genai.GenerativeModel('gemini-2.0-flash')
 
+    @staticmethod
+    def cache_key(object_name:str) -> str:
+        return object_name.strip().lower()
+
+    def get_cached_traits(self, object_name:str) -> str:
+        """
+        이미 분석한 객체면 성격 반환, 아니면 None
+        """
+        key = self.cache_key(object_name)
+        traits = self.cache.get(key)
+        if traits is None and self.db:
+            found = next(self.db.iter_data_from_query("persona", {"name": key}, {"traits": 1}, limit=1), None)
+            if found:
+                traits = found["traits"]
+                self.cache.put(key, traits)
+        return traits
+
+    def save_traits(self, object_name:str, traits:str):
+        key = self.cache_key(object_name)
+        self.cache.put(key, traits)
+        if self.db:
+            try:
+                self.db.upsert_data("persona", {"name": key}, {"name": key, "traits": traits, "create_time": datetime.now()})
+            except Exception as e:
+                print(f"persona 캐시 저장 실패 : {e}")
+
+    def search_context(self, object_name:str) -> str:
+        """
+        Wikipedia에서 객체 정보 검색. 없으면 None
+        """
+        try:
+            docs = self.retriever.invoke(object_name)
+        except Exception as e:
+            print(f"Wikipedia 검색 실패 ({object_name}) : {e}")
+            return None
+        if not docs:
+            return None
+        return docs[0].page_content
 
     def get_traits(self, object_name: str) -> str:
         """
         객체 정보를 검색하고 성격 분석을 수행.
-        - DB에 해당 객체 정보가 존재하면 그대로 반환.
-        - 존재하지 않으면 새로 분석 후 DB에 저장.
+        - 캐시(메모리/DB)에 해당 객체 정보가 존재하면 그대로 반환.
+        - 존재하지 않으면 새로 분석 후 캐시에 저장.
         """
+        cached = self.get_cached_traits(object_name)
+        if cached is not None:
+            return cached
+
         # 🔍 정보 검색 단계
-        docs = self.retriever.invoke(object_name)
-        if not docs:
-            return "❌ 해당 객체에 대한 정보를 찾을 수 없습니다."
-        context = docs[0].page_content
-        
+        context = self.search_context(object_name)
+        if not context:
+            return self.NOT_FOUND_MESSAGE
+
         # 🔍 성격 분석 (Local LLM 또는 GEMINI)
         prompt_template = PromptTemplate(
             input_variables=["object_name", "context"],
@@ -41,5 +101,82 @@ class DetectPersona:
         # local llm 사용할 경우
         # traits = self.local_llm.invoke(final_prompt)  # ✅ 최신 메서드 사용
         response = self.gemini_model.generate_content(final_prompt)
-        traits = response.text if response else "❌ 성격 분석 실패."
-        return traits
\ No newline at end of file
+        if not response or not response.text:
+            return self.FAILED_MESSAGE
+        traits = response.text
+        self.save_traits(object_name, traits)
+        return traits
+
+    def get_traits_batch(self, object_names:list, context_limit:int=2000) -> dict:
+        """
+        여러 객체의 성격을 한 번에 분석해서 {객체 이름: 성격} 반환.
+        - 캐시에 있는 객체는 바로 사용
+        - 나머지는 Wikipedia를 동시에 검색하고, batch_size개씩 묶어서 LLM 한 번으로 분석
+        - LLM 응답에서 빠진 객체는 get_traits로 하나씩 다시 분석
+        """
+        result = {}
+        missing = []
+        for name in dict.fromkeys(object_names):  # 순서 유지하면서 중복 제거
+            cached = self.get_cached_traits(name)
+            if cached is not None:
+                result[name] = cached
+            else:
+                missing.append(name)
+        if not missing:
+            return result
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            contexts = dict(zip(missing, executor.map(self.search_context, missing)))
+
+        searched = []
+        for name, context in contexts.items():
+            if context:
+                searched.append(name)
+            else:
+                result[name] = self.NOT_FOUND_MESSAGE
+
+        for start in range(0, len(searched), self.batch_size):
+            chunk = searched[start:start + self.batch_size]
+            generated = self.generate_traits_batch({name: contexts[name][:context_limit] for name in chunk})
+            for name in chunk:
+                traits = generated.get(name)
+                if traits:
+                    self.save_traits(name, traits)
+                    result[name] = traits
+                else:
+                    result[name] = self.get_traits(name)
+        return result
+
+    def generate_traits_batch(self, contexts:dict) -> dict:
+        """
+        {객체 이름: 검색된 정보}를 LLM 한 번 호출로 분석해서 {객체 이름: 성격} 반환.
+        응답 파싱에 실패하면 빈 dict 반환
+        """
+        information = "\n\n".join([f"### {name}\n{context}" for name, context in contexts.items()])
+        prompt = ("Based on the following information, describe the personality traits of each object "
+                  "in only 1 briefly and short sentence words. "
+                  "Respond only with a JSON object whose keys are exactly the object names below "
+                  f"and whose values are the sentences.\nObjects: {json.dumps(list(contexts.keys()), ensure_ascii=False)}\n\n"
+                  f"{information}")
+        try:
+            response = self.gemini_model.generate_content(prompt)
+            text = response.text if response else ""
+            # ```json ... ``` 으로 감싸서 오는 경우 벗겨내기
+            match = re.search(r"\{.*\}", text, re.DOTALL)
+            parsed = json.loads(match.group(0)) if match else {}
+        except Exception as e:
+            print(f"성격 일괄 분석 실패 : {e}")
+            return {}
+        lowered = {self.cache_key(str(key)): value for key, value in parsed.items()}
+        return {name: str(lowered[self.cache_key(name)]).strip()
+                for name in contexts.keys()
+                if lowered.get(self.cache_key(name))}
+
+    async def aget_traits(self, object_name:str) -> str:
+        """
+        async endpoint에서 event loop를 막지 않도록 스레드에서 get_traits 실행
+        """
+        return await asyncio.to_thread(self.get_traits, object_name)
+
+    async def aget_traits_batch(self, object_names:list) -> dict:
+        return await asyncio.to_thread(self.get_traits_batch, object_names)
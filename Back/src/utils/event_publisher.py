@@ -0,0 +1,58 @@
+import queue
+import threading
+import requests
+
+
+class EventPublisher:
+    """
+    Back에서 데이터가 바뀌었을 때 구독자(Web 서버 등)에게 알려주는 가벼운 pub/sub.
+    publish("profile", id)처럼 부르면 백그라운드 스레드가 구독 url마다
+    {"event": "profile", "ids": [...]}를 POST 한다.
+    - 요청 처리 흐름을 막지 않도록 queue에 넣고 바로 반환
+    - 밀려 있는 같은 종류 이벤트는 한 번으로 합쳐서 보냄
+    - 전송 실패는 출력만 하고 버림 (구독자 쪽 캐시에는 TTL이 있으므로)
+    """
+    def __init__(self, subscribers:list=None, timeout:float=2.0, token:str=None):
+        """
+        :param subscribers: 이벤트를 받을 url 목록 (ex. ["http://127.0.0.1:8001/cache/invalidate"])
+        :param token: 구독자가 확인할 공유 토큰. X-Cache-Token 헤더로 보냄
+        """
+        self.subscribers = list(subscribers or [])
+        self.timeout = timeout
+        self.headers = {"X-Cache-Token": token} if token else {}
+        self.events = queue.Queue()
+        self.thread = None
+        if self.subscribers:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def publish(self, event:str, id:str=None):
+        if self.thread:
+            self.events.put((event, id))
+
+    def drain(self) -> dict:
+        """
+        queue에 쌓인 이벤트를 {event: set(id)}로 합쳐서 반환. 하나가 올 때까지 기다린다
+        """
+        event, id = self.events.get()
+        pending = {event: set()}
+        if id:
+            pending[event].add(id)
+        while True:
+            try:
+                event, id = self.events.get_nowait()
+            except queue.Empty:
+                return pending
+            pending.setdefault(event, set())
+            if id:
+                pending[event].add(id)
+
+    def run(self):
+        while True:
+            for event, ids in self.drain().items():
+                for url in self.subscribers:
+                    try:
+                        requests.post(url, json={"event": event, "ids": sorted(ids)},
+                                      headers=self.headers, timeout=self.timeout)
+                    except Exception as e:
+                        print(f"이벤트 전송 실패 ({url}, {event}) : {e}")
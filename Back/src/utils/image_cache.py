@@ -0,0 +1,115 @@
+import asyncio
+from fastapi.responses import Response
+from .image_store import ImageStore
+from .lru_cache import LRUCache
+
+class ImageCache:
+    """
+    프로필 이미지 HTTP 응답 캐시.
+    - 해시 이름(content-addressed) 이미지는 내용이 바뀌지 않으므로 immutable로 응답
+    - ETag / If-None-Match가 맞으면 본문 없이 304 반환
+    - 자주 요청되는 이미지 bytes는 메모리 LRU에 들고 있어서 파일/DB 접근 없이 응답
+    """
+    IMMUTABLE_CACHE_CONTROL = "public, max-age={max_age}, immutable"
+    DEFAULT_CACHE_CONTROL = "public, max-age={max_age}"
+
+    def __init__(self, image_store:ImageStore, max_bytes:int=64*1024*1024, max_age:int=31536000, legacy_max_age:int=3600):
+        """
+        :param image_store: variant 이름, 해시 계산에 사용할 ImageStore
+        :param max_bytes: 메모리에 들고 있을 이미지 bytes 총량
+        :param max_age: 해시 이름 이미지의 Cache-Control max-age (초)
+        :param legacy_max_age: 예전 이름 이미지의 Cache-Control max-age (초)
+        """
+        self.image_store = image_store
+        self.max_age = max_age
+        self.legacy_max_age = legacy_max_age
+        self.lru = LRUCache(max_bytes=max_bytes, sizeof=lambda entry: len(entry["data"]))
+
+    def etag_of(self, filename:str, variant:str) -> str:
+        """
+        해시 이름이면 파일을 읽지 않고 ETag 계산. 아니면 None
+        """
+        digest = self.image_store.digest_of(filename)
+        if digest:
+            return f'"{digest}-{variant}"'
+        return None
+
+    def headers(self, filename:str, etag:str) -> dict:
+        if self.image_store.digest_of(filename):
+            cache_control = self.IMMUTABLE_CACHE_CONTROL.format(max_age=self.max_age)
+        else:
+            cache_control = self.DEFAULT_CACHE_CONTROL.format(max_age=self.legacy_max_age)
+        return {"ETag": etag, "Cache-Control": cache_control}
+
+    @staticmethod
+    def etag_matches(if_none_match:str, etag:str) -> bool:
+        if not if_none_match or not etag:
+            return False
+        candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+        # W/ 약한 비교도 같은 것으로 취급
+        return "*" in candidates or etag in [candidate.removeprefix("W/") for candidate in candidates]
+
+    def lookup(self, filename:str, variant:str, if_none_match:str) -> tuple:
+        """
+        메모리 캐시 확인. (variant, 캐시 항목, etag, 바로 보낼 304 Response 또는 None) 반환
+        """
+        if variant not in self.image_store.VARIANTS:
+            variant = "original"
+        entry = self.lru.get((filename, variant))
+        etag = entry["etag"] if entry else self.etag_of(filename, variant)
+        if self.etag_matches(if_none_match, etag):
+            return variant, entry, etag, Response(status_code=304, headers=self.headers(filename, etag))
+        return variant, entry, etag, None
+
+    def load(self, filename:str, variant:str, if_none_match:str, path:str, etag:str) -> tuple:
+        """
+        로컬 파일을 읽어 메모리 캐시에 넣음. (캐시 항목, 304 Response 또는 None) 반환
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        if not etag:
+            etag = f'"{self.image_store.hash_bytes(data)}-{variant}"'
+        entry = {"data": data, "media_type": self.image_store.media_type(path), "etag": etag}
+        self.lru.put((filename, variant), entry)
+        if self.etag_matches(if_none_match, etag):
+            return entry, Response(status_code=304, headers=self.headers(filename, etag))
+        return entry, None
+
+    def content_response(self, filename:str, entry:dict) -> Response:
+        return Response(content=entry["data"],
+                        media_type=entry["media_type"],
+                        headers=self.headers(filename, entry["etag"]))
+
+    def response(self, filename:str, variant:str, if_none_match:str, loader) -> Response:
+        """
+        이미지 응답 만들기.
+        :param loader: (filename, variant)를 받아 로컬 파일 경로를 돌려주는 함수. 없으면 None 반환
+        :return: 200/304 Response, 이미지가 없으면 None
+        """
+        variant, entry, etag, not_modified = self.lookup(filename, variant, if_none_match)
+        if not_modified:
+            return not_modified
+        if entry is None:
+            path = loader(filename, variant)
+            if not path:
+                return None
+            entry, not_modified = self.load(filename, variant, if_none_match, path, etag)
+            if not_modified:
+                return not_modified
+        return self.content_response(filename, entry)
+
+    async def aresponse(self, filename:str, variant:str, if_none_match:str, loader) -> Response:
+        """
+        response의 async 버전. loader는 async 함수이고, 파일 읽기는 스레드에서 한다
+        """
+        variant, entry, etag, not_modified = self.lookup(filename, variant, if_none_match)
+        if not_modified:
+            return not_modified
+        if entry is None:
+            path = await loader(filename, variant)
+            if not path:
+                return None
+            entry, not_modified = await asyncio.to_thread(self.load, filename, variant, if_none_match, path, etag)
+            if not_modified:
+                return not_modified
+        return self.content_response(filename, entry)
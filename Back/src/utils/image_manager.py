@@ -1,6 +1,8 @@
 import base64
+import io
 from fastapi import UploadFile, File
 from .mongodb_connection import MongoDBConnection
+from .image_store import ImageStore
 from datetime import datetime
 import shutil
 import os
@@ -10,23 +12,65 @@ class ImageManager:
     def __init__(self, db:MongoDBConnection, img_path:str):
         self.db = db
         self.img_path = img_path
+        # 해시 이름 기반 로컬 저장소 - 중복 제거 + 썸네일/webp 생성
+        self.image_store = ImageStore(img_path)
     
 
     def save_image_in_mongoDB_from_local(self, image_name:str) -> dict:
         """
         image_name과 self.img_path를 조합해서 저장된 이미지를 mongoDB에 올리기기
+        같은 이미지(sha256)가 이미 올라가 있으면 새로 올리지 않고 기존 id 반환
         {"result": "success" or "error", "file_id":mongoDB에 업로드된 ID}
         """
         full_path = os.path.join(self.img_path, image_name)
         if not os.path.exists(full_path):
             return {"result":"error"}
         with open(full_path, "rb") as image_file:
-            encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
+            image_bytes = image_file.read()
 
-        image_data = {"filename" : f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{image_name}", "data": encoded_string}
+        digest = self.image_store.hash_bytes(image_bytes)
+        duplicated = self.db.select_data_from_query('image', {"sha256": digest})
+        if duplicated:
+            return {"result":"success", "file_id": str(duplicated[0]["_id"])}
+
+        encoded_string = base64.b64encode(image_bytes).decode('utf-8')
+        image_data = {"filename" : self.image_store.filename_of(digest), "sha256": digest, "data": encoded_string}
         result = self.db.insert_data('image', image_data)
         return {"result":"success", "file_id": str(result)}
 
+    def save_images_in_mongoDB_from_local(self, image_names:list) -> dict:
+        """
+        여러 이미지를 한 번에 mongoDB에 올리기.
+        sha256으로 기존 이미지를 한 번의 쿼리로 찾고, 새 이미지만 insert_many로 올림
+        {image_name: {"result": "success" or "error", "file_id": ID}} 반환
+        """
+        result = {}
+        image_bytes = {}
+        for image_name in dict.fromkeys(image_names):
+            full_path = os.path.join(self.img_path, image_name)
+            if not os.path.exists(full_path):
+                result[image_name] = {"result":"error"}
+                continue
+            with open(full_path, "rb") as image_file:
+                image_bytes[image_name] = image_file.read()
+
+        digests = {image_name: self.image_store.hash_bytes(data) for image_name, data in image_bytes.items()}
+        existing = {image["sha256"]: str(image["_id"])
+                    for image in self.db.select_data_from_query('image', {"sha256": {"$in": list(set(digests.values()))}})}
+
+        new_images = {}
+        for image_name, digest in digests.items():
+            if digest not in existing and digest not in new_images:
+                new_images[digest] = {"filename": self.image_store.filename_of(digest),
+                                      "sha256": digest,
+                                      "data": base64.b64encode(image_bytes[image_name]).decode('utf-8')}
+        inserted_ids = self.db.insert_many_data('image', list(new_images.values()))
+        existing.update({digest: str(inserted_id) for digest, inserted_id in zip(new_images.keys(), inserted_ids)})
+
+        for image_name, digest in digests.items():
+            result[image_name] = {"result":"success", "file_id": existing[digest]}
+        return result
+
     def save_image_in_local_from_mongoDB(self, file_id:str) -> dict:
         try:
             image_data = self.db.select_data_from_id('image', file_id)
@@ -35,20 +79,22 @@ class ImageManager:
                 return {"error": "File not found"}
             
             image = base64.b64decode(image_data["data"])
-            with open(f"{self.img_path}\\{image_data['filename']}", "wb") as file:
+            save_path = os.path.join(self.img_path, image_data['filename'])
+            with open(save_path, "wb") as file:
                 file.write(image)
-            return {"result":True, "data": f"{self.img_path}\\{image_data['filename']}"}
+            return {"result":True, "data": save_path}
         
         except Exception as e:
             return {"result":False, "data":e}
         
     def save_image_in_local_from_form(self, file:UploadFile=File(...)) -> dict:
-        new_filename = f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{file.filename}.png"
-        save_path = f"{self.img_path}\\{new_filename}"
+        """
+        form으로 받은 이미지를 해시 이름으로 저장.
+        같은 사진을 여러 번 올려도 파일은 하나만 남는다.
+        """
         try:
-            with open(save_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-
+            new_filename = self.image_store.save(file.file.read())
+            save_path = os.path.join(self.img_path, new_filename)
             return {"result":True, "data":save_path, "filename":new_filename}
         except Exception as e:
             print(e)
@@ -56,18 +102,16 @@ class ImageManager:
         
     def crop_image(self, image_path:str, data:dict) -> str:
         """
-        로컬의 이미지를 잘라서 저장하고 자른 이미지파일 경로 반환
-        
+        로컬의 이미지를 잘라서 저장하고 자른 이미지파일 이름 반환
+        잘라낸 이미지도 해시 이름으로 저장되므로 같은 crop은 중복 저장되지 않음
         """
-        image_name = image_path.split("\\")[-1]
-        target_image = Image.open(image_path)
-        bbox = data["bounding_box"]
-        x1 = int(bbox["x1"])
-        x2 = int(bbox["x2"])
-        y1 = int(bbox["y1"])
-        y2 = int(bbox["y2"])
-        cropped_image = target_image.crop((x1, y1, x2, y2))
-        cropped_image_name = f"cropped_{data['object_name']}_{image_name}"
-        cropped_image_path = os.path.join(self.img_path, cropped_image_name)
-        cropped_image.save(cropped_image_path)
-        return cropped_image_name
\ No newline at end of file
+        with Image.open(image_path) as target_image:
+            bbox = data["bounding_box"]
+            x1 = int(bbox["x1"])
+            x2 = int(bbox["x2"])
+            y1 = int(bbox["y1"])
+            y2 = int(bbox["y2"])
+            cropped_image = target_image.crop((x1, y1, x2, y2))
+            buffer = io.BytesIO()
+            cropped_image.save(buffer, format="PNG")
+        return self.image_store.save(buffer.getvalue())
@@ -0,0 +1,84 @@
+"""
+자주 쓰는 쿼리에 explain()을 돌려서 인덱스를 타는지 확인하는 진단 스크립트.
+winningPlan에 COLLSCAN이 있으면 표시하고 종료 코드 1로 끝난다.
+
+실행 (Back 폴더에서, .env의 MONGO_URI, DB_NAME 사용)
+python -m src.utils.index_check
+python -m src.utils.index_check --ensure   # 인덱스를 먼저 만들고 확인
+"""
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+from .mongodb_connection import MongoDBConnection
+
+SAMPLE_ID = "000000000000000000000000"
+
+# (이름, 컬렉션, 쿼리) - 코드에서 실제로 쓰는 조건과 같은 모양
+HOT_QUERIES = [
+    ("get_stats_by_id", "progress", {"$or": [{"participants.pos.id": SAMPLE_ID},
+                                             {"participants.neg.id": SAMPLE_ID}]}),
+    ("get_name_by_id (pos)", "progress", {"participants.pos.id": SAMPLE_ID}),
+    ("get_name_by_id (neg)", "progress", {"participants.neg.id": SAMPLE_ID}),
+    ("send_image", "image", {"filename": "sample.png"}),
+    ("image dedup", "image", {"sha256": {"$in": ["sample"]}}),
+    ("profile duplicate", "object", {"name": "sample", "ai": "GEMINI"}),
+    ("persona cache", "persona", {"name": "sample"}),
+    ("detect cache", "detect_cache", {"key": "sample"}),
+]
+
+
+def plan_stages(plan:dict) -> list:
+    """
+    winningPlan 트리의 stage 이름을 모두 모아서 반환
+    """
+    stages = [plan.get("stage")]
+    if "inputStage" in plan:
+        stages += plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    # 8.0 이상에서 slot-based 실행 엔진이면 queryPlan 아래에 있음
+    if "queryPlan" in plan:
+        stages += plan_stages(plan["queryPlan"])
+    return [stage for stage in stages if stage]
+
+
+def check(db:MongoDBConnection) -> list:
+    """
+    HOT_QUERIES마다 {"name", "collection", "stages", "collscan"} 반환
+    """
+    result = []
+    for name, collection_name, query in HOT_QUERIES:
+        explained = db.get_collection(collection_name).find(query).explain()
+        stages = plan_stages(explained["queryPlanner"]["winningPlan"])
+        result.append({"name": name,
+                       "collection": collection_name,
+                       "stages": stages,
+                       "collscan": "COLLSCAN" in stages})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="핫 쿼리 explain() - COLLSCAN 확인")
+    parser.add_argument("--ensure", action="store_true", help="확인 전에 ensure_indexes() 실행")
+    args = parser.parse_args()
+
+    load_dotenv()
+    MONGO_URI = os.getenv("MONGO_URI")
+    DB_NAME = os.getenv("DB_NAME")
+    if not MONGO_URI or not DB_NAME:
+        raise ValueError("MONGO_URI 또는 DB_NAME이 .env 파일에서 설정되지 않았습니다.")
+    db = MongoDBConnection(MONGO_URI, DB_NAME)
+    if args.ensure:
+        print(db.ensure_indexes())
+
+    rows = check(db)
+    for row in rows:
+        mark = "❌ COLLSCAN" if row["collscan"] else "✅"
+        print(f"{mark:<12}{row['name']:<24}{row['collection']:<14}{' <- '.join(row['stages'])}")
+    db.close_connection()
+    sys.exit(1 if any(row["collscan"] for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument, DESCENDING, ASCENDING
+
+
+class JobQueue:
+    """
+    DB(job 컬렉션)에 저장되는 작업 큐. 프로세스가 재시작돼도 남은 작업을 이어서 처리하고, Back 여러 개가 나눠서 처리한다.
+    job 문서 : {group, kind, payload, status, priority, attempts, max_attempts, owner, expires_at, result, error, create_time, update_time}
+    - status : "pending" -> "running" -> "done" | "failed" (실패 시 attempts < max_attempts면 다시 "pending")
+    - claim : priority 높은 순, 오래된 순으로 pending 작업 또는 lease가 만료된 running 작업을 원자적으로 가져옴
+    - group : 같이 묶인 작업 id (ex. 토너먼트 id). 진행 상황 집계에 사용
+    """
+    COLLECTION = "job"
+
+    def __init__(self, db, owner:str=None, lease_seconds:int=600, max_attempts:int=3):
+        """
+        :param db: MongoDBConnection 또는 같은 API의 저장소
+        :param owner: 이 프로세스 id. 없으면 "호스트:pid:임의값"
+        :param lease_seconds: 작업 하나를 잡고 있을 수 있는 시간. 넘으면 다른 프로세스가 다시 가져감
+        :param max_attempts: 기본 최대 시도 횟수
+        """
+        self.db = db
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+
+    def collection(self):
+        return self.db.get_collection(self.COLLECTION)
+
+    def enqueue(self, group:str, kind:str, payloads:list, priority:int=0, max_attempts:int=None, ids:list=None) -> list:
+        """
+        payload 하나당 작업 하나 등록
+        :param ids: 미리 정한 job id (같은 id로 다시 등록하면 DuplicateKeyError -> 중복 등록 방지)
+        :return: 등록된 job id 목록
+        """
+        now = datetime.now()
+        jobs = [{"group": group,
+                 "kind": kind,
+                 "payload": payload,
+                 "status": "pending",
+                 "priority": priority,
+                 "attempts": 0,
+                 "max_attempts": max_attempts or self.max_attempts,
+                 "owner": None,
+                 "expires_at": None,
+                 "result": None,
+                 "error": None,
+                 "create_time": now,
+                 "update_time": now} for payload in payloads]
+        for job, id in zip(jobs, ids or []):
+            job["_id"] = ObjectId(id)
+        return [str(id) for id in self.db.insert_many_data(self.COLLECTION, jobs, ordered=True)]
+
+    def claim(self, kind:str=None, groups:list=None) -> dict:
+        """
+        처리할 작업 하나를 가져옴. 없으면 None
+        :param kind: 이 종류의 작업만
+        :param groups: 이 group의 작업만 (동시 실행 제한 등으로 고를 때)
+        """
+        now = datetime.now()
+        query = {"$or": [{"status": "pending"},
+                         {"status": "running", "expires_at": {"$lt": now}}]}
+        if kind:
+            query["kind"] = kind
+        if groups is not None:
+            query["group"] = {"$in": groups}
+        job = self.collection().find_one_and_update(
+            query,
+            {"$set": {"status": "running", "owner": self.owner, "expires_at": now + self.lease, "update_time": now},
+             "$inc": {"attempts": 1}},
+            sort=[("priority", DESCENDING), ("create_time", ASCENDING)],
+            return_document=ReturnDocument.AFTER)
+        if job:
+            job["_id"] = str(job["_id"])
+        return job
+
+    def complete(self, job_id:str, result:dict=None) -> bool:
+        updated = self.collection().update_one(
+            {"_id": ObjectId(job_id), "owner": self.owner},
+            {"$set": {"status": "done", "result": result, "expires_at": None, "update_time": datetime.now()}})
+        return bool(updated.matched_count)
+
+    def fail(self, job_id:str, error:str) -> str:
+        """
+        실패 기록. 시도 횟수가 남았으면 다시 pending
+        :return: 바뀐 status
+        """
+        job = self.collection().find_one({"_id": ObjectId(job_id), "owner": self.owner}, {"attempts": 1, "max_attempts": 1})
+        if not job:
+            return None
+        status = "pending" if job["attempts"] < job.get("max_attempts", self.max_attempts) else "failed"
+        self.collection().update_one(
+            {"_id": ObjectId(job_id), "owner": self.owner},
+            {"$set": {"status": status, "error": str(error), "owner": None, "expires_at": None,
+                      "update_time": datetime.now()}})
+        return status
+
+    def cancel_group(self, group:str) -> int:
+        """
+        group의 아직 시작 안 한 작업 취소
+        :return: 취소한 작업 수
+        """
+        count = 0
+        for job in self.db.iter_data_from_query(self.COLLECTION, {"group": group, "status": "pending"}, {"_id": 1}):
+            updated = self.collection().update_one({"_id": job["_id"], "status": "pending"},
+                                                   {"$set": {"status": "cancelled", "update_time": datetime.now()}})
+            count += updated.matched_count
+        return count
+
+    def group_stats(self, group:str) -> dict:
+        """
+        :return: {"total": 전체, status별 개수...}
+        """
+        stats = {"total": 0, "pending": 0, "running": 0, "done": 0, "failed": 0, "cancelled": 0}
+        for job in self.db.iter_data_from_query(self.COLLECTION, {"group": group}, {"status": 1}):
+            stats["total"] += 1
+            stats[job["status"]] = stats.get(job["status"], 0) + 1
+        return stats
+
+    def has_active(self, kind:str=None) -> bool:
+        query = {"status": {"$in": ["pending", "running"]}}
+        if kind:
+            query["kind"] = kind
+        return next(self.db.iter_data_from_query(self.COLLECTION, query, {"_id": 1}, limit=1), None) is not None
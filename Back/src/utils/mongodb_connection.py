@@ -1,17 +1,19 @@
 from dotenv import load_dotenv
 from pymongo import MongoClient
 from bson.objectid import ObjectId
+from .storage_backend import StorageBackend
 
 # MongoDB 연결 및 데이터 저장 클래스
-class MongoDBConnection:
-    def __init__(self, uri: str, db_name: str):
+class MongoDBConnection(StorageBackend):
+    def __init__(self, uri: str, db_name: str, **pool_options):
         """
         MongoDB 연결을 위한 초기화.
         :param uri: MongoDB 연결 URI
         :param db_name: 사용할 데이터베이스 이름
+        :param pool_options: maxPoolSize, minPoolSize, maxIdleTimeMS 등 연결 풀 옵션
         """
         try:
-            self.client = MongoClient(uri)
+            self.client = MongoClient(uri, **pool_options)
 #             =uri,
 #                                       tls = True,
 #                                       tlsAllowInvalidCertificates=True  # 인증서 검증을 건너뜁니다 (개발 환경에서만!)
@@ -22,6 +24,23 @@ class MongoDBConnection:
         except Exception as e:
             print("❌ Connection failed:", e)
 
+    def ensure_indexes(self) -> dict:
+        """
+        INDEXES에 정의된 인덱스를 만든다. 이미 있으면 그대로 둠.
+        기존 데이터에 중복이 있어서 unique 인덱스를 못 만드는 경우 등은 출력만 하고 계속 진행.
+        :return: {컬렉션: [만든 인덱스 이름 또는 실패 메시지]}
+        """
+        result = {}
+        for collection_name, indexes in self.INDEXES.items():
+            result[collection_name] = []
+            for keys, options in indexes:
+                try:
+                    result[collection_name].append(self.db[collection_name].create_index(keys, **options))
+                except Exception as e:
+                    print(f"❌ 인덱스 생성 실패 ({collection_name}.{options.get('name')}) : {e}")
+                    result[collection_name].append(f"failed: {options.get('name')}")
+        return result
+
     def get_collection(self, collection_name: str):
         """
         지정된 컬렉션 객체를 반환합니다.
@@ -34,6 +53,12 @@ class MongoDBConnection:
     def insert_data(self, collection_name: str, data:dict):
         return self.db[collection_name].insert_one(data).inserted_id
     
+    #여러 개를 한 번에 insert. ordered=False면 중간에 실패한 문서가 있어도 나머지는 계속 insert
+    def insert_many_data(self, collection_name: str, data_list:list, ordered:bool=False) -> list:
+        if not data_list:
+            return []
+        return self.db[collection_name].insert_many(data_list, ordered=ordered).inserted_ids
+
     #RDBMS 쿼리문에서의 Select문을 대체 - id로 선택.
     def select_data_from_id(self, collection_name: str, id:str):
         return self.db[collection_name].find_one({"_id":ObjectId(id)})
@@ -46,15 +71,35 @@ class MongoDBConnection:
             result.append(data)
         return result
 
+    #select_data_from_query의 generator 버전. 리스트로 모으지 않고 batch_size개씩 받아오면서 하나씩 넘겨줌
+    #projection: 가져올 필드 ({"debate_log": 0} 처럼 빼기도 가능), sort: [(필드, 1 또는 -1)], limit: 0이면 제한 없음
+    def iter_data_from_query(self, collection_name:str, query:dict=None, projection:dict=None,
+                             sort:list=None, limit:int=0, batch_size:int=100):
+        cursor = self.db[collection_name].find(query or {}, projection, batch_size=batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        try:
+            for data in cursor:
+                yield data
+        finally:
+            cursor.close()
+
     #RDBMS 쿼리문에서의 Update문을 대체.
-    def update_data(self, collection_name: str, data:dict):
+    #query가 있으면 _id와 같이 조건으로 사용 (ex. lease를 아직 잡고 있을 때만 저장)
+    def update_data(self, collection_name: str, data:dict, query:dict=None):
         original_id = data["_id"]
         if type(original_id) != ObjectId:
             data["_id"] = ObjectId(data["_id"])
-        result = self.db[collection_name].update_one({"_id":data["_id"]}, {"$set":data})
+        result = self.db[collection_name].update_one({"_id":data["_id"], **(query or {})}, {"$set":data})
         data["_id"] = original_id
         return result
 
+    #query에 맞는 문서가 있으면 update, 없으면 insert (unique 인덱스가 걸린 캐시 컬렉션 저장용)
+    def upsert_data(self, collection_name: str, query:dict, data:dict):
+        return self.db[collection_name].update_one(query, {"$set":data}, upsert=True)
+
     def close_connection(self):
         """
         MongoDB 연결 종료
@@ -0,0 +1,360 @@
+"""
+progress, object 컬렉션을 날짜별로 나눈 Parquet 파일로 내보내는 스크립트/클래스.
+- debates : 토론 한 건 = 한 행 (메타데이터, 참가자, score 열)
+- turns   : debate_log 발언 한 건 = 한 행
+- objects : 프로필 한 건 = 한 행
+out_dir/<table>/date=YYYY-MM-DD/part-<첫 _id>.parquet 로 저장하고, 마지막으로 내보낸 _id(watermark)를 out_dir/_watermark.json에 기록해서
+다음 실행 때는 그 이후 문서만 내보낸다. 진행 중인 토론은 아직 바뀌므로 건너뛰고 watermark의 pending 목록에 따로 기록했다가,
+끝나면 다음 실행 때 내보낸다. pending_max_age_hours가 지나도 끝나지 않은 토론은 멈춘 것으로 보고 목록에서 뺀다.
+--full은 기존 파일과 watermark를 지우고 처음부터 다시 내보낸다.
+
+실행 (Back 폴더에서, .env의 MONGO_URI, DB_NAME 사용)
+python -m src.utils.parquet_exporter --out ../data/export
+python -m src.utils.parquet_exporter --out ../data/export --full   # 기존 파일, watermark 지우고 처음부터
+"""
+import argparse
+import itertools
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+import pyarrow as pa
+import pyarrow.parquet as pq
+from bson.objectid import ObjectId
+from .progress_archiver import ProgressArchiver
+
+METRICS = ("logicality", "rebuttal", "persuasion", "match")
+
+SCHEMAS = {
+    "debates": pa.schema([
+        ("progress_id", pa.string()),
+        ("type", pa.string()),
+        ("topic", pa.string()),
+        ("result", pa.string()),
+        ("pos_id", pa.string()), ("pos_name", pa.string()), ("pos_ai", pa.string()),
+        ("neg_id", pa.string()), ("neg_name", pa.string()), ("neg_ai", pa.string()),
+        ("tournament_id", pa.string()),
+        ("create_time", pa.timestamp("ms")),
+        ("start_time", pa.timestamp("ms")),
+        ("end_time", pa.timestamp("ms")),
+        ("log_length", pa.int32()),
+    ] + [(f"{metric}_{side}", pa.float64()) for metric in METRICS for side in ("pos", "neg")]),
+    "turns": pa.schema([
+        ("progress_id", pa.string()),
+        ("turn", pa.int32()),
+        ("speaker", pa.string()),
+        ("message", pa.string()),
+        ("timestamp", pa.timestamp("ms")),
+    ]),
+    "objects": pa.schema([
+        ("object_id", pa.string()),
+        ("name", pa.string()),
+        ("ai", pa.string()),
+        ("img", pa.string()),
+        ("object_attribute", pa.string()),
+        ("create_time", pa.timestamp("ms")),
+    ]),
+}
+
+
+def text(value) -> str:
+    return None if value is None else str(value)
+
+
+def number(value) -> float:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def timestamp(value):
+    # 예전 문서에는 문자열 시간이 들어있는 경우가 있어서 datetime만 사용
+    return value if hasattr(value, "year") and hasattr(value, "hour") else None
+
+
+class ParquetExporter:
+    WATERMARK_FILE = "_watermark.json"
+
+    def __init__(self, db, out_dir:str, batch_size:int=1000, pending_max_age_hours:float=24):
+        """
+        :param db: MongoDBConnection 또는 같은 API의 저장소
+        :param out_dir: 내보낼 폴더
+        :param batch_size: 파일 하나에 모아서 쓸 최대 문서 수 (메모리 사용량 제한)
+        :param pending_max_age_hours: 생성 후 이 시간이 지나도 안 끝난 토론은 기다리지 않고 버림
+        """
+        self.db = db
+        self.out_dir = out_dir
+        self.batch_size = batch_size
+        self.pending_max_age = timedelta(hours=pending_max_age_hours)
+        self.archiver = ProgressArchiver(db)
+
+    # ---------- watermark ----------
+
+    def read_watermark(self) -> dict:
+        path = os.path.join(self.out_dir, self.WATERMARK_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def write_watermark(self, watermark:dict):
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, self.WATERMARK_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(watermark, file)
+        os.replace(path + ".tmp", path)
+
+    def clear(self):
+        """
+        내보낸 파일과 watermark 삭제 (full 내보내기 전에 호출. 남겨두면 같은 행이 중복됨)
+        """
+        for table in SCHEMAS:
+            shutil.rmtree(os.path.join(self.out_dir, table), ignore_errors=True)
+        path = os.path.join(self.out_dir, self.WATERMARK_FILE)
+        if os.path.exists(path):
+            os.remove(path)
+
+    # ---------- 행 변환 ----------
+
+    @staticmethod
+    def debate_row(progress:dict) -> dict:
+        participants = progress.get("participants") or {}
+        pos, neg = participants.get("pos") or {}, participants.get("neg") or {}
+        score = progress.get("score") or {}
+        row = {
+            "progress_id": str(progress["_id"]),
+            "type": text(progress.get("type")),
+            "topic": text(progress.get("topic")),
+            "result": text(progress.get("result")),
+            "pos_id": text(pos.get("id")), "pos_name": text(pos.get("name")), "pos_ai": text(pos.get("ai")),
+            "neg_id": text(neg.get("id")), "neg_name": text(neg.get("name")), "neg_ai": text(neg.get("ai")),
+            "tournament_id": text(progress.get("tournament_id")),
+            "create_time": ObjectId(str(progress["_id"])).generation_time.replace(tzinfo=None),
+            "start_time": timestamp(progress.get("start_time")),
+            "end_time": timestamp(progress.get("end_time")),
+            "log_length": len(progress.get("debate_log") or []),
+        }
+        for metric in METRICS:
+            for side in ("pos", "neg"):
+                row[f"{metric}_{side}"] = number(score.get(f"{metric}_{side}"))
+        return row
+
+    @staticmethod
+    def turn_rows(progress:dict) -> list:
+        return [{"progress_id": str(progress["_id"]),
+                 "turn": index,
+                 "speaker": text(log.get("speaker")),
+                 "message": text(log.get("message")),
+                 "timestamp": timestamp(log.get("timestamp"))}
+                for index, log in enumerate(progress.get("debate_log") or [])]
+
+    @staticmethod
+    def object_row(obj:dict) -> dict:
+        return {"object_id": str(obj["_id"]),
+                "name": text(obj.get("name")),
+                "ai": text(obj.get("ai")),
+                "img": text(obj.get("img")),
+                "object_attribute": text(obj.get("object_attribute")),
+                "create_time": ObjectId(str(obj["_id"])).generation_time.replace(tzinfo=None)}
+
+    # ---------- 쓰기 ----------
+
+    def write_partitioned(self, table:str, rows:list, dates:list, id_key:str) -> list:
+        """
+        rows를 날짜별 파티션 파일로 저장. 파일 이름은 파티션의 첫 id라서 같은 watermark에서 다시 실행하면 덮어씀
+        :param dates: rows와 같은 순서의 파티션 날짜(datetime)
+        :return: 쓴 파일 경로 목록
+        """
+        partitions = {}
+        for row, date in zip(rows, dates):
+            partitions.setdefault(date.strftime("%Y-%m-%d"), []).append(row)
+        paths = []
+        for date, partition in partitions.items():
+            directory = os.path.join(self.out_dir, table, f"date={date}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"part-{partition[0][id_key]}.parquet")
+            # 임시 파일에 다 쓴 다음 이름 변경 (중간에 죽어도 반쯤 쓴 파일이 남지 않음)
+            pq.write_table(pa.Table.from_pylist(partition, schema=SCHEMAS[table]), path + ".tmp", compression="zstd")
+            os.replace(path + ".tmp", path)
+            paths.append(path)
+        return paths
+
+    # ---------- 내보내기 ----------
+
+    def iter_progress(self, after:ObjectId):
+        """
+        _id > after 인 토론을 _id 순으로 (보관 컬렉션 포함). 보관된 토론은 원래 문서 모양으로 복원
+        """
+        query = {"_id": {"$gt": after}} if after else {}
+        live = self.db.iter_data_from_query("progress", query, sort=[("_id", 1)], batch_size=self.batch_size)
+        archived = (self.archiver.from_archive(archive) for archive in self.db.iter_data_from_query(
+            ProgressArchiver.COLLECTION, query, sort=[("_id", 1)], batch_size=self.batch_size))
+        return self.merge(live, archived)
+
+    @staticmethod
+    def merge(first, second):
+        # _id 순으로 정렬된 두 스트림 합치기. 보관 중이라 양쪽에 다 있는 토론은 한 번만
+        first, second = iter(first), iter(second)
+        a, b = next(first, None), next(second, None)
+        while a is not None or b is not None:
+            if b is None or (a is not None and a["_id"] <= b["_id"]):
+                if b is not None and a["_id"] == b["_id"]:
+                    b = next(second, None)
+                yield a
+                a = next(first, None)
+            else:
+                yield b
+                b = next(second, None)
+
+    def write_debates(self, batch:list, result:dict):
+        """
+        끝난 토론 목록을 debates, turns 파일로 쓰고 result 개수 갱신
+        """
+        if not batch:
+            return
+        debates = [self.debate_row(progress) for progress in batch]
+        files = self.write_partitioned("debates", debates, [debate["create_time"] for debate in debates], "progress_id")
+        # turns는 발언 시간이 아니라 토론 생성 날짜로 나눔 (같은 토론의 발언은 같은 파티션)
+        turns, dates = [], []
+        for debate, progress in zip(debates, batch):
+            for turn in self.turn_rows(progress):
+                turns.append(turn)
+                dates.append(debate["create_time"])
+        files += self.write_partitioned("turns", turns, dates, "progress_id")
+        result["debates"] += len(debates)
+        result["turns"] += sum(debate["log_length"] for debate in debates)
+        result["files"] += len(files)
+
+    def expired(self, progress_id, now:datetime) -> bool:
+        # 생성 후 pending_max_age가 지나도 안 끝난 토론은 멈춘 것으로 봄
+        return ObjectId(str(progress_id)).generation_time.replace(tzinfo=None) < now - self.pending_max_age
+
+    def export_pending(self, watermark:dict, result:dict, now:datetime):
+        """
+        지난번에 진행 중이라 건너뛴 토론(watermark["pending"]) 중 끝난 것을 내보냄
+        """
+        pending = watermark.get("pending") or []
+        if not pending:
+            return
+        query = {"_id": {"$in": [ObjectId(id) for id in pending]}}
+        found = {str(progress["_id"]): progress for progress in self.db.iter_data_from_query("progress", query)}
+        for archive in self.db.iter_data_from_query(ProgressArchiver.COLLECTION, query):
+            found.setdefault(str(archive["_id"]), self.archiver.from_archive(archive))
+        ended, still_pending = [], []
+        for id in pending:
+            progress = found.get(id)
+            if progress is None:
+                # 삭제된 토론
+                continue
+            if (progress.get("status") or {}).get("type") == "end":
+                ended.append(progress)
+            elif self.expired(id, now):
+                print(f"Parquet 내보내기 : {id} 토론이 {self.pending_max_age} 동안 끝나지 않아 건너뜀")
+            else:
+                still_pending.append(id)
+        for start in range(0, len(ended), self.batch_size):
+            self.write_debates(ended[start:start + self.batch_size], result)
+        watermark["pending"] = still_pending
+        self.write_watermark(watermark)
+
+    def export_progress(self, watermark:dict) -> dict:
+        """
+        watermark 이후의 끝난 토론을 debates, turns로 내보냄.
+        진행 중인 토론은 건너뛰고 watermark["pending"]에 기록해서, 끝난 뒤에 export_pending에서 내보냄
+        """
+        now = datetime.now()
+        result = {"debates": 0, "turns": 0, "files": 0}
+        self.export_pending(watermark, result, now)
+        after = ObjectId(watermark["progress"]) if watermark.get("progress") else None
+        stream = self.iter_progress(after)
+        while True:
+            batch, pending = [], []
+            scanned = list(itertools.islice(stream, self.batch_size))
+            for progress in scanned:
+                if (progress.get("status") or {}).get("type") == "end":
+                    batch.append(progress)
+                elif not self.expired(progress["_id"], now):
+                    pending.append(str(progress["_id"]))
+            self.write_debates(batch, result)
+            if scanned:
+                watermark["progress"] = str(scanned[-1]["_id"])
+                watermark["pending"] = (watermark.get("pending") or []) + pending
+                self.write_watermark(watermark)
+            if len(scanned) < self.batch_size:
+                return result
+
+    def export_objects(self, watermark:dict) -> dict:
+        after = ObjectId(watermark["object"]) if watermark.get("object") else None
+        query = {"_id": {"$gt": after}} if after else {}
+        result = {"objects": 0, "files": 0}
+        stream = self.db.iter_data_from_query("object", query, sort=[("_id", 1)], batch_size=self.batch_size)
+        while True:
+            batch = list(itertools.islice(stream, self.batch_size))
+            if batch:
+                objects = [self.object_row(obj) for obj in batch]
+                files = self.write_partitioned("objects", objects, [obj["create_time"] for obj in objects], "object_id")
+                result["objects"] += len(batch)
+                result["files"] += len(files)
+                watermark["object"] = str(batch[-1]["_id"])
+                self.write_watermark(watermark)
+            if len(batch) < self.batch_size:
+                return result
+
+    def export(self, full:bool=False) -> dict:
+        """
+        progress, object 증분 내보내기
+        :param full: True면 기존 파일, watermark를 지우고 처음부터
+        """
+        if full:
+            self.clear()
+        watermark = self.read_watermark()
+        progress_result = self.export_progress(watermark)
+        object_result = self.export_objects(watermark)
+        return {"debates": progress_result["debates"], "turns": progress_result["turns"],
+                "objects": object_result["objects"], "files": progress_result["files"] + object_result["files"],
+                "watermark": dict(watermark)}
+
+    def score_rows(self) -> list:
+        """
+        내보낸 debates 파일을 ScoreAnalytics.add_rows 모양으로 읽음 (DB를 읽지 않고 분석할 때)
+        """
+        directory = os.path.join(self.out_dir, "debates")
+        if not os.path.exists(directory):
+            return []
+        columns = ["progress_id", "pos_id", "neg_id", "pos_ai", "neg_ai", "topic", "result"] + \
+                  [f"{metric}_{side}" for metric in METRICS for side in ("pos", "neg")]
+        table = pq.read_table(directory, columns=columns)
+        results = {"positive": 1, "negative": -1, "draw": 0}
+        rows = []
+        for row in table.to_pylist():
+            if row["result"] not in results or not row["pos_id"] or not row["neg_id"]:
+                continue
+            row.update({"pos": row.pop("pos_id"), "neg": row.pop("neg_id"),
+                        "pos_model": row.pop("pos_ai") or "", "neg_model": row.pop("neg_ai") or "",
+                        "topic": row["topic"] or "", "result": results[row["result"]]})
+            rows.append({key: (float("nan") if value is None and key.endswith(("_pos", "_neg")) else value)
+                         for key, value in row.items()})
+        return rows
+
+
+def main():
+    from dotenv import load_dotenv
+    from .mongodb_connection import MongoDBConnection
+
+    parser = argparse.ArgumentParser(description="progress, object 컬렉션 Parquet 증분 내보내기")
+    parser.add_argument("--out", required=True, help="내보낼 폴더")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--full", action="store_true", help="기존 파일, watermark 지우고 처음부터 내보내기")
+    parser.add_argument("--pending-max-age-hours", type=float, default=24, help="이 시간이 지나도 안 끝난 토론은 건너뜀")
+    args = parser.parse_args()
+
+    load_dotenv()
+    MONGO_URI = os.getenv("MONGO_URI")
+    DB_NAME = os.getenv("DB_NAME")
+    if not MONGO_URI or not DB_NAME:
+        raise ValueError("MONGO_URI 또는 DB_NAME이 .env 파일에서 설정되지 않았습니다.")
+    db = MongoDBConnection(MONGO_URI, DB_NAME)
+    print(ParquetExporter(db, args.out, args.batch_size, args.pending_max_age_hours).export(full=args.full))
+    db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,21 @@ from .mongodb_connection import MongoDBConnection
 from .detect_persona import DetectPersona
 from .profile import Profile
 from datetime import datetime
+from pymongo.errors import DuplicateKeyError, BulkWriteError
+from .progress_archiver import ProgressArchiver
+import itertools
+import asyncio
+
+ARCHIVE_COLLECTION = ProgressArchiver.COLLECTION
+
 class ProfileManager:
-    def __init__(self, db: MongoDBConnection, detect_persona:DetectPersona):
+    def __init__(self, db: MongoDBConnection, detect_persona:DetectPersona, persona_concurrency:int=4):
         self.db = db
-        data = db.select_data_from_query(collection_name="object", query={})
+        # 성격 분석(LLM) 동시 호출 수 제한
+        self.persona_limiter = asyncio.Semaphore(persona_concurrency)
         self.objectlist = {}
         self.detect_persona = detect_persona
-        for raw_object in data:
+        for raw_object in db.iter_data_from_query(collection_name="object"):
             profile = Profile(_id           = str(raw_object.get("_id")),
                           name              = raw_object.get("name"),
                           img               = raw_object.get("img"),
@@ -24,31 +32,89 @@ class ProfileManager:
                         name:str=None,
                         img:str=None,
                         ai:str=None):
-        if not self.duplicate_object_check(name, ai):
+        # 메모리에 이미 있으면 성격 분석(LLM)까지 가지 않고 바로 거절. 최종 판단은 DB unique 인덱스(name, ai)
+        if self.is_duplicate(name, ai):
             return {"result":False}
-        object_attribute = self.detect_persona.get_traits(name)
+        object_attribute = await self.detect_persona.aget_traits(name)
         new_obj = Profile(name=name,
                             img=img,
                             ai=ai,
                             object_attribute=object_attribute,
                             create_time=datetime.now()
                             )
-        new_obj.save(self.db)
+        try:
+            new_obj.save(self.db)
+        except DuplicateKeyError:
+            return {"result":False}
         new_obj.data["_id"] = str(new_obj.data["_id"])
         self.objectlist[new_obj.data["_id"]] = new_obj
         return {"resulr":True, "id":str(new_obj.data["_id"])}
     
-    def duplicate_object_check(self, name:str, ai:str):
+    def split_duplicates(self, items:list) -> tuple:
         """
-        참이면 중복없음
-        거짓이면 중복있음
+        [{"name":..., "ai":..., ...}] 중 이미 있는 (name, ai)와 요청 안에서 겹치는 항목을 걸러냄.
+        objectlist(메모리)와 비교하고, 다른 서버가 동시에 만든 중복은 insert 때 unique 인덱스가 걸러낸다.
+        (새로 만들 항목 list, 건너뛴 항목 list) 반환
         """
-        search_result = self.db.select_data_from_query("object",{"name":name, "ai":ai})
-        print(search_result)
-        if not search_result:
-            return True
-        else:
-            return False
+        existing = {(obj.data.get("name"), obj.data.get("ai")) for obj in self.objectlist.values()}
+        accepted, skipped = [], []
+        for item in items:
+            key = (item["name"], item["ai"])
+            if key in existing:
+                skipped.append({**item, "reason": "duplicate"})
+            else:
+                existing.add(key)
+                accepted.append(item)
+        return accepted, skipped
+
+    async def create_profiles(self, items:list) -> dict:
+        """
+        여러 프로필을 한 번에 생성. items = [{"name":..., "img":image id, "ai":...}]
+        중복 확인은 split_duplicates로 미리 끝났다고 가정한다.
+        성격 분석은 batch 단위로 동시에 (persona_limiter 안에서) 돌리고 프로필은 insert_many로 저장.
+        :return: {"result", "ids": 만든 프로필 id, "skipped": 저장 실패한 item (reason: "duplicate" 등)}
+        """
+        names = list(dict.fromkeys(item["name"] for item in items))
+        batch_size = self.detect_persona.batch_size
+
+        async def analyze(chunk:list) -> dict:
+            async with self.persona_limiter:
+                return await self.detect_persona.aget_traits_batch(chunk)
+
+        traits = {}
+        for chunk_traits in await asyncio.gather(*[analyze(names[start:start + batch_size])
+                                                   for start in range(0, len(names), batch_size)]):
+            traits.update(chunk_traits)
+
+        new_objs = [Profile(name=item["name"],
+                            img=item["img"],
+                            ai=item["ai"],
+                            object_attribute=traits.get(item["name"]),
+                            create_time=datetime.now())
+                    for item in items]
+        failed = {}
+        try:
+            self.db.insert_many_data("object", [obj.data for obj in new_objs])
+        except BulkWriteError as e:
+            # ordered=False라 나머지는 들어감. unique 인덱스(name, ai)에 걸린 것(동시에 같은 프로필 생성)만 빼기
+            failed = {error["index"]: "duplicate" if error.get("code") == 11000 else "insert error"
+                      for error in e.details.get("writeErrors", [])}
+        created, skipped = [], []
+        for index, new_obj in enumerate(new_objs):
+            if index in failed:
+                skipped.append({**items[index], "reason":failed[index]})
+                continue
+            new_obj.data["_id"] = str(new_obj.data["_id"])  # insert_many가 data에 _id를 채워줌
+            self.objectlist[new_obj.data["_id"]] = new_obj
+            created.append(new_obj.data["_id"])
+        return {"result":True, "ids":created, "skipped":skipped}
+
+    def is_duplicate(self, name:str, ai:str) -> bool:
+        """
+        메모리(objectlist)에 같은 (name, ai) 프로필이 있는지 확인
+        """
+        return any(obj.data.get("name") == name and obj.data.get("ai") == ai
+                   for obj in self.objectlist.values())
 
 
     # 특정 이름의 ID를 조회하는 헬퍼 함수
@@ -58,15 +124,17 @@ class ProfileManager:
         - participants.pos.name 또는 participants.neg.name에서 이름 검색
         - 중복 이름이 없다고 가정하고 첫 번째 매칭 결과 반환
         """
-        # pos에서 이름 검색
-        pos_result = collection.find_one({"participants.pos.id": target_id})
-        if pos_result:
-            return pos_result["participants"]["pos"]["name"]
-
-        # neg에서 이름 검색
-        neg_result = collection.find_one({"participants.neg.id": target_id})
-        if neg_result:
-            return neg_result["participants"]["neg"]["name"]
+        # 보관(progress_archive)된 토론도 같은 모양의 participants를 가지고 있으므로 같이 검색
+        for target_collection in (collection, collection.database[ARCHIVE_COLLECTION]):
+            # pos에서 이름 검색
+            pos_result = target_collection.find_one({"participants.pos.id": target_id}, {"participants": 1})
+            if pos_result:
+                return pos_result["participants"]["pos"]["name"]
+
+            # neg에서 이름 검색
+            neg_result = target_collection.find_one({"participants.neg.id": target_id}, {"participants": 1})
+            if neg_result:
+                return neg_result["participants"]["neg"]["name"]
 
         return None  # 이름에 해당하는 ID를 찾지 못한 경우
 
@@ -89,13 +157,16 @@ class ProfileManager:
                 "message": f"No participant found with name: {target_name}"
             }
 
-        # 해당 사용자가 pos 또는 neg로 참여한 모든 문서를 찾음
-        cursor = collection.find({
+        # 해당 사용자가 pos 또는 neg로 참여한 모든 문서를 찾음 (보관된 토론 요약 포함)
+        query = {
             "$or": [
                 {"participants.pos.id": target_id},
                 {"participants.neg.id": target_id}
             ]
-        })
+        }
+        projection = {"participants": 1, "result": 1, "score": 1}
+        cursor = itertools.chain(collection.find(query, projection),
+                                 collection.database[ARCHIVE_COLLECTION].find(query, projection))
 
         total_debates = 0
         wins = 0
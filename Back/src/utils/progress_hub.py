@@ -0,0 +1,138 @@
+import asyncio
+import json
+import threading
+
+
+class ProgressHub:
+    """
+    progress 변경을 구독자(SSE 연결 등)에게 나눠주는 허브.
+    upstream은 하나만 둔다.
+    - MongoDB가 replica set이면 progress 컬렉션 change stream을 스레드에서 tail
+    - 아니면 ProgressManager.save 훅(on_save)으로 받음
+    구독자마다 마지막으로 보낸 debate_log 길이를 기억해서 새 발언만 담은 이벤트를 만들고 (같은 길이의 구독자끼리는 한 번만),
+    구독자마다 크기가 제한된 asyncio.Queue에 넣는다. 느린 구독자는 오래된 이벤트부터 버려지고,
+    이벤트의 since / log_length로 빠진 구간을 알 수 있다.
+    """
+    def __init__(self, db=None, buffer_size:int=256, source:str="auto"):
+        """
+        :param db: change stream을 열 MongoDBConnection
+        :param buffer_size: 구독자 하나당 쌓아둘 최대 이벤트 수
+        :param source: "auto" | "change_stream" | "save_hook"
+        """
+        self.db = db
+        self.buffer_size = buffer_size
+        self.source = source
+        self.loop = None
+        self.subscribers = {}  # progress id -> {asyncio.Queue: 그 구독자에게 마지막으로 보낸 debate_log 길이}
+        self.lock = threading.Lock()
+        self.stream = None
+        self.thread = None
+
+    def start(self, loop:asyncio.AbstractEventLoop=None):
+        """
+        lifespan에서 호출. change stream을 열 수 있으면 tail 스레드 시작, 아니면 save 훅 사용
+        """
+        self.loop = loop or asyncio.get_running_loop()
+        if self.source == "save_hook" or not self.db:
+            self.source = "save_hook"
+            return
+        try:
+            self.stream = self.db.get_collection("progress").watch(
+                # lease 연장/반납만 바뀐 update는 구독자에게 보낼 필요 없음
+                [{"$match": {"$or": [{"operationType": {"$in": ["insert", "replace"]}},
+                                     {"operationType": "update", "updateDescription.updatedFields.lease": {"$exists": False}}]}}],
+                full_document="updateLookup")
+        except Exception as e:
+            # standalone mongod는 change stream을 지원하지 않음
+            print(f"change stream 사용 불가, save 훅으로 대체 : {e}")
+            self.source = "save_hook"
+            return
+        self.source = "change_stream"
+        self.thread = threading.Thread(target=self.tail, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.stream:
+            try:
+                self.stream.close()
+            except Exception:
+                pass
+            self.stream = None
+
+    def tail(self):
+        try:
+            for change in self.stream:
+                document = change.get("fullDocument")
+                if document:
+                    self.publish(str(document["_id"]), document)
+        except Exception as e:
+            if self.stream:
+                print(f"change stream 종료됨, save 훅으로 대체 : {e}")
+                self.source = "save_hook"
+
+    def on_save(self, progress_id:str, data:dict):
+        """
+        ProgressManager.save 훅. change stream을 쓰는 중이면 무시
+        """
+        if self.source == "save_hook":
+            self.publish(progress_id, data)
+
+    def subscribe(self, progress_id:str, log_length:int) -> asyncio.Queue:
+        """
+        :param log_length: 구독 시점에 구독자가 받은 debate_log 길이
+        """
+        queue = asyncio.Queue(maxsize=self.buffer_size)
+        with self.lock:
+            self.subscribers.setdefault(progress_id, {})[queue] = log_length
+        return queue
+
+    def unsubscribe(self, progress_id:str, queue:asyncio.Queue):
+        with self.lock:
+            queues = self.subscribers.get(progress_id)
+            if queues is None:
+                return
+            queues.pop(queue, None)
+            if not queues:
+                self.subscribers.pop(progress_id, None)
+
+    def publish(self, progress_id:str, data:dict):
+        """
+        바뀐 progress 문서로 이벤트를 만들어서 구독자에게 전달. 어느 스레드에서 불러도 됨
+        구독자가 없는 progress는 아무것도 하지 않음
+        """
+        with self.lock:
+            queues = self.subscribers.get(progress_id)
+            if not queues or not self.loop:
+                return
+            debate_log = data.get("debate_log") or []
+            # 구독자를 마지막으로 받은 길이별로 묶음 (보통 모두 같은 길이라 이벤트 하나)
+            groups = {}
+            for queue, sent in queues.items():
+                # 로그가 통째로 바뀐 경우 (Debate_3) 처음부터 다시 보냄
+                since = 0 if sent > len(debate_log) else sent
+                groups.setdefault(since, []).append(queue)
+                queues[queue] = len(debate_log)
+        ended = (data.get("status") or {}).get("type") == "end"
+        for since, targets in groups.items():
+            event = json.dumps({"_id": progress_id,
+                                "status": data.get("status"),
+                                "since": since,
+                                "log_length": len(debate_log),
+                                "debate_log": debate_log[since:]},
+                               ensure_ascii=False, default=str)
+            self.loop.call_soon_threadsafe(self.fan_out, targets, (ended, event))
+
+    def fan_out(self, queues:list, event:tuple):
+        """
+        event = (progress 종료 여부, json 문자열). json은 한 번만 만들어서 같은 묶음의 구독자가 같이 씀
+        """
+        for queue in queues:
+            if queue.full():
+                # 느린 구독자는 가장 오래된 이벤트를 버림
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def stats(self) -> dict:
+        return {"source": self.source,
+                "progress": len(self.subscribers),
+                "subscribers": sum(len(queues) for queues in self.subscribers.values())}
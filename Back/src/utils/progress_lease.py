@@ -0,0 +1,110 @@
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+
+
+class ProgressLease:
+    """
+    progress 문서에 lease {owner, expires_at}를 두고 Back 프로세스 여러 개가 진행 중인 토론을 나눠 갖게 하는 클래스.
+    - claim : lease가 없거나 만료됐거나 내 것이면 find_one_and_update 한 번으로 원자적으로 가져옴
+    - renew_all : 잡고 있는 lease 만료 시간 연장 (heartbeat, step이 ttl보다 오래 걸려도 유지)
+    - release : 토론이 끝났거나 종료할 때 lease 반납 (lease: None)
+    프로세스가 죽으면 lease가 만료되고 다른 프로세스가 이어서 진행한다.
+    heartbeat가 밀려 lease를 뺏긴 경우에 대비해 ProgressManager는 lease.owner를 조건으로 저장하고,
+    저장이 안 되면 그 step 결과를 버린다. (forget)
+    lease는 progress.data에 넣지 않는다. (update_data의 $set으로 다른 프로세스의 lease를 덮어쓰지 않도록)
+    """
+    FIELD = "lease"
+
+    def __init__(self, db, owner:str=None, ttl_seconds:int=60):
+        """
+        :param db: MongoDBConnection 또는 같은 API의 저장소
+        :param owner: 이 프로세스 id. 없으면 "호스트:pid:임의값"
+        :param ttl_seconds: lease 유지 시간. renew_all이 ttl보다 자주 불려야 함
+        """
+        self.db = db
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.held = set()  # 지금 잡고 있는 progress id
+        self.lock = threading.Lock()
+
+    def claim(self, progress_id:str) -> tuple:
+        """
+        :return: (lease를 잡았는지, 새로 잡은 경우 최신 progress 문서 / 이미 잡고 있었으면 None)
+        새로 잡은 경우 다른 프로세스가 진행시켰을 수 있으므로 반환된 문서로 다시 로드해야 한다.
+        """
+        now = datetime.now()
+        document = self.db.get_collection("progress").find_one_and_update(
+            {"_id": ObjectId(progress_id),
+             "$or": [{self.FIELD: None},
+                     {f"{self.FIELD}.expires_at": {"$lt": now}},
+                     {f"{self.FIELD}.owner": self.owner}]},
+            {"$set": {self.FIELD: {"owner": self.owner, "expires_at": now + self.ttl}}},
+            return_document=ReturnDocument.AFTER)
+        with self.lock:
+            if document is None:
+                self.held.discard(progress_id)
+                return False, None
+            if progress_id in self.held:
+                return True, None
+            self.held.add(progress_id)
+        document.pop(self.FIELD, None)
+        return True, document
+
+    def holds(self, progress_id:str) -> bool:
+        """
+        이 프로세스가 lease를 잡고 있는지 (DB는 보지 않음)
+        """
+        with self.lock:
+            return progress_id in self.held
+
+    def renew_all(self) -> list:
+        """
+        잡고 있는 lease를 전부 연장. 이미 뺏긴(만료 후 다른 프로세스가 가져간) lease는 held에서 뺌
+        :return: 잃어버린 progress id 목록
+        """
+        with self.lock:
+            held = list(self.held)
+        lost = []
+        expires_at = datetime.now() + self.ttl
+        for progress_id in held:
+            result = self.db.get_collection("progress").update_one(
+                {"_id": ObjectId(progress_id), f"{self.FIELD}.owner": self.owner},
+                # lease 필드를 통째로 바꿔야 change stream에서 lease만 바뀐 update로 걸러짐
+                {"$set": {self.FIELD: {"owner": self.owner, "expires_at": expires_at}}})
+            if not result.matched_count:
+                lost.append(progress_id)
+        with self.lock:
+            self.held.difference_update(lost)
+        return lost
+
+    def forget(self, progress_id:str):
+        """
+        저장이 lease 조건에 걸려서 실패한 경우 (이미 다른 프로세스가 가져감). DB는 건드리지 않고 held에서만 뺌
+        """
+        with self.lock:
+            self.held.discard(progress_id)
+
+    def release(self, progress_id:str):
+        with self.lock:
+            self.held.discard(progress_id)
+        self.db.get_collection("progress").update_one(
+            {"_id": ObjectId(progress_id), f"{self.FIELD}.owner": self.owner},
+            {"$set": {self.FIELD: None}})
+
+    def release_all(self):
+        with self.lock:
+            held = list(self.held)
+        for progress_id in held:
+            try:
+                self.release(progress_id)
+            except Exception as e:
+                print(f"lease 반납 실패 ({progress_id}) : {e}")
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"owner": self.owner, "ttl_seconds": self.ttl.total_seconds(), "held": sorted(self.held)}
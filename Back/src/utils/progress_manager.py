@@ -8,30 +8,42 @@ from .mongodb_connection import MongoDBConnection
 from .web_scrapper import WebScrapper
 from .vectorstorehandler import VectorStoreHandler
 from .profile_manager import ProfileManager
+from .step_journal import StepJournal
+from .progress_lease import ProgressLease
+from .tournament import TournamentScheduler
 import asyncio
+import copy
 from typing import Dict
+from bson.objectid import ObjectId
 class ProgressManager:
     def __init__(self, participant_factory:ParticipantFactory,
                         web_scrapper:WebScrapper,
                         mongoDBConnection:MongoDBConnection,
                         topic_checker:AI_Instance,
                         vectorstore_handler: VectorStoreHandler,
-                        generate_text_config: dict):
+                        generate_text_config: dict,
+                        asyncMongoDBConnection=None,
+                        step_journal:StepJournal=None,
+                        progress_lease:ProgressLease=None):
         
         self.participant_factory = participant_factory
         self.web_scrapper = web_scrapper
         self.mongoDBConnection = mongoDBConnection
+        self.asyncMongoDBConnection = asyncMongoDBConnection  # 있으면 asave에서 사용 (AsyncMongoDBConnection)
         self.topic_checker = topic_checker
         self.vectorstore_handler = vectorstore_handler
         self.progress_pool:Dict[str, Progress] = {}
         self.generate_text_config = generate_text_config
-        self.auto_progress_create_task = None
+        self.save_hooks = []  # save 후 hook(progress_id, data) 호출 (ex. ProgressHub.on_save)
+        self.step_journal = step_journal  # 있으면 run_step에서 save 전에 step 결과 기록, 시작 시 미완료 기록 복구
+        self.progress_lease = progress_lease  # 있으면 lease를 잡은 progress만 진행 (Back 여러 개가 나눠서 진행)
         self.load_data_from_db()
 
 
-    def create_progress(self, progress_type:str, participant:dict, topic:str) -> dict:
+    def create_progress(self, progress_type:str, participant:dict, topic:str, extra:dict=None) -> dict:
         """
         progress의 type과 참여자, 주제를 받아 progress를 생성, 작성하고 self.progress_pool에 등록하는 메서드
+        extra는 progress 문서에 같이 저장할 값 (ex. {"tournament_id", "job_id"})
         반환값은 {"result":성공여부(bool), "id":생성된 progress id(str)}
         """
         result = {"result":False, "id":None}
@@ -98,6 +110,8 @@ class ProgressManager:
 
         if progress:
             progress.data["topic"] = topic
+            if extra:
+                progress.data.update(extra)
             id = str(self.mongoDBConnection.insert_data("progress", progress.data))
             # progress.vectorstore = self.ready_to_progress_with_personality(topic, generated_participant)
             progress.vectorstore = self.ready_to_progress(topic)
@@ -164,20 +178,215 @@ class ProgressManager:
             result[role] = self.participant_factory.make_participant(participants[role])
         return result
     
+    def save_query(self, progress_id:str) -> dict:
+        """
+        lease를 잡고 진행 중인 progress는 lease가 아직 내 것일 때만 저장
+        (ttl이 지나 다른 프로세스가 가져갔으면 그쪽 debate_log를 덮어쓰지 않도록)
+        """
+        if self.progress_lease and self.progress_lease.holds(progress_id):
+            return {f"{ProgressLease.FIELD}.owner": self.progress_lease.owner}
+        return None
+
     def save(self, progress_id:str):
         """
         progress id를 받아 해당 아이디의 progress를 저장하는 함수
+        lease 조건에 걸려 저장되지 않았으면 save hook도 부르지 않음 (matched_count 0인 결과 반환)
+        """
+        query = self.save_query(progress_id)
+        result = self.mongoDBConnection.update_data("progress", self.progress_pool[progress_id].data, query)
+        if not query or result.matched_count:
+            self.run_save_hooks(progress_id)
+        return result
+
+    async def asave(self, progress_id:str):
         """
-        return self.mongoDBConnection.update_data("progress", self.progress_pool[progress_id].data)
+        save의 async 버전. AsyncMongoDBConnection이 없으면 스레드에서 save 실행
+        """
+        if not self.asyncMongoDBConnection:
+            return await asyncio.to_thread(self.save, progress_id)
+        data = self.progress_pool[progress_id].data
+        # 저장하는 동안 로그가 추가돼도 영향 없도록 debate_log는 리스트를 복사해서 넘김
+        snapshot = dict(data)
+        if "debate_log" in data:
+            snapshot["debate_log"] = list(data["debate_log"])
+        query = self.save_query(progress_id)
+        result = await self.asyncMongoDBConnection.update_data("progress", snapshot, query)
+        if not query or result.matched_count:
+            self.run_save_hooks(progress_id)
+        return result
+
+    def claim(self, progress_id:str) -> bool:
+        """
+        이 프로세스가 progress를 진행해도 되는지 확인. lease를 새로 잡았으면 DB의 최신 문서로 다시 로드
+        (다른 프로세스가 진행하다 죽었거나 반납한 토론). 끝난 토론이면 lease를 바로 반납
+        :return: 진행 가능 여부
+        """
+        if not self.progress_lease:
+            return True
+        claimed, document = self.progress_lease.claim(progress_id)
+        if not claimed:
+            return False
+        if document:
+            progress = self.load_progress(document)
+            if not progress:
+                return False
+            if progress_id in self.progress_pool:
+                progress.vectorstore = self.progress_pool[progress_id].vectorstore
+            self.progress_pool[progress_id] = progress
+        if self.progress_pool[progress_id].data["status"].get("type") == "end":
+            self.progress_lease.release(progress_id)
+            return False
+        return True
+
+    def is_local(self, progress_id:str) -> bool:
+        """
+        pool의 progress가 최신인지. lease를 안 쓰거나, 이 프로세스가 lease를 잡고 있거나, 이미 끝난 토론이면 True
+        (다른 프로세스가 진행 중인 토론은 pool에 처음 읽었을 때 상태로 남아 있음)
+        """
+        progress = self.progress_pool.get(progress_id)
+        if not self.progress_lease or not progress:
+            return True
+        return self.progress_lease.holds(progress_id) or progress.data.get("status", {}).get("type") == "end"
+
+    def current(self, progress_id:str) -> Progress:
+        """
+        읽기용 최신 progress. 다른 프로세스가 진행 중인 토론은 DB에서 읽은 문서로 만든 Progress(진행 불가) 반환
+        DB에서 끝난 것으로 확인되면 pool도 끝난 문서로 바꿔서 다음부터는 pool에서 바로 읽음
+        """
+        if self.is_local(progress_id):
+            return self.progress_pool.get(progress_id)
+        data = self.mongoDBConnection.select_data_from_id("progress", progress_id)
+        if not data:
+            return self.progress_pool.get(progress_id)
+        data.pop(ProgressLease.FIELD, None)
+        progress = Progress(participant={}, generate_text_config={}, data=data)
+        if data.get("status", {}).get("type") == "end":
+            self.progress_pool[progress_id] = progress
+        return progress
+
+    def remote_statuses(self) -> dict:
+        """
+        다른 프로세스가 진행 중인 토론의 현재 status를 한 번에 조회 (목록 조회용)
+        :return: {progress id: status}
+        """
+        ids = [id for id in self.progress_pool if not self.is_local(id)]
+        if not ids:
+            return {}
+        return {str(data["_id"]): data.get("status") for data in self.mongoDBConnection.iter_data_from_query(
+            "progress", {"_id": {"$in": [ObjectId(id) for id in ids]}}, {"status": 1})}
+
+    def load_new_from_db(self) -> int:
+        """
+        다른 프로세스가 만든 진행 중 progress를 pool에 등록 (lease 사용 시 주기적으로 호출)
+        :return: 새로 등록한 progress 수
+        """
+        count = 0
+        for found in self.mongoDBConnection.iter_data_from_query("progress", {"status.type": {"$ne": "end"}}, {"_id": 1}):
+            id = str(found["_id"])
+            if id in self.progress_pool:
+                continue
+            data = self.mongoDBConnection.select_data_from_id("progress", id)
+            if not data:
+                continue
+            data.pop(ProgressLease.FIELD, None)
+            progress = self.load_progress(data)
+            if progress:
+                self.progress_pool[id] = progress
+                count += 1
+        return count
+
+    async def run_step(self, progress_id:str) -> dict:
+        """
+        progress 한 step 진행 -> 저널 기록 -> DB 저장 -> 저널 commit
+        save 전에 프로세스가 죽어도 다음 시작 때 저널에서 복구되므로 생성된 발언을 다시 만들지 않는다.
+        step(LLM 호출)은 스레드에서 돌려서 그동안에도 lease heartbeat가 돌게 한다.
+        저장 시점에 lease를 잃었으면(다른 프로세스가 이어서 진행 중) 이 step 결과는 버리고 DB 문서로 다시 로드
+        :return: progress()의 반환값. lease를 잃었으면 "lease_lost": True
+        """
+        progress = self.progress_pool[progress_id]
+        log_start = len(progress.data.get("debate_log", []))
+        fenced = self.save_query(progress_id) is not None
+        result = await asyncio.to_thread(progress.progress)
+        seq = None
+        if self.step_journal:
+            try:
+                seq = self.step_journal.record(progress_id, progress.data, log_start, result)
+            except Exception as e:
+                print(f"step 저널 기록 실패 : {e}")
+        saved = await self.asave(progress_id)
+        if fenced and not saved.matched_count:
+            # 저널에 남겨두면 재시작 때 다른 프로세스의 기록을 덮어쓰므로 버림
+            if seq is not None:
+                self.step_journal.commit(seq)
+            await asyncio.to_thread(self.reload_lost, progress_id)
+            return dict(result or {}, lease_lost=True)
+        if seq is not None:
+            self.step_journal.commit(seq)
+        if self.progress_lease and progress.data["status"].get("type") == "end":
+            await asyncio.to_thread(self.progress_lease.release, progress_id)
+        return result
+
+    def reload_lost(self, progress_id:str):
+        """
+        lease를 잃은 progress를 held에서 빼고 DB의 최신 문서로 다시 로드 (다음 claim 때 다시 시도)
+        """
+        self.progress_lease.forget(progress_id)
+        print(f"lease 잃음, step 결과 버림 : {progress_id}")
+        data = self.mongoDBConnection.select_data_from_id("progress", progress_id)
+        if not data:
+            return
+        data.pop(ProgressLease.FIELD, None)
+        progress = self.load_progress(data)
+        if progress:
+            progress.vectorstore = self.progress_pool[progress_id].vectorstore
+            self.progress_pool[progress_id] = progress
+
+    def replay_journal(self) -> int:
+        """
+        저널에 남은(DB에 저장되지 않은) step 결과를 progress에 반영하고 저장.
+        DB 문서의 debate_log가 이미 기록보다 길면 저장된 것으로 보고 건너뜀
+        :return: 복구한 step 수
+        """
+        count = 0
+        for entry in self.step_journal.pending():
+            progress = self.progress_pool.get(entry["progress_id"])
+            if not progress:
+                continue
+            debate_log = progress.data.get("debate_log", [])
+            if len(debate_log) >= entry["log_start"] + len(entry["logs"]):
+                continue
+            progress.data["debate_log"] = debate_log[:entry["log_start"]] + entry["logs"]
+            progress.data.update(entry["state"])
+            progress.render_logs()
+            self.save(entry["progress_id"])
+            count += 1
+        return count
+
+    def run_save_hooks(self, progress_id:str):
+        for hook in self.save_hooks:
+            try:
+                hook(progress_id, self.progress_pool[progress_id].data)
+            except Exception as e:
+                print(f"save hook 오류 : {e}")
 
 
     def load_data_from_db(self):
-        progress_list = self.mongoDBConnection.select_data_from_query("progress")
-        # progress 목록 불러오기
-        for data in progress_list:
+        count = 0
+        # progress 목록 불러오기 - 컬렉션 전체를 리스트로 만들지 않고 하나씩 받아서 등록
+        for data in self.mongoDBConnection.iter_data_from_query("progress"):
+            count += 1
+            # lease는 DB에서만 관리 (data에 있으면 save 때 다른 프로세스의 lease를 덮어씀)
+            data.pop(ProgressLease.FIELD, None)
             self.progress_pool[str(data["_id"])] = self.load_progress(data)
             print(str(data["_id"]))
-        print (f"{len(progress_list)} 개의 Progress 로드됨!")
+        print (f"{count} 개의 Progress 로드됨!")
+        if self.step_journal:
+            replayed = self.replay_journal()
+            # 복구한 기록까지 DB에 들어갔으므로 저널 비우기
+            for entry in self.step_journal.pending():
+                self.step_journal.commit(entry["seq"])
+            if replayed:
+                print(f"저널에서 {replayed} 개의 step 복구됨!")
 
     def load_progress(self, data:dict) -> Progress:
         """
@@ -221,33 +430,36 @@ class ProgressManager:
             return progress
         
 
-    async def auto_progress_create(self, profile_manager:ProfileManager, topic:str=None):
+    def auto_progress_create(self, profile_manager:ProfileManager, tournament_scheduler:TournamentScheduler,
+                             topic:str=None, **options) -> str:
+        """
+        등록된 프로필 전체로 토너먼트 생성. 대진은 TournamentScheduler가 라운드 단위로 만들고,
+        토론 생성은 대진 하나당 job 하나로 job worker(run_create_job)가 처리한다. (재시작돼도 이어서 진행)
+        :param options: format, max_concurrent, budget_tokens, double (TournamentScheduler.create 참고)
+        :return: 토너먼트 id
+        """
         if not topic:
             topic = self.auto_topic_create()
         profiles = list(profile_manager.objectlist.keys())
-        front = 0
-        try:
-            while front < len(profiles) -1:
-                pos = {"id":profiles[front]}
-                back = front + 1
-                while back < len(profiles):
-                    neg = {"id":profiles[back]}
-                    print(f"{front}, {back}")
-                    try:
-                        participants = {"pos":pos, "neg":neg}
-                        await asyncio.to_thread(self.create_progress, "debate_2", participants, topic)
-                        participants2 = {"pos":neg, "neg":pos}
-                        await asyncio.to_thread(self.create_progress, "debate_2", participants2, topic)
-                    except Exception as e:
-                        print(f"auto_progress_create 중 오류 {e} 발생")
-                    back += 1
-                front += 1
-                await asyncio.sleep(1)
-        except Exception as e:
-            print(f"auto_progress_create 중 오류 발생 : {e}")
-            
-        
-        
+        tournament_id = tournament_scheduler.create(profiles, topic, **options)
+        print(f"토너먼트 {tournament_id} 생성 : {options.get('format', 'round_robin')}, 참가자 {len(profiles)}")
+        return tournament_id
+
+    def run_create_job(self, job:dict) -> dict:
+        """
+        progress_create job 처리. 같은 job으로 이미 만든 progress가 있으면 (저장 후 complete 전에 죽은 경우) 다시 만들지 않음
+        :return: {"progress_id": 생성된 id}
+        """
+        found = next(self.mongoDBConnection.iter_data_from_query("progress", {"job_id": job["_id"]}, {"_id": 1}, limit=1), None)
+        if found:
+            return {"progress_id": str(found["_id"])}
+        payload = job["payload"]
+        result = self.create_progress(payload["type"], copy.deepcopy(payload["participants"]), payload["topic"],
+                                      extra={"tournament_id": job.get("group"), "job_id": job["_id"]})
+        if not result["result"]:
+            raise ValueError("progress 생성 실패")
+        return {"progress_id": result["id"]}
+
     def auto_topic_create(self) -> str:
         before_topics = [ progress.data["topic"] for progress in self.progress_pool.values()]
         user_prompt = f"Return a single debate topic in one sentence. Keep it concise and argumentative. No extra details. Please think of a new topic. Last topics are {before_topics}. You should avoid {before_topics}"
@@ -0,0 +1,172 @@
+import itertools
+from datetime import datetime
+import numpy as np
+from pymongo import DESCENDING
+from pymongo.errors import DuplicateKeyError
+
+
+class RatingManager:
+    """
+    프로필 Elo 레이팅 관리 클래스.
+    - update_from_progress : 토론이 끝날 때마다 두 참가자 레이팅만 O(1)로 갱신 ($inc라서 Back 여러 개가 동시에 갱신해도 안전)
+    - leaderboard : rating 컬렉션을 rating 인덱스 순으로 조회
+    - recompute : 끝난 토론 전체(보관 포함)로 처음부터 다시 계산 (백필, K값 변경 시). 같은 프로필이 겹치지 않는 경기끼리 묶어서 numpy로 한 번에 계산
+    같은 토론을 두 번 반영하지 않도록 반영한 progress id를 rating_event 컬렉션에 기록한다.
+    """
+    COLLECTION = "rating"
+    EVENT_COLLECTION = "rating_event"
+    ARCHIVE_COLLECTION = "progress_archive"
+    # 찬성 측 기준 실제 점수
+    SCORES = {"positive": 1.0, "negative": 0.0, "draw": 0.5}
+
+    def __init__(self, db, k_factor:float=32, initial_rating:float=1500):
+        """
+        :param db: MongoDBConnection 또는 같은 API의 저장소
+        :param k_factor: Elo K (한 경기로 움직이는 최대 점수)
+        :param initial_rating: 처음 레이팅
+        """
+        self.db = db
+        self.k_factor = k_factor
+        self.initial_rating = initial_rating
+
+    @staticmethod
+    def expected(rating:float, opponent:float) -> float:
+        return 1.0 / (1.0 + 10 ** ((opponent - rating) / 400))
+
+    @classmethod
+    def game(cls, progress:dict) -> tuple:
+        """
+        progress 문서에서 (pos id, neg id, 찬성 측 점수) 추출. 레이팅에 반영할 수 없는 토론이면 None
+        """
+        if (progress.get("status") or {}).get("type") != "end":
+            return None
+        score = cls.SCORES.get(progress.get("result"))
+        participants = progress.get("participants") or {}
+        pos = (participants.get("pos") or {}).get("id")
+        neg = (participants.get("neg") or {}).get("id")
+        if score is None or not pos or not neg or str(pos) == str(neg):
+            return None
+        return str(pos), str(neg), score
+
+    def get_rating(self, profile_id:str) -> dict:
+        """
+        레이팅 문서. 없으면 초기값으로 만든다 (동시에 만들어도 DuplicateKeyError만 나고 한 개만 남음)
+        """
+        collection = self.db.get_collection(self.COLLECTION)
+        rating = collection.find_one({"_id": profile_id})
+        if rating:
+            return rating
+        rating = self.new_rating(profile_id)
+        try:
+            collection.insert_one(dict(rating))
+        except DuplicateKeyError:
+            return collection.find_one({"_id": profile_id})
+        return rating
+
+    def new_rating(self, profile_id:str) -> dict:
+        return {"_id": profile_id, "rating": float(self.initial_rating),
+                "games": 0, "wins": 0, "losses": 0, "draws": 0, "update_time": datetime.now()}
+
+    def update_from_progress(self, progress:dict) -> dict:
+        """
+        끝난 토론 하나를 레이팅에 반영
+        :return: {pos id: 변화량, neg id: 변화량}. 반영 대상이 아니거나 이미 반영했으면 None
+        """
+        game = self.game(progress)
+        if not game:
+            return None
+        pos, neg, score = game
+        try:
+            self.db.get_collection(self.EVENT_COLLECTION).insert_one({"_id": str(progress["_id"]), "create_time": datetime.now()})
+        except DuplicateKeyError:
+            return None
+        pos_rating = self.get_rating(pos)["rating"]
+        neg_rating = self.get_rating(neg)["rating"]
+        delta = self.k_factor * (score - self.expected(pos_rating, neg_rating))
+        now = datetime.now()
+        collection = self.db.get_collection(self.COLLECTION)
+        for id, change, actual in ((pos, delta, score), (neg, -delta, 1.0 - score)):
+            collection.update_one({"_id": id},
+                                  {"$inc": {"rating": change, "games": 1,
+                                            "wins": int(actual == 1.0), "losses": int(actual == 0.0), "draws": int(actual == 0.5)},
+                                   "$set": {"update_time": now}})
+        return {pos: delta, neg: -delta}
+
+    def leaderboard(self, limit:int=20, min_games:int=0) -> list:
+        query = {"games": {"$gte": min_games}} if min_games else {}
+        return list(self.db.iter_data_from_query(self.COLLECTION, query, sort=[("rating", DESCENDING)], limit=limit))
+
+    @staticmethod
+    def batches(games:list) -> list:
+        """
+        시간 순서를 지키면서, 같은 프로필이 한 번만 나오는 경기 묶음으로 나눔
+        (한 묶음 안의 경기는 서로의 레이팅에 영향이 없으므로 동시에 계산 가능)
+        """
+        batches, current, used = [], [], set()
+        for game in games:
+            if game[0] in used or game[1] in used:
+                batches.append(current)
+                current, used = [], set()
+            current.append(game)
+            used.update(game[:2])
+        if current:
+            batches.append(current)
+        return batches
+
+    def compute(self, games:list) -> dict:
+        """
+        (pos, neg, 찬성 측 점수) 목록을 순서대로 반영한 최종 레이팅 계산
+        :return: {프로필 id: {"rating", "games", "wins", "losses", "draws"}}
+        """
+        ids = list(dict.fromkeys(itertools.chain.from_iterable(game[:2] for game in games)))
+        index = {id: i for i, id in enumerate(ids)}
+        ratings = np.full(len(ids), float(self.initial_rating))
+        counts = np.zeros((len(ids), 4), dtype=np.int64)  # games, wins, losses, draws
+        for batch in self.batches(games):
+            pos = np.fromiter((index[game[0]] for game in batch), dtype=np.int64, count=len(batch))
+            neg = np.fromiter((index[game[1]] for game in batch), dtype=np.int64, count=len(batch))
+            score = np.fromiter((game[2] for game in batch), dtype=np.float64, count=len(batch))
+            expected = 1.0 / (1.0 + 10 ** ((ratings[neg] - ratings[pos]) / 400))
+            delta = self.k_factor * (score - expected)
+            # 한 묶음 안에서는 프로필이 겹치지 않으므로 그대로 더해도 됨
+            ratings[pos] += delta
+            ratings[neg] -= delta
+            for side, actual in ((pos, score), (neg, 1.0 - score)):
+                counts[side, 0] += 1
+                counts[side, 1] += actual == 1.0
+                counts[side, 2] += actual == 0.0
+                counts[side, 3] += actual == 0.5
+        return {id: {"rating": float(ratings[i]), "games": int(counts[i, 0]), "wins": int(counts[i, 1]),
+                     "losses": int(counts[i, 2]), "draws": int(counts[i, 3])}
+                for id, i in index.items()}
+
+    def recompute(self) -> int:
+        """
+        끝난 토론 전체(보관 포함)를 _id(생성) 순으로 다시 계산해서 rating, rating_event를 새로 씀
+        :return: 반영한 토론 수
+        """
+        query = {"status.type": "end"}
+        projection = {"participants": 1, "result": 1, "status": 1}
+        documents = itertools.chain(
+            self.db.iter_data_from_query("progress", query, projection, sort=[("_id", 1)]),
+            self.db.iter_data_from_query(self.ARCHIVE_COLLECTION, query, projection, sort=[("_id", 1)]))
+        games, progress_ids = [], []
+        for progress in sorted(documents, key=lambda document: document["_id"]):
+            game = self.game(progress)
+            if game:
+                games.append(game)
+                progress_ids.append(str(progress["_id"]))
+        computed = self.compute(games)
+
+        now = datetime.now()
+        ratings = self.db.get_collection(self.COLLECTION)
+        for id, values in computed.items():
+            ratings.replace_one({"_id": id}, {"_id": id, **values, "update_time": now}, upsert=True)
+        # 토론이 없어진 프로필은 초기값으로
+        for rating in self.db.iter_data_from_query(self.COLLECTION, {}, {"_id": 1}):
+            if rating["_id"] not in computed:
+                ratings.replace_one({"_id": rating["_id"]}, self.new_rating(rating["_id"]))
+        events = self.db.get_collection(self.EVENT_COLLECTION)
+        for id in progress_ids:
+            events.replace_one({"_id": id}, {"_id": id, "create_time": now}, upsert=True)
+        return len(games)
@@ -0,0 +1,355 @@
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from .lru_cache import LRUCache
+
+
+class ScoreAnalytics:
+    """
+    끝난 토론의 score(Debate_2.evaluate)를 열(column) 단위 numpy 배열로 들고 집계하는 클래스.
+    - load    : DB(progress + progress_archive) 전체에서 한 번 읽음 (첫 조회 때)
+    - refresh : 조회 때 refresh_seconds마다 마지막 end_time 이후에 끝난 토론을 DB에서 더 읽음 (다른 워커가 끝낸 토론)
+    - add     : 이 워커에서 토론이 끝날 때마다 한 건씩 바로 추가 (이미 있는 progress는 무시)
+    - profiles / models / topics / distribution / head_to_head : bincount, add.at 등으로 한 번에 집계
+    집계 결과는 데이터 버전별로 LRU 캐시에 저장하고, add로 데이터가 바뀌면 새로 계산한다.
+    """
+    ARCHIVE_COLLECTION = "progress_archive"
+    METRICS = ("logicality", "rebuttal", "persuasion", "match")
+    # 찬성 측 기준 결과 코드
+    RESULTS = {"positive": 1, "negative": -1, "draw": 0}
+    QUERY = {"status.type": "end", "score": {"$exists": True}}
+    PROJECTION = {"participants": 1, "result": 1, "status": 1, "score": 1, "topic": 1, "end_time": 1}
+    # end_time은 저장보다 먼저 찍히므로 watermark보다 조금 앞부터 다시 읽음 (중복은 ids로 걸러짐)
+    OVERLAP = timedelta(seconds=60)
+
+    def __init__(self, db, cache_size:int=64, refresh_seconds:float=10):
+        """
+        :param db: MongoDBConnection 또는 같은 API의 저장소
+        :param cache_size: 집계 결과 캐시 항목 수
+        :param refresh_seconds: 조회 시 DB에서 새로 끝난 토론을 확인하는 최소 간격 (0이면 매번)
+        """
+        self.db = db
+        self.lock = threading.Lock()
+        self.cache = LRUCache(max_items=cache_size)
+        self.refresh_seconds = refresh_seconds
+        self.loaded = False
+        self.version = 0
+        self.ids = set()
+        self.end_time = None  # 적재한 토론 중 가장 늦은 end_time (refresh watermark)
+        self.refreshed = 0.0
+        # 행(토론) 단위로 쌓아두는 원본. 집계 시 arrays()로 numpy 배열 변환
+        self.rows = {"progress_id": [], "pos": [], "neg": [], "pos_model": [], "neg_model": [], "topic": [], "result": []}
+        self.rows.update({f"{metric}_{side}": [] for metric in self.METRICS for side in ("pos", "neg")})
+        self.names = {}  # 프로필 id -> 이름
+        self.columns = None
+
+    # ---------- 적재 ----------
+
+    def row(self, progress:dict) -> dict:
+        """
+        progress 문서 -> 한 행. score가 없거나 끝나지 않은 토론이면 None
+        """
+        score = progress.get("score")
+        participants = progress.get("participants") or {}
+        pos, neg = participants.get("pos") or {}, participants.get("neg") or {}
+        if ((progress.get("status") or {}).get("type") != "end" or not score
+                or not pos.get("id") or not neg.get("id") or progress.get("result") not in self.RESULTS):
+            return None
+        row = {"progress_id": str(progress["_id"]),
+               "pos": str(pos["id"]), "neg": str(neg["id"]),
+               "pos_model": pos.get("ai") or "", "neg_model": neg.get("ai") or "",
+               "topic": progress.get("topic") or "",
+               "result": self.RESULTS[progress["result"]]}
+        for metric in self.METRICS:
+            for side in ("pos", "neg"):
+                value = score.get(f"{metric}_{side}")
+                row[f"{metric}_{side}"] = float(value) if isinstance(value, (int, float)) else np.nan
+        self.names.setdefault(row["pos"], pos.get("name"))
+        self.names.setdefault(row["neg"], neg.get("name"))
+        return row
+
+    def track_end_time(self, progress:dict):
+        # DB에서 읽은 토론으로만 watermark를 올림 (add로 먼저 올리면 다른 워커 토론을 놓칠 수 있음)
+        # 예전 문서에는 end_time이 없거나 문자열인 경우가 있어서 datetime만 사용
+        end_time = progress.get("end_time")
+        if hasattr(end_time, "year") and (self.end_time is None or end_time > self.end_time):
+            self.end_time = end_time
+
+    def valid_row(self, row:dict) -> dict:
+        """
+        행 모양 데이터 검사. 필수 열이 없거나 result가 결과 코드가 아니면 None (row()와 같은 기준)
+        """
+        if not row.get("progress_id") or not row.get("pos") or not row.get("neg") or row.get("result") not in self.RESULTS.values():
+            return None
+        valid = {key: row.get(key) for key in self.rows}
+        for key in self.rows:
+            if key.endswith(("_pos", "_neg")):
+                value = valid[key]
+                valid[key] = float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan
+        valid["progress_id"], valid["pos"], valid["neg"] = str(valid["progress_id"]), str(valid["pos"]), str(valid["neg"])
+        valid["pos_model"], valid["neg_model"] = valid["pos_model"] or "", valid["neg_model"] or ""
+        valid["topic"] = valid["topic"] or ""
+        return valid
+
+    def append(self, row:dict) -> bool:
+        if row is None or row["progress_id"] in self.ids:
+            return False
+        self.ids.add(row["progress_id"])
+        for key, values in self.rows.items():
+            values.append(row[key])
+        return True
+
+    def load(self) -> int:
+        """
+        DB의 끝난 토론 전체 적재 (처음 한 번)
+        :return: 적재된 토론 수
+        """
+        started = datetime.now()
+        documents = itertools.chain(self.db.iter_data_from_query("progress", self.QUERY, self.PROJECTION),
+                                    self.db.iter_data_from_query(self.ARCHIVE_COLLECTION, self.QUERY, self.PROJECTION))
+        with self.lock:
+            for progress in documents:
+                self.append(self.row(progress))
+                self.track_end_time(progress)
+            # 끝난 토론이 없었으면 적재 시작 시각부터 refresh
+            self.end_time = self.end_time or started
+            self.loaded = True
+            self.refreshed = time.monotonic()
+            self.changed()
+            return len(self.ids)
+
+    def refresh(self) -> int:
+        """
+        마지막 end_time 이후에 끝난 토론을 DB에서 읽어서 추가 (다른 워커가 끝낸 토론 반영)
+        load 없이 add_rows로만 채운 경우에는 DB를 보지 않음
+        :return: 새로 추가된 토론 수
+        """
+        with self.lock:
+            self.refreshed = time.monotonic()
+            if self.end_time is None:
+                return 0
+            query = dict(self.QUERY, end_time={"$gte": self.end_time - self.OVERLAP})
+        documents = list(self.db.iter_data_from_query("progress", query, self.PROJECTION))
+        with self.lock:
+            added = 0
+            for progress in documents:
+                added += self.append(self.row(progress))
+                self.track_end_time(progress)
+            if added:
+                self.changed()
+            return added
+
+    def sync(self):
+        """
+        조회 전에 호출. 처음이면 load, 아니면 refresh_seconds가 지났을 때만 refresh
+        """
+        if not self.loaded:
+            self.load()
+        elif time.monotonic() - self.refreshed >= self.refresh_seconds:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"토론 점수 집계 갱신 중 오류 발생 : {e}")
+
+    def add(self, progress:dict) -> bool:
+        """
+        끝난 토론 한 건 추가. 아직 load 전이면 무시 (load에서 같이 읽음)
+        """
+        with self.lock:
+            if not self.loaded:
+                return False
+            added = self.append(self.row(progress))
+            if added:
+                self.changed()
+            return added
+
+    def add_rows(self, rows:list) -> int:
+        """
+        이미 행 모양(progress_id, pos, neg, ..., logicality_pos ...)으로 된 데이터 추가 (export 파일 등)
+        필수 열이 빠졌거나 result가 잘못된 행은 건너뜀
+        """
+        with self.lock:
+            count = sum(self.append(self.valid_row(row)) for row in rows)
+            self.loaded = True
+            self.changed()
+            return count
+
+    def changed(self):
+        self.version += 1
+        self.columns = None
+
+    def arrays(self) -> dict:
+        """
+        현재 데이터의 numpy 배열. 문자열 열은 (코드 배열, 고유값 목록)으로 변환
+        """
+        if not self.loaded:
+            self.load()
+        with self.lock:
+            if self.columns is not None:
+                return self.columns
+            columns = {key: np.asarray(self.rows[key], dtype=np.float64)
+                       for key in self.rows if key.endswith(("_pos", "_neg"))}
+            columns["result"] = np.asarray(self.rows["result"], dtype=np.int8)
+            # 프로필은 pos/neg가 같은 코드 공간을 써야 대진표를 만들 수 있음
+            profiles, codes = np.unique(np.asarray(self.rows["pos"] + self.rows["neg"], dtype=object).astype(str),
+                                        return_inverse=True)
+            count = len(self.rows["pos"])
+            columns["profiles"], columns["pos"], columns["neg"] = profiles.tolist(), codes[:count], codes[count:]
+            models, codes = np.unique(np.asarray(self.rows["pos_model"] + self.rows["neg_model"], dtype=object).astype(str),
+                                      return_inverse=True)
+            columns["models"], columns["pos_model"], columns["neg_model"] = models.tolist(), codes[:count], codes[count:]
+            topics, codes = np.unique(np.asarray(self.rows["topic"], dtype=object).astype(str), return_inverse=True)
+            columns["topics"], columns["topic"] = topics.tolist(), codes
+            columns["count"] = count
+            self.columns = columns
+            return columns
+
+    def cached(self, key:tuple, compute):
+        self.sync()
+        key = (self.version,) + key
+        result = self.cache.get(key)
+        if result is None:
+            result = compute()
+            self.cache.put(key, result)
+        return result
+
+    # ---------- 집계 ----------
+
+    def side_aggregate(self, columns:dict, pos_codes, neg_codes, labels:list) -> list:
+        """
+        pos/neg 양쪽 참가 기록을 합쳐서 label(프로필, 모델)별 전적과 지표 평균 계산
+        """
+        size = len(labels)
+        codes = np.concatenate([pos_codes, neg_codes])
+        # 참가자 입장에서의 결과 (승 1, 패 -1, 무 0)
+        outcome = np.concatenate([columns["result"], -columns["result"]])
+        games = np.bincount(codes, minlength=size)
+        wins = np.bincount(codes, weights=outcome == 1, minlength=size)
+        losses = np.bincount(codes, weights=outcome == -1, minlength=size)
+        result = [{"games": int(games[i]), "wins": int(wins[i]), "losses": int(losses[i]),
+                   "draws": int(games[i] - wins[i] - losses[i]),
+                   "win_rate": float(wins[i] / games[i]) if games[i] else 0.0} for i in range(size)]
+        for metric in self.METRICS:
+            values = np.concatenate([columns[f"{metric}_pos"], columns[f"{metric}_neg"]])
+            valid = ~np.isnan(values)
+            sums = np.bincount(codes[valid], weights=values[valid], minlength=size)
+            counts = np.bincount(codes[valid], minlength=size)
+            means = np.divide(sums, counts, out=np.zeros(size), where=counts > 0)
+            for i in range(size):
+                result[i][f"avg_{metric}"] = round(float(means[i]), 2)
+        return result
+
+    def profiles(self) -> list:
+        """
+        프로필별 전적, 지표 평균 (경기 수 많은 순)
+        """
+        def compute():
+            columns = self.arrays()
+            if not columns["count"]:
+                return []
+            stats = self.side_aggregate(columns, columns["pos"], columns["neg"], columns["profiles"])
+            for id, stat in zip(columns["profiles"], stats):
+                stat["id"] = id
+                stat["name"] = self.names.get(id)
+            return sorted(stats, key=lambda stat: -stat["games"])
+        return self.cached(("profiles",), compute)
+
+    def models(self) -> list:
+        """
+        AI 모델별 전적, 지표 평균
+        """
+        def compute():
+            columns = self.arrays()
+            if not columns["count"]:
+                return []
+            stats = self.side_aggregate(columns, columns["pos_model"], columns["neg_model"], columns["models"])
+            for model, stat in zip(columns["models"], stats):
+                stat["model"] = model
+            return sorted(stats, key=lambda stat: -stat["games"])
+        return self.cached(("models",), compute)
+
+    def topics(self, limit:int=50) -> list:
+        """
+        주제별 토론 수, 찬성 측 승률, 평균 점수, 평균 점수 차
+        """
+        def compute():
+            columns = self.arrays()
+            if not columns["count"]:
+                return []
+            size = len(columns["topics"])
+            topic = columns["topic"]
+            games = np.bincount(topic, minlength=size)
+            pos_wins = np.bincount(topic, weights=columns["result"] == 1, minlength=size)
+            # 점수가 둘 다 있는 토론만 점수 평균에 포함
+            scored = ~(np.isnan(columns["match_pos"]) | np.isnan(columns["match_neg"]))
+            match_pos, match_neg = columns["match_pos"][scored], columns["match_neg"][scored]
+            scored_games = np.bincount(topic[scored], minlength=size)
+            sums = [np.bincount(topic[scored], weights=weights, minlength=size)
+                    for weights in (match_pos, match_neg, np.abs(match_pos - match_neg))]
+            means = [np.divide(total, scored_games, out=np.zeros(size), where=scored_games > 0) for total in sums]
+            order = np.argsort(-games, kind="stable")[:limit]
+            return [{"topic": columns["topics"][i], "games": int(games[i]),
+                     "pos_win_rate": float(pos_wins[i] / games[i]),
+                     "avg_match_pos": round(float(means[0][i]), 2),
+                     "avg_match_neg": round(float(means[1][i]), 2),
+                     "avg_margin": round(float(means[2][i]), 2)} for i in order]
+        return self.cached(("topics", limit), compute)
+
+    def distribution(self, bins:int=10) -> dict:
+        """
+        지표별 점수 분포 (0~100 구간 히스토그램, pos/neg 합침) + 평균, 표준편차, 사분위
+        """
+        def compute():
+            columns = self.arrays()
+            edges = np.linspace(0, 100, bins + 1)
+            result = {"edges": edges.tolist(), "metrics": {}}
+            for metric in self.METRICS:
+                values = np.concatenate([columns[f"{metric}_pos"], columns[f"{metric}_neg"]])
+                values = values[~np.isnan(values)]
+                counts, _ = np.histogram(np.clip(values, 0, 100), bins=edges)
+                summary = {"counts": counts.tolist(), "count": int(values.size)}
+                if values.size:
+                    q1, median, q3 = np.percentile(values, [25, 50, 75])
+                    summary.update({"mean": round(float(values.mean()), 2), "std": round(float(values.std()), 2),
+                                    "q1": float(q1), "median": float(median), "q3": float(q3)})
+                result["metrics"][metric] = summary
+            return result
+        return self.cached(("distribution", bins), compute)
+
+    def head_to_head(self, limit:int=20) -> dict:
+        """
+        경기 수 많은 프로필 limit명의 상대 전적 행렬
+        wins[i][j] : i가 j를 이긴 횟수, games[i][j] : i와 j의 경기 수
+        """
+        def compute():
+            columns = self.arrays()
+            size = len(columns["profiles"])
+            if not size:
+                return {"profiles": [], "names": [], "wins": [], "games": []}
+            pos, neg, result = columns["pos"], columns["neg"], columns["result"]
+            # 경기 수 많은 limit명을 먼저 고르고 그 사람들끼리의 경기만으로 limit x limit 행렬을 만듦
+            played = np.bincount(np.concatenate([pos, neg]), minlength=size)
+            top = np.argsort(-played, kind="stable")[:limit]
+            index = np.full(size, -1, dtype=np.int64)
+            index[top] = np.arange(len(top))
+            mask = (index[pos] >= 0) & (index[neg] >= 0)
+            pos, neg, result = index[pos[mask]], index[neg[mask]], result[mask]
+            wins = np.zeros((len(top), len(top)), dtype=np.int64)
+            games = np.zeros((len(top), len(top)), dtype=np.int64)
+            np.add.at(games, (pos, neg), 1)
+            np.add.at(wins, (pos[result == 1], neg[result == 1]), 1)
+            np.add.at(wins, (neg[result == -1], pos[result == -1]), 1)
+            games = games + games.T
+            profiles = [columns["profiles"][i] for i in top]
+            return {"profiles": profiles,
+                    "names": [self.names.get(id) for id in profiles],
+                    "wins": wins.tolist(),
+                    "games": games.tolist()}
+        return self.cached(("head_to_head", limit), compute)
+
+    def stats(self) -> dict:
+        return {"loaded": self.loaded, "debates": len(self.ids), "version": self.version,
+                "end_time": self.end_time,
+                "cache_hits": self.cache.hits, "cache_misses": self.cache.misses}
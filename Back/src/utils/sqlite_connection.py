@@ -0,0 +1,423 @@
+import copy
+import re
+import sqlite3
+import threading
+from bson import json_util
+from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError, BulkWriteError
+from .storage_backend import StorageBackend
+
+"""
+내장 SQLite 저장소.
+컬렉션마다 테이블 하나 (id TEXT PRIMARY KEY, doc TEXT) 에 문서를 Extended JSON(bson.json_util)으로 저장한다.
+ObjectId, datetime, bytes가 그대로 복원되고, 조회 조건은 코드에서 쓰는 MongoDB 연산자만 지원한다.
+- 조건: 같음, 점(.) 경로, $or, $and, $in, $nin, $ne, $lt, $lte, $gt, $gte, $exists
+- 수정: $set (점 경로, 리스트 index 포함), $inc
+- unique 인덱스는 SQLite expression index(json_extract)로 만들고 위반 시 DuplicateKeyError
+"""
+
+PATH_PATTERN = re.compile(r"^[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*$")
+MISSING = object()
+# pymongo 기본값과 같이 datetime을 naive로 복원 (datetime.now()와 비교 가능하도록)
+JSON_OPTIONS = json_util.JSONOptions(tz_aware=False)
+
+
+def get_values(document, path:str) -> list:
+    """
+    점 경로의 값 목록. 중간에 리스트가 있으면 원소마다 따라감 (MongoDB와 같은 방식)
+    """
+    values = [document]
+    for part in path.split("."):
+        next_values = []
+        for value in values:
+            if isinstance(value, dict):
+                if part in value:
+                    next_values.append(value[part])
+            elif isinstance(value, list):
+                if part.isdigit() and int(part) < len(value):
+                    next_values.append(value[int(part)])
+                else:
+                    next_values.extend(item[part] for item in value if isinstance(item, dict) and part in item)
+        values = next_values
+    return values
+
+
+def compare(value, operand, operator) -> bool:
+    try:
+        return operator(value, operand)
+    except TypeError:
+        return False
+
+
+OPERATORS = {
+    "$lt": lambda value, operand: value < operand,
+    "$lte": lambda value, operand: value <= operand,
+    "$gt": lambda value, operand: value > operand,
+    "$gte": lambda value, operand: value >= operand,
+}
+
+
+def equals(values:list, operand) -> bool:
+    if not values:
+        return operand is None
+    return any(value == operand or (isinstance(value, list) and operand in value) for value in values)
+
+
+def match_condition(values:list, condition) -> bool:
+    if not (isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition)):
+        return equals(values, condition)
+    for operator, operand in condition.items():
+        if operator == "$eq":
+            matched = equals(values, operand)
+        elif operator == "$ne":
+            matched = not equals(values, operand)
+        elif operator == "$in":
+            matched = any(equals(values, item) for item in operand)
+        elif operator == "$nin":
+            matched = not any(equals(values, item) for item in operand)
+        elif operator == "$exists":
+            matched = bool(values) == bool(operand)
+        elif operator in OPERATORS:
+            matched = any(compare(value, operand, OPERATORS[operator]) for value in values)
+        else:
+            raise ValueError(f"SQLite 저장소에서 지원하지 않는 연산자 : {operator}")
+        if not matched:
+            return False
+    return True
+
+
+def match(document:dict, query:dict) -> bool:
+    for key, condition in (query or {}).items():
+        if key == "$or":
+            if not any(match(document, sub_query) for sub_query in condition):
+                return False
+        elif key == "$and":
+            if not all(match(document, sub_query) for sub_query in condition):
+                return False
+        elif not match_condition(get_values(document, key), condition):
+            return False
+    return True
+
+
+def project(document:dict, projection:dict) -> dict:
+    """
+    최상위 필드 기준 projection. {"a": 1} 포함 / {"a": 0} 제외 (_id는 0으로 빼지 않으면 항상 포함)
+    """
+    if not projection:
+        return document
+    fields = {key.split(".")[0]: value for key, value in projection.items() if key != "_id"}
+    if any(fields.values()):
+        result = {key: value for key, value in document.items() if key in fields}
+    else:
+        result = {key: value for key, value in document.items() if key not in fields}
+    if projection.get("_id", 1) and "_id" in document:
+        result["_id"] = document["_id"]
+    else:
+        result.pop("_id", None)
+    return result
+
+
+def set_path(document:dict, path:str, value):
+    parts = path.split(".")
+    target = document
+    for part in parts[:-1]:
+        if isinstance(target, list):
+            target = target[int(part)]
+        else:
+            target = target.setdefault(part, {})
+    if isinstance(target, list):
+        target[int(parts[-1])] = value
+    else:
+        target[parts[-1]] = value
+
+
+def sort_key(value):
+    # None이 먼저, 타입이 섞여도 비교 가능하도록 (타입 이름, 값)으로 비교
+    if value is MISSING or value is None:
+        return (0, "", "")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (1, "", value)
+    return (2, type(value).__name__, value)
+
+
+class Result:
+    """
+    pymongo의 InsertOneResult, UpdateResult 등과 같은 속성을 가진 결과 객체
+    """
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+class SQLiteCursor:
+    def __init__(self, collection, query:dict, projection:dict, batch_size:int=100):
+        self.collection = collection
+        self.query = query or {}
+        self.projection = projection
+        self.batch_size = batch_size or 100
+        self.sort_fields = None
+        self.limit_count = 0
+        self.closed = False
+
+    def sort(self, key_or_list, direction:int=1):
+        self.sort_fields = key_or_list if isinstance(key_or_list, list) else [(key_or_list, direction)]
+        return self
+
+    def limit(self, count:int):
+        self.limit_count = count
+        return self
+
+    def close(self):
+        self.closed = True
+
+    def __iter__(self):
+        documents = (document for document in self.collection.scan(self.query, self.batch_size)
+                     if match(document, self.query))
+        if self.sort_fields:
+            documents = list(documents)
+            for field, direction in reversed(self.sort_fields):
+                documents.sort(key=lambda document: sort_key((get_values(document, field) or [MISSING])[0]),
+                               reverse=direction < 0)
+        count = 0
+        for document in documents:
+            if self.closed or (self.limit_count and count >= self.limit_count):
+                return
+            count += 1
+            yield project(document, self.projection)
+
+    def to_list(self, length=None) -> list:
+        return list(self)
+
+
+class SQLiteCollection:
+    """
+    pymongo Collection 중 코드에서 쓰는 메서드만 가진 SQLite 테이블 래퍼
+    """
+    def __init__(self, connection, name:str):
+        self.connection = connection
+        self.name = name
+        self.table = '"' + name.replace('"', '') + '"'
+        self.database = connection
+        with connection.lock:
+            connection.sqlite.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (id TEXT PRIMARY KEY, doc TEXT NOT NULL)")
+
+    @staticmethod
+    def encode(document:dict) -> str:
+        return json_util.dumps(document)
+
+    @staticmethod
+    def decode(text:str) -> dict:
+        return json_util.loads(text, json_options=JSON_OPTIONS)
+
+    @staticmethod
+    def pushdown(query:dict) -> tuple:
+        """
+        최상위 같음 조건(문자열/숫자)은 SQL WHERE로 넘겨서 인덱스를 타게 함. 나머지는 파이썬에서 다시 확인
+        :return: (where 절, 파라미터)
+        """
+        clauses, params = [], []
+        for key, value in (query or {}).items():
+            if key == "_id" and isinstance(value, (ObjectId, str)):
+                clauses.append("id = ?")
+                params.append(str(value))
+            elif PATH_PATTERN.match(key) and isinstance(value, (str, int, float)) and not isinstance(value, bool):
+                clauses.append(f"json_extract(doc, '$.{key}') = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def scan(self, query:dict, batch_size:int=100):
+        where, params = self.pushdown(query)
+        with self.connection.lock:
+            rows = self.connection.sqlite.execute(f"SELECT doc FROM {self.table}{where}", params).fetchall()
+        for start in range(0, len(rows), batch_size):
+            for (text,) in rows[start:start + batch_size]:
+                yield self.decode(text)
+
+    def find(self, query:dict=None, projection:dict=None, batch_size:int=100, **kwargs) -> SQLiteCursor:
+        return SQLiteCursor(self, query, projection, batch_size)
+
+    def find_one(self, query:dict=None, projection:dict=None):
+        return next(iter(self.find(query, projection).limit(1)), None)
+
+    def write(self, document:dict, replace:bool=False):
+        if "_id" not in document:
+            document["_id"] = ObjectId()
+        verb = "INSERT OR REPLACE" if replace else "INSERT"
+        try:
+            with self.connection.lock, self.connection.sqlite:
+                self.connection.sqlite.execute(f"{verb} INTO {self.table} (id, doc) VALUES (?, ?)",
+                                               (str(document["_id"]), self.encode(document)))
+        except sqlite3.IntegrityError as e:
+            raise DuplicateKeyError(f"{self.name} : {e}") from e
+        return document["_id"]
+
+    def insert_one(self, document:dict) -> Result:
+        return Result(inserted_id=self.write(document), acknowledged=True)
+
+    def insert_many(self, documents:list, ordered:bool=True) -> Result:
+        inserted_ids, write_errors = [], []
+        for index, document in enumerate(documents):
+            try:
+                inserted_ids.append(self.write(document))
+            except DuplicateKeyError as e:
+                write_errors.append({"index": index, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+        if write_errors:
+            raise BulkWriteError({"writeErrors": write_errors, "nInserted": len(inserted_ids)})
+        return Result(inserted_ids=inserted_ids, acknowledged=True)
+
+    def update_one(self, query:dict, update:dict, upsert:bool=False) -> Result:
+        result, _ = self.apply_update(query, update, upsert)
+        return result
+
+    def find_one_and_update(self, query:dict, update:dict, projection:dict=None, sort:list=None, upsert:bool=False,
+                            return_document:bool=False, **kwargs):
+        """
+        :param return_document: pymongo ReturnDocument (BEFORE=False, AFTER=True)
+        """
+        _, (before, after) = self.apply_update(query, update, upsert, sort)
+        document = after if return_document else before
+        return project(document, projection) if document is not None else None
+
+    def apply_update(self, query:dict, update:dict, upsert:bool=False, sort:list=None) -> tuple:
+        """
+        $set, $inc 적용. 조회와 저장 사이에 다른 스레드가 끼어들지 않도록 연결 lock을 잡고 실행
+        :param sort: 조건에 맞는 문서가 여러 개일 때 고르는 순서 (find_one_and_update)
+        :return: (Result, (수정 전 문서, 수정 후 문서))
+        """
+        unsupported = [operator for operator in update if operator not in ("$set", "$inc")]
+        if unsupported:
+            raise ValueError(f"SQLite 저장소에서 지원하지 않는 update 연산자 : {unsupported}")
+        with self.connection.lock:
+            cursor = self.find(query).limit(1)
+            before = next(iter(cursor.sort(sort) if sort else cursor), None)
+            if before is None:
+                if not upsert:
+                    return Result(matched_count=0, modified_count=0, upserted_id=None), (None, None)
+                document = {key: value for key, value in query.items() if not key.startswith("$")}
+            else:
+                document = copy.deepcopy(before)
+            for path, value in update.get("$set", {}).items():
+                if path != "_id" or before is None:
+                    set_path(document, path, value)
+            for path, value in update.get("$inc", {}).items():
+                set_path(document, path, (get_values(document, path) or [0])[0] + value)
+            if before is None:
+                upserted_id = self.write(document)
+                return Result(matched_count=0, modified_count=0, upserted_id=upserted_id), (None, document)
+            self.write(document, replace=True)
+            return Result(matched_count=1, modified_count=1, upserted_id=None), (before, document)
+
+    def replace_one(self, query:dict, replacement:dict, upsert:bool=False) -> Result:
+        # 조회와 저장 사이에 다른 스레드가 끼어들지 않도록 apply_update처럼 연결 lock을 잡고 실행
+        with self.connection.lock:
+            document = self.find_one(query, {"_id": 1})
+            if document is None and not upsert:
+                return Result(matched_count=0, modified_count=0, upserted_id=None)
+            replacement = dict(replacement)
+            if document is not None:
+                replacement["_id"] = document["_id"]
+            self.write(replacement, replace=True)
+        return Result(matched_count=int(document is not None), modified_count=int(document is not None),
+                      upserted_id=None if document is not None else replacement["_id"])
+
+    def delete_one(self, query:dict) -> Result:
+        with self.connection.lock:
+            document = self.find_one(query, {"_id": 1})
+            if document is None:
+                return Result(deleted_count=0)
+            with self.connection.sqlite:
+                self.connection.sqlite.execute(f"DELETE FROM {self.table} WHERE id = ?", (str(document["_id"]),))
+        return Result(deleted_count=1)
+
+    def count_documents(self, query:dict=None) -> int:
+        return sum(1 for _ in self.find(query, {"_id": 1}))
+
+    def create_index(self, keys:list, name:str=None, unique:bool=False, **kwargs) -> str:
+        paths = [key for key, _ in keys]
+        if not all(PATH_PATTERN.match(path) for path in paths):
+            raise ValueError(f"인덱스 경로 오류 : {paths}")
+        name = name or "_".join(paths)
+        index_name = '"' + f"{self.name}_{name}".replace('"', '') + '"'
+        expressions = ", ".join(f"json_extract(doc, '$.{path}')" for path in paths)
+        with self.connection.lock, self.connection.sqlite:
+            self.connection.sqlite.execute(
+                f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {index_name} ON {self.table} ({expressions})")
+        return name
+
+    def watch(self, *args, **kwargs):
+        raise NotImplementedError("SQLite 저장소는 change stream을 지원하지 않습니다.")
+
+
+class SQLiteConnection(StorageBackend):
+    """
+    MongoDBConnection과 같은 API를 가진 내장 SQLite 저장소. (네트워크 없이 파일 하나 또는 메모리)
+    """
+    def __init__(self, path:str=":memory:"):
+        """
+        :param path: SQLite 파일 경로. ":memory:"면 메모리 DB (테스트, 벤치마크용)
+        """
+        self.path = path
+        self.lock = threading.RLock()
+        self.sqlite = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self.sqlite.execute("PRAGMA journal_mode=WAL")
+            self.sqlite.execute("PRAGMA synchronous=NORMAL")
+        self.collections = {}
+
+    def __getitem__(self, collection_name:str) -> SQLiteCollection:
+        return self.get_collection(collection_name)
+
+    def get_collection(self, collection_name: str) -> SQLiteCollection:
+        with self.lock:
+            if collection_name not in self.collections:
+                self.collections[collection_name] = SQLiteCollection(self, collection_name)
+            return self.collections[collection_name]
+
+    def ensure_indexes(self) -> dict:
+        result = {}
+        for collection_name, indexes in self.INDEXES.items():
+            result[collection_name] = []
+            for keys, options in indexes:
+                try:
+                    result[collection_name].append(self.get_collection(collection_name).create_index(keys, **options))
+                except Exception as e:
+                    print(f"❌ 인덱스 생성 실패 ({collection_name}.{options.get('name')}) : {e}")
+                    result[collection_name].append(f"failed: {options.get('name')}")
+        return result
+
+    def insert_data(self, collection_name: str, data:dict):
+        return self.get_collection(collection_name).insert_one(data).inserted_id
+
+    def insert_many_data(self, collection_name: str, data_list:list, ordered:bool=False) -> list:
+        if not data_list:
+            return []
+        return self.get_collection(collection_name).insert_many(data_list, ordered=ordered).inserted_ids
+
+    def select_data_from_id(self, collection_name: str, id:str):
+        return self.get_collection(collection_name).find_one({"_id": ObjectId(id)})
+
+    def select_data_from_query(self, collection_name:str, query:dict={}) -> list:
+        return list(self.get_collection(collection_name).find(query))
+
+    def iter_data_from_query(self, collection_name:str, query:dict=None, projection:dict=None,
+                             sort:list=None, limit:int=0, batch_size:int=100):
+        cursor = self.get_collection(collection_name).find(query or {}, projection, batch_size=batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        yield from cursor
+
+    def update_data(self, collection_name: str, data:dict, query:dict=None):
+        data = dict(data)
+        if type(data["_id"]) != ObjectId:
+            data["_id"] = ObjectId(data["_id"])
+        return self.get_collection(collection_name).update_one({"_id": data["_id"], **(query or {})}, {"$set": data})
+
+    def upsert_data(self, collection_name: str, query:dict, data:dict):
+        return self.get_collection(collection_name).update_one(query, {"$set": data}, upsert=True)
+
+    def close_connection(self):
+        with self.lock:
+            self.sqlite.close()
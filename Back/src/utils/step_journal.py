@@ -0,0 +1,104 @@
+import os
+import threading
+from bson import json_util
+
+# MongoDB에서 읽은 값과 같이 datetime을 naive로 복원
+JSON_OPTIONS = json_util.JSONOptions(tz_aware=False)
+
+class StepJournal:
+    """
+    토론 step 결과를 DB 저장 전에 먼저 기록하는 로컬 append-only 저널 (write-ahead log).
+    LLM 응답을 받은 뒤 save 전에 프로세스가 죽으면 그 발언이 사라지고 같은 step을 다시 생성(토큰 비용 재지불)하게 되므로
+    - record : step 결과(새 로그 + 바뀐 상태)를 한 줄 기록하고 fsync
+    - commit : DB 저장이 끝나면 commit 줄 기록. 남은 미완료 기록이 없으면 파일을 비움
+    - pending : 시작 시 commit되지 않은 기록 목록 (ProgressManager.replay_journal에서 DB에 반영)
+    한 줄 = Extended JSON (bson.json_util) 이라 datetime, ObjectId가 그대로 복원된다.
+    """
+    def __init__(self, path:str):
+        """
+        :param path: 저널 파일 경로 (디렉터리가 없으면 생성)
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.entries = self.read()
+        self.seq = max(self.entries.keys(), default=0)
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def read(self) -> dict:
+        """
+        파일에서 commit되지 않은 step 기록을 읽어서 {seq: 기록} 반환. 마지막 줄이 쓰다 만 줄이면 무시
+        """
+        entries = {}
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json_util.loads(line, json_options=JSON_OPTIONS)
+                except Exception:
+                    print(f"저널 손상된 줄 무시 : {line[:80]}")
+                    continue
+                if record.get("op") == "step":
+                    entries[record["seq"]] = record
+                elif record.get("op") == "commit":
+                    entries.pop(record["seq"], None)
+        return entries
+
+    def write(self, record:dict):
+        self.file.write(json_util.dumps(record) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def record(self, progress_id:str, data:dict, log_start:int, result:dict) -> int:
+        """
+        progress() 직후, save 전에 호출
+        :param data: step이 반영된 progress.data
+        :param log_start: step 전 debate_log 길이 (debate_3처럼 로그를 통째로 바꾸면 0으로 처리)
+        :param result: progress()의 반환값 (step, speaker, message)
+        :return: commit에 넘길 seq
+        """
+        debate_log = data.get("debate_log", [])
+        if log_start > len(debate_log):
+            log_start = 0
+        with self.lock:
+            self.seq += 1
+            entry = {
+                "op": "step",
+                "seq": self.seq,
+                "progress_id": progress_id,
+                "step": result.get("step", (data.get("status") or {}).get("step")),
+                "speaker": result.get("speaker"),
+                "message": result.get("message"),
+                "log_start": log_start,
+                "logs": debate_log[log_start:],
+                # debate_log 외의 바뀐 상태 (status, result, summary, end_time 등)
+                "state": {key: value for key, value in data.items() if key not in ("_id", "debate_log")},
+            }
+            self.write(entry)
+            self.entries[self.seq] = entry
+            return self.seq
+
+    def commit(self, seq:int):
+        """
+        DB 저장이 끝난 step 표시. 미완료 기록이 없으면 파일을 비워서 크기 유지
+        """
+        with self.lock:
+            self.entries.pop(seq, None)
+            if self.entries:
+                self.write({"op": "commit", "seq": seq})
+            else:
+                self.file.truncate(0)
+                self.file.flush()
+                os.fsync(self.file.fileno())
+
+    def pending(self) -> list:
+        """
+        commit되지 않은 step 기록 (기록 순서대로)
+        """
+        with self.lock:
+            return [self.entries[seq] for seq in sorted(self.entries.keys())]
+
+    def close(self):
+        with self.lock:
+            self.file.close()
@@ -0,0 +1,169 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from bson.objectid import ObjectId
+
+ASCENDING = 1
+DESCENDING = -1
+
+
+class StorageBackend(ABC):
+    """
+    저장소 인터페이스. 코드에서 실제로 쓰는 연산만 정의한다.
+    - MongoDBConnection : MongoDB (기본)
+    - SQLiteConnection  : 단일 서버, CI, 벤치마크용 내장 SQLite
+    get_collection()은 pymongo Collection과 같은 모양의 객체를 돌려줘야 한다.
+    (find, find_one, insert_one, insert_many, update_one, replace_one, delete_one, create_index, database[...])
+    """
+    # 서버 시작 시 ensure_indexes()로 만드는 인덱스 {컬렉션: [(key 목록, 옵션)]}
+    INDEXES = {
+        "object": [
+            # 같은 이름 + 같은 ai 프로필 중복 방지 (insert 시 DuplicateKeyError)
+            ([("name", ASCENDING), ("ai", ASCENDING)], {"name": "name_ai_unique", "unique": True}),
+        ],
+        "progress": [
+            # 프로필 전적 조회 (get_stats_by_id, get_name_by_id)
+            ([("participants.pos.id", ASCENDING)], {"name": "pos_id"}),
+            ([("participants.neg.id", ASCENDING)], {"name": "neg_id"}),
+            ([("status.type", ASCENDING)], {"name": "status_type"}),
+            # 토너먼트 job으로 만든 토론 (JobQueue 재시도 시 중복 생성 확인, 토너먼트 진행 상황)
+            ([("job_id", ASCENDING)], {"name": "job_id", "sparse": True}),
+            ([("tournament_id", ASCENDING)], {"name": "tournament_id", "sparse": True}),
+        ],
+        "progress_archive": [
+            ([("participants.pos.id", ASCENDING)], {"name": "pos_id"}),
+            ([("participants.neg.id", ASCENDING)], {"name": "neg_id"}),
+        ],
+        "image": [
+            ([("filename", ASCENDING)], {"name": "filename"}),
+            ([("sha256", ASCENDING)], {"name": "sha256", "sparse": True}),
+        ],
+        "persona": [
+            ([("name", ASCENDING)], {"name": "name_unique", "unique": True}),
+        ],
+        "detect_cache": [
+            ([("key", ASCENDING)], {"name": "key_unique", "unique": True}),
+        ],
+        "rating": [
+            # 리더보드 (rating 높은 순)
+            ([("rating", DESCENDING)], {"name": "rating"}),
+        ],
+        "job": [
+            # JobQueue.claim - 대기 작업을 priority, 생성 순으로 찾음
+            ([("status", ASCENDING), ("priority", DESCENDING), ("create_time", ASCENDING)], {"name": "status_priority"}),
+            ([("group", ASCENDING), ("status", ASCENDING)], {"name": "group_status"}),
+        ],
+    }
+
+    @abstractmethod
+    def ensure_indexes(self) -> dict:
+        pass
+
+    @abstractmethod
+    def get_collection(self, collection_name: str):
+        pass
+
+    @abstractmethod
+    def insert_data(self, collection_name: str, data:dict):
+        pass
+
+    @abstractmethod
+    def insert_many_data(self, collection_name: str, data_list:list, ordered:bool=False) -> list:
+        pass
+
+    @abstractmethod
+    def select_data_from_id(self, collection_name: str, id:str):
+        pass
+
+    @abstractmethod
+    def select_data_from_query(self, collection_name:str, query:dict={}) -> list:
+        pass
+
+    @abstractmethod
+    def iter_data_from_query(self, collection_name:str, query:dict=None, projection:dict=None,
+                             sort:list=None, limit:int=0, batch_size:int=100):
+        pass
+
+    @abstractmethod
+    def update_data(self, collection_name: str, data:dict, query:dict=None):
+        pass
+
+    @abstractmethod
+    def upsert_data(self, collection_name: str, query:dict, data:dict):
+        pass
+
+    @abstractmethod
+    def close_connection(self):
+        pass
+
+
+class ThreadedAsyncConnection:
+    """
+    동기 StorageBackend를 AsyncMongoDBConnection과 같은 async API로 감싸는 클래스.
+    각 호출을 스레드에서 실행해서 event loop를 막지 않는다. (SQLite 백엔드용)
+    """
+    def __init__(self, backend:StorageBackend):
+        self.backend = backend
+
+    def get_collection(self, collection_name: str):
+        return self.backend.get_collection(collection_name)
+
+    async def ping(self) -> bool:
+        return True
+
+    async def insert_data(self, collection_name: str, data:dict):
+        return await asyncio.to_thread(self.backend.insert_data, collection_name, data)
+
+    async def insert_many_data(self, collection_name: str, data_list:list, ordered:bool=False) -> list:
+        return await asyncio.to_thread(self.backend.insert_many_data, collection_name, data_list, ordered)
+
+    async def select_data_from_id(self, collection_name: str, id:str):
+        return await asyncio.to_thread(self.backend.select_data_from_id, collection_name, id)
+
+    async def select_data_from_ids(self, collection_name: str, ids:list) -> list:
+        return await asyncio.to_thread(self.backend.select_data_from_query, collection_name,
+                                       {"_id": {"$in": [ObjectId(str(id)) for id in ids]}})
+
+    async def select_data_from_query(self, collection_name:str, query:dict={}, projection:dict=None) -> list:
+        return await asyncio.to_thread(lambda: list(self.backend.iter_data_from_query(collection_name, query, projection)))
+
+    async def update_data(self, collection_name: str, data:dict, query:dict=None):
+        return await asyncio.to_thread(self.backend.update_data, collection_name, dict(data), query)
+
+    async def upsert_data(self, collection_name: str, query:dict, data:dict):
+        return await asyncio.to_thread(self.backend.upsert_data, collection_name, query, data)
+
+    def close_connection(self):
+        pass
+
+
+def create_storage(storage_config:dict, pool_options:dict=None, base_dir:str=None) -> tuple:
+    """
+    config의 storage 항목으로 (동기 연결, 비동기 연결) 생성.
+    storage:
+      backend: "mongodb" | "sqlite"
+      sqlite_path: "data/agora.sqlite3"   # base_dir 기준 상대 경로 또는 절대 경로, ":memory:" 가능
+    mongodb는 .env의 MONGO_URI, DB_NAME이 필요하다.
+    """
+    storage_config = storage_config or {}
+    backend = storage_config.get("backend", "mongodb")
+    if backend == "sqlite":
+        from .sqlite_connection import SQLiteConnection
+        path = storage_config.get("sqlite_path", "agora.sqlite3")
+        if path != ":memory:" and not os.path.isabs(path) and base_dir:
+            path = os.path.join(base_dir, path)
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        connection = SQLiteConnection(path)
+        return connection, ThreadedAsyncConnection(connection)
+    if backend == "mongodb":
+        from .mongodb_connection import MongoDBConnection
+        from .async_mongodb_connection import AsyncMongoDBConnection
+        MONGO_URI = os.getenv("MONGO_URI")
+        DB_NAME = os.getenv("DB_NAME")
+        if not MONGO_URI or not DB_NAME:
+            raise ValueError("MONGO_URI 또는 DB_NAME이 .env 파일에서 설정되지 않았습니다.")
+        pool_options = pool_options or {}
+        return (MongoDBConnection(MONGO_URI, DB_NAME, **pool_options),
+                AsyncMongoDBConnection(MONGO_URI, DB_NAME, **pool_options))
+    raise ValueError(f"지원하지 않는 storage backend : {backend}")
@@ -0,0 +1,385 @@
+import math
+from datetime import datetime
+from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError, BulkWriteError
+from .job_queue import JobQueue
+
+
+class TournamentScheduler:
+    """
+    토너먼트 진행 관리 클래스. 대진을 한 번에 전부 만들지 않고 라운드 단위로 만들어서 job 큐에 조금씩 넣는다.
+    - format
+        round_robin : 모든 쌍 한 번씩. double이면 반대 진영으로 한 번 더 (첫 경기가 점수 차 decisive_margin 이상이면 생략)
+        swiss       : ceil(log2 n) 라운드. 승점이 비슷한 상대끼리, 이미 만난 상대는 피해서 대진 -> 약 n/2 * log2 n 경기
+        knockout    : 이긴 쪽만 다음 라운드 (무승부, 생성 실패면 시드가 높은 쪽 진출) -> n-1 경기
+    - max_concurrent : 동시에 진행(대기 job 포함)하는 토론 수 제한
+    - budget_tokens : 토론 하나에 tokens_per_debate 토큰을 쓴다고 보고, 예산을 넘는 대진은 만들지 않음 (0이면 제한 없음)
+    - 같은 주제, 같은 찬반으로 이미 끝난 토론이 있으면 새로 만들지 않고 그 결과를 사용 (대진 생성 시 라운드마다 한 번 조회)
+    tournament 문서는 version 필드로 낙관적 잠금 -> Back 여러 개가 advance를 동시에 불러도 한 곳만 반영된다.
+    """
+    COLLECTION = "tournament"
+    FORMATS = ("round_robin", "swiss", "knockout")
+    WIN, DRAW = 1.0, 0.5
+
+    def __init__(self, db, job_queue:JobQueue, tokens_per_debate:int=20000, default_max_concurrent:int=4,
+                 decisive_margin:int=15):
+        """
+        :param db: MongoDBConnection 또는 같은 API의 저장소
+        :param tokens_per_debate: 토론 하나에 드는 토큰 추정치 (예산 계산용)
+        :param default_max_concurrent: 토너먼트 생성 시 max_concurrent를 안 주면 쓰는 값
+        :param decisive_margin: 이 점수 차 이상이면 승부가 난 대진으로 보고 재대결 생략
+        """
+        self.db = db
+        self.job_queue = job_queue
+        self.tokens_per_debate = tokens_per_debate
+        self.default_max_concurrent = default_max_concurrent
+        self.decisive_margin = decisive_margin
+
+    def collection(self):
+        return self.db.get_collection(self.COLLECTION)
+
+    def create(self, participants:list, topic:str, format:str="round_robin", progress_type:str="debate_2",
+               max_concurrent:int=None, budget_tokens:int=0, double:bool=False) -> str:
+        """
+        토너먼트 문서를 만들고 첫 라운드 대진 생성. 실제 job 등록은 advance에서 max_concurrent만큼씩
+        :return: 토너먼트 id
+        """
+        if format not in self.FORMATS:
+            raise ValueError(f"지원하지 않는 토너먼트 형식 : {format}")
+        if len(participants) < 2:
+            raise ValueError("참가자가 2명 이상 필요합니다.")
+        tournament = {
+            "topic": topic,
+            "type": progress_type,
+            "format": format,
+            "participants": list(participants),
+            "double": double,
+            "status": "running",
+            "round": 1,
+            "rounds": self.planned_rounds(format, len(participants), double),
+            "max_concurrent": max_concurrent or self.default_max_concurrent,
+            "budget_tokens": budget_tokens,
+            "matches": [],
+            "version": 0,
+            "create_time": datetime.now(),
+            "end_time": None,
+            "end_reason": None,
+        }
+        tournament["matches"] = self.pair_round(tournament)
+        return str(self.db.insert_data(self.COLLECTION, tournament))
+
+    @staticmethod
+    def planned_rounds(format:str, count:int, double:bool) -> int:
+        if format == "round_robin":
+            return 2 if double else 1
+        # swiss, knockout 모두 log2 n 라운드
+        return max(1, math.ceil(math.log2(count)))
+
+    @staticmethod
+    def match(round:int, pos:str, neg:str) -> dict:
+        return {"round": round, "pos": pos, "neg": neg, "status": "planned",
+                "job_id": None, "progress_id": None, "result": None, "margin": None, "winner": None}
+
+    # ---------- 대진 생성 ----------
+
+    def pair_round(self, tournament:dict) -> list:
+        """
+        현재 round의 대진 목록 생성. 더 만들 대진이 없으면 빈 리스트
+        이미 끝난 같은 대진이 있으면 여기서 바로 결과를 채워 reused로 만든다
+        """
+        format, round = tournament["format"], tournament["round"]
+        if format == "round_robin":
+            matches = self.pair_round_robin(tournament, round)
+        elif format == "swiss":
+            matches = self.pair_swiss(tournament, round)
+        else:
+            matches = self.pair_knockout(tournament, round)
+        self.reuse_previous(tournament, matches)
+        return matches
+
+    def pair_round_robin(self, tournament:dict, round:int) -> list:
+        participants = tournament["participants"]
+        if round == 1:
+            # 진영이 한쪽으로 몰리지 않도록 번갈아 배정
+            return [self.match(1, *((a, b) if (i + j) % 2 else (b, a)))
+                    for i, a in enumerate(participants) for j, b in enumerate(participants) if i < j]
+        # 2라운드 : 진영을 바꿔 재대결. 1라운드에서 승부가 확실히 난 대진은 생략
+        return [self.match(2, first["neg"], first["pos"]) for first in tournament["matches"]
+                if first["round"] == 1 and not self.decided(first)]
+
+    def pair_swiss(self, tournament:dict, round:int) -> list:
+        points = self.standings(tournament)
+        met = {frozenset((m["pos"], m["neg"])) for m in tournament["matches"]}
+        pos_count = {id: 0 for id in tournament["participants"]}
+        for m in tournament["matches"]:
+            pos_count[m["pos"]] = pos_count.get(m["pos"], 0) + 1
+        # 승점 높은 순 (같으면 시드 순)
+        order = sorted(tournament["participants"], key=lambda id: (-points.get(id, 0), tournament["participants"].index(id)))
+        matches = []
+        if len(order) % 2:
+            # 홀수면 부전승을 아직 못 받은 참가자 중 승점이 가장 낮은 참가자에게
+            had_bye = {m["pos"] for m in tournament["matches"] if m["status"] == "bye"}
+            lowest = next((id for id in reversed(order) if id not in had_bye), order[-1])
+            order.remove(lowest)
+            matches.append(self.bye(round, lowest))
+        while len(order) > 1:
+            first = order.pop(0)
+            # 아직 안 만난 가장 가까운 상대, 없으면 바로 다음 상대
+            index = next((i for i, other in enumerate(order) if frozenset((first, other)) not in met), 0)
+            second = order.pop(index)
+            # 찬성 측을 덜 맡은 쪽이 찬성
+            pos, neg = (first, second) if pos_count[first] <= pos_count[second] else (second, first)
+            matches.append(self.match(round, pos, neg))
+        return matches
+
+    def pair_knockout(self, tournament:dict, round:int) -> list:
+        if round == 1:
+            alive = list(tournament["participants"])
+        else:
+            alive = [m["winner"] for m in tournament["matches"] if m["round"] == round - 1 and m["winner"]]
+        if len(alive) < 2:
+            return []
+        matches = []
+        # 시드 1 vs 마지막 시드 순으로 대진
+        while len(alive) > 1:
+            first, second = alive.pop(0), alive.pop(-1)
+            pos, neg = (first, second) if len(matches) % 2 == 0 else (second, first)
+            matches.append(self.match(round, pos, neg))
+        if alive:
+            matches.append(self.bye(round, alive[0]))
+        return matches
+
+    def bye(self, round:int, id:str) -> dict:
+        # 홀수 인원일 때 남는 참가자는 부전승
+        match = self.match(round, id, None)
+        match.update({"status": "bye", "result": "positive", "winner": id})
+        return match
+
+    def set_result(self, tournament:dict, match:dict, progress:dict, status:str):
+        """
+        끝난 progress 결과를 대진에 반영. knockout은 다음 라운드 진출자가 필요하므로 무승부/실패면 시드가 높은 쪽이 진출
+        """
+        if progress:
+            match["result"], match["margin"], side = self.match_result(progress)
+            match["winner"] = match[side] if side else None
+            match["progress_id"] = str(progress["_id"])
+        match["status"] = status
+        if tournament["format"] == "knockout" and not match["winner"]:
+            seeds = tournament["participants"]
+            match["winner"] = min((match["pos"], match["neg"]), key=seeds.index)
+
+    def decided(self, match:dict) -> bool:
+        return match.get("winner") is not None and (match.get("margin") or 0) >= self.decisive_margin
+
+    # ---------- 결과 반영 ----------
+
+    @staticmethod
+    def match_result(progress:dict) -> tuple:
+        """
+        끝난 progress 문서에서 (result, 점수 차, 이긴 쪽 진영) 계산
+        """
+        result = progress.get("result") or "draw"
+        score = progress.get("score") or {}
+        if "match_pos" in score and "match_neg" in score:
+            margin = abs((score["match_pos"] or 0) - (score["match_neg"] or 0))
+        else:
+            margin = 0 if result == "draw" else 100
+        side = {"positive": "pos", "negative": "neg"}.get(result)
+        return result, margin, side
+
+    def standings(self, tournament:dict) -> dict:
+        """
+        :return: {참가자 id: 승점} (승 1, 무 0.5, 부전승 1)
+        """
+        points = {id: 0.0 for id in tournament["participants"]}
+        for m in tournament["matches"]:
+            if m["status"] not in ("ended", "reused", "bye"):
+                continue
+            if m["winner"]:
+                points[m["winner"]] = points.get(m["winner"], 0) + self.WIN
+            elif m["result"] == "draw":
+                points[m["pos"]] = points.get(m["pos"], 0) + self.DRAW
+                points[m["neg"]] = points.get(m["neg"], 0) + self.DRAW
+        return points
+
+    def find_previous(self, tournament:dict, matches:list) -> dict:
+        """
+        같은 주제, 같은 찬반으로 이미 끝난 토론을 대진 목록 전체에 대해 한 번에 조회
+        :return: {(pos id, neg id): progress}
+        """
+        if not matches:
+            return {}
+        previous = {}
+        for progress in self.db.iter_data_from_query(
+                "progress",
+                {"participants.pos.id": {"$in": list({m["pos"] for m in matches})},
+                 "participants.neg.id": {"$in": list({m["neg"] for m in matches})},
+                 "topic": tournament["topic"], "status.type": "end"},
+                {"result": 1, "score": 1, "participants.pos.id": 1, "participants.neg.id": 1}):
+            participants = progress.get("participants") or {}
+            key = ((participants.get("pos") or {}).get("id"), (participants.get("neg") or {}).get("id"))
+            previous.setdefault(key, progress)
+        return previous
+
+    def reuse_previous(self, tournament:dict, matches:list):
+        """
+        이미 끝난 토론이 있는 대진은 새로 만들지 않고 그 결과를 사용 (부전승 제외)
+        """
+        planned = [m for m in matches if m["status"] == "planned"]
+        previous = self.find_previous(tournament, planned)
+        for m in planned:
+            progress = previous.get((m["pos"], m["neg"]))
+            if progress:
+                self.set_result(tournament, m, progress, "reused")
+
+    def refresh(self, tournament:dict) -> bool:
+        """
+        진행 중인 대진의 job/progress 상태를 읽어서 matches 갱신
+        :return: 바뀐 것이 있는지
+        """
+        scheduled = [m for m in tournament["matches"] if m["status"] == "scheduled"]
+        if not scheduled:
+            return False
+        id = str(tournament["_id"])
+        progresses = {p.get("job_id"): p for p in self.db.iter_data_from_query(
+            "progress", {"tournament_id": id}, {"job_id": 1, "status": 1, "result": 1, "score": 1})}
+        jobs = {str(job["_id"]): job for job in self.db.iter_data_from_query(
+            JobQueue.COLLECTION, {"group": id}, {"status": 1})}
+        changed = False
+        for m in scheduled:
+            progress = progresses.get(m["job_id"])
+            if progress:
+                if not m["progress_id"]:
+                    m["progress_id"] = str(progress["_id"])
+                    changed = True
+                if (progress.get("status") or {}).get("type") == "end":
+                    self.set_result(tournament, m, progress, "ended")
+                    changed = True
+                continue
+            job = jobs.get(m["job_id"])
+            if job is None:
+                # 문서 저장 후 enqueue 전에 죽은 경우 - 같은 job id로 다시 등록
+                self.enqueue(tournament, [m])
+            elif job["status"] in ("failed", "cancelled"):
+                self.set_result(tournament, m, None, "failed")
+                changed = True
+        return changed
+
+    def enqueue(self, tournament:dict, matches:list):
+        for m in matches:
+            try:
+                self.job_queue.enqueue(str(tournament["_id"]), "progress_create",
+                                       [{"type": tournament["type"],
+                                         "participants": {"pos": {"id": m["pos"]}, "neg": {"id": m["neg"]}},
+                                         "topic": tournament["topic"]}],
+                                       ids=[m["job_id"]])
+            except (DuplicateKeyError, BulkWriteError):
+                pass
+
+    def spent_tokens(self, tournament:dict) -> int:
+        # 새로 만든(만들고 있는) 토론만 예산에 포함
+        return self.tokens_per_debate * sum(1 for m in tournament["matches"]
+                                            if m["status"] in ("scheduled", "ended", "failed"))
+
+    # ---------- 진행 ----------
+
+    def advance(self, tournament_id:str) -> dict:
+        """
+        토너먼트 한 단계 진행 (background에서 주기적으로 호출)
+        1) 진행 중 대진 결과 반영  2) 동시 실행 제한, 예산 안에서 대기 대진을 job으로 등록
+        3) 라운드가 끝났으면 다음 라운드 대진 생성, 더 없으면 종료
+        :return: 갱신된 토너먼트 문서 (다른 프로세스가 먼저 갱신했으면 None)
+        """
+        tournament = self.collection().find_one({"_id": ObjectId(tournament_id)})
+        if not tournament or tournament["status"] != "running":
+            return tournament
+        version = tournament["version"]
+        changed = self.refresh(tournament)
+        to_enqueue = []
+
+        while True:
+            matches = tournament["matches"]
+            planned = [m for m in matches if m["status"] == "planned"]
+            in_flight = sum(1 for m in matches if m["status"] == "scheduled")
+            budget = tournament["budget_tokens"]
+            for m in planned:
+                if in_flight >= tournament["max_concurrent"]:
+                    break
+                if budget and self.spent_tokens(tournament) + self.tokens_per_debate > budget:
+                    break
+                m["job_id"] = str(ObjectId())
+                m["status"] = "scheduled"
+                to_enqueue.append(m)
+                in_flight += 1
+                changed = True
+
+            current = [m for m in matches if m["round"] == tournament["round"]]
+            if any(m["status"] in ("planned", "scheduled") for m in current):
+                if budget and in_flight == 0 and self.spent_tokens(tournament) + self.tokens_per_debate > budget:
+                    self.finish(tournament, "budget")
+                    changed = True
+                break
+            # 라운드 종료 -> 다음 라운드
+            if tournament["round"] >= tournament["rounds"]:
+                self.finish(tournament, "completed")
+                changed = True
+                break
+            tournament["round"] += 1
+            next_matches = self.pair_round(tournament)
+            changed = True
+            if not next_matches:
+                self.finish(tournament, "completed")
+                break
+            tournament["matches"].extend(next_matches)
+
+        if not changed:
+            return tournament
+        tournament["version"] = version + 1
+        updated = self.collection().update_one(
+            {"_id": tournament["_id"], "version": version},
+            {"$set": {key: value for key, value in tournament.items() if key != "_id"}})
+        if not updated.matched_count:
+            return None
+        # 문서에 job id를 먼저 기록한 다음 등록 (중간에 죽으면 refresh에서 같은 id로 다시 등록)
+        self.enqueue(tournament, to_enqueue)
+        return tournament
+
+    def finish(self, tournament:dict, reason:str):
+        tournament["status"] = "end"
+        tournament["end_reason"] = reason
+        tournament["end_time"] = datetime.now()
+        # 예산 초과로 끝나면 아직 안 만든 대진은 건너뜀 처리
+        for m in tournament["matches"]:
+            if m["status"] == "planned":
+                m["status"] = "skipped"
+
+    def advance_all(self) -> int:
+        """
+        진행 중인 토너먼트 전부 advance
+        :return: 진행 중인 토너먼트 수
+        """
+        ids = [str(t["_id"]) for t in self.db.iter_data_from_query(self.COLLECTION, {"status": "running"}, {"_id": 1})]
+        for id in ids:
+            try:
+                self.advance(id)
+            except Exception as e:
+                print(f"토너먼트 {id} 진행 중 오류 : {e}")
+        return len(ids)
+
+    def summary(self, tournament_id:str) -> dict:
+        """
+        토너먼트 정보 + 순위 + 대진 상태별 개수
+        """
+        tournament = self.collection().find_one({"_id": ObjectId(tournament_id)})
+        if not tournament:
+            return None
+        tournament["_id"] = str(tournament["_id"])
+        points = self.standings(tournament)
+        tournament["standings"] = [{"id": id, "points": point}
+                                   for id, point in sorted(points.items(), key=lambda item: -item[1])]
+        counts = {}
+        for m in tournament["matches"]:
+            counts[m["status"]] = counts.get(m["status"], 0) + 1
+        tournament["match_counts"] = counts
+        tournament["spent_tokens"] = self.spent_tokens(tournament)
+        return tournament
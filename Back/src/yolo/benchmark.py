@@ -0,0 +1,130 @@
+"""
+YOLO 백엔드(torch / onnx / onnx int8) 속도, 정확도 비교 스크립트.
+정확도는 PyTorch 결과를 기준으로 같은 class + IoU 0.5 이상인 박스를 맞은 것으로 본다.
+
+실행 (Back 폴더에서)
+python -m src.yolo.benchmark --images ./bench_images --model yolo/yolo11n.pt --runs 3 --output yolo_bench.json
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+import cv2
+from .yolo_detect import YOLODetect
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def iou(a:dict, b:dict) -> float:
+    x1, y1 = max(a["x1"], b["x1"]), max(a["y1"], b["y1"])
+    x2, y2 = min(a["x2"], b["x2"]), min(a["y2"], b["y2"])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    area_a = (a["x2"] - a["x1"]) * (a["y2"] - a["y1"])
+    area_b = (b["x2"] - b["x1"]) * (b["y2"] - b["y1"])
+    union = area_a + area_b - inter
+    return inter / union if union > 0 else 0.0
+
+
+def match_detections(reference:list, predicted:list, iou_threshold:float=0.5) -> dict:
+    """
+    기준 결과와 비교 결과의 박스를 class가 같고 IoU가 가장 높은 것끼리 짝지음
+    """
+    used = set()
+    matched_ious = []
+    for ref in reference:
+        best_index, best_iou = None, iou_threshold
+        for i, pred in enumerate(predicted):
+            if i in used or pred["object_name"] != ref["object_name"]:
+                continue
+            value = iou(ref["bounding_box"], pred["bounding_box"])
+            if value >= best_iou:
+                best_index, best_iou = i, value
+        if best_index is not None:
+            used.add(best_index)
+            matched_ious.append(best_iou)
+    return {"matched": len(matched_ious),
+            "reference": len(reference),
+            "predicted": len(predicted),
+            "ious": matched_ious}
+
+
+def run_backend(detector:YOLODetect, images:list, runs:int) -> dict:
+    # 첫 추론은 세션 준비 시간이 섞이므로 한 번 미리 돌려둔다
+    detector.detect_objects(images[0])
+    latencies = []
+    detections = {}
+    for _ in range(runs):
+        for path in images:
+            start = time.perf_counter()
+            detections[path] = detector.detect_objects(path)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {"backend": detector.backend,
+            "latency_ms": {"mean": statistics.mean(latencies),
+                           "p50": latencies[len(latencies) // 2],
+                           "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]},
+            "detections": detections}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YOLO 백엔드 latency/accuracy 비교")
+    parser.add_argument("--images", required=True, help="고정 이미지 셋 폴더")
+    parser.add_argument("--model", default=os.path.join("yolo", "yolo11n.pt"))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--confidence", type=float, default=0.5)
+    parser.add_argument("--calibration", default=None, help="int8 정적 양자화 calibration 이미지 폴더")
+    parser.add_argument("--output", default=None, help="결과 json 저장 경로")
+    args = parser.parse_args()
+
+    images = [os.path.join(args.images, name) for name in sorted(os.listdir(args.images))
+              if name.lower().endswith(IMAGE_EXTENSIONS) and cv2.imread(os.path.join(args.images, name)) is not None]
+    if not images:
+        raise ValueError(f"{args.images}에 이미지가 없습니다.")
+
+    settings = {
+        "torch": {"backend": "torch"},
+        "onnx": {"backend": "onnx"},
+        "onnx_int8": {"backend": "onnx", "int8": True, "calibration_dir": args.calibration},
+    }
+    results = {}
+    for name, options in settings.items():
+        load_start = time.perf_counter()
+        detector = YOLODetect(model_path=args.model, confidence_threshold=args.confidence, **options)
+        load_ms = (time.perf_counter() - load_start) * 1000
+        if name != "torch" and detector.backend != "onnx":
+            print(f"{name}: ONNX 백엔드를 사용할 수 없어 건너뜁니다.")
+            continue
+        results[name] = run_backend(detector, images, args.runs)
+        results[name]["load_ms"] = load_ms
+
+    reference = results["torch"]["detections"]
+    report = {"images": len(images), "runs": args.runs, "backends": {}}
+    for name, result in results.items():
+        matched = reference_count = predicted_count = 0
+        ious = []
+        for path in images:
+            match = match_detections(reference[path], result["detections"][path])
+            matched += match["matched"]
+            reference_count += match["reference"]
+            predicted_count += match["predicted"]
+            ious.extend(match["ious"])
+        report["backends"][name] = {
+            "load_ms": round(result["load_ms"], 2),
+            "latency_ms": {key: round(value, 2) for key, value in result["latency_ms"].items()},
+            "recall_vs_torch": round(matched / reference_count, 4) if reference_count else 1.0,
+            "precision_vs_torch": round(matched / predicted_count, 4) if predicted_count else 1.0,
+            "mean_iou_vs_torch": round(statistics.mean(ious), 4) if ious else None,
+        }
+
+    print(f"{'backend':<12}{'load(ms)':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'recall':>9}{'precision':>11}{'mIoU':>8}")
+    for name, row in report["backends"].items():
+        print(f"{name:<12}{row['load_ms']:>10}{row['latency_ms']['p50']:>10}{row['latency_ms']['p95']:>10}"
+              f"{row['recall_vs_torch']:>9}{row['precision_vs_torch']:>11}{str(row['mean_iou_vs_torch']):>8}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
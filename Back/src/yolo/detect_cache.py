@@ -0,0 +1,51 @@
+import copy
+from datetime import datetime
+from ..utils.lru_cache import LRUCache
+from ..utils.mongodb_connection import MongoDBConnection
+
+class DetectCache:
+    """
+    YOLO 탐지 결과 캐시.
+    key는 (이미지 sha256, 모델 버전, confidence 임계값)으로 만들어서
+    같은 사진을 다시 올리면 추론 없이 바운딩 박스, class 이름을 돌려준다.
+    - 1차: 메모리 LRU
+    - 2차: db를 넘기면 detect_cache 컬렉션에 영구 저장 (서버 재시작 후에도 유지)
+    """
+    def __init__(self, max_entries:int=1024, db:MongoDBConnection=None, collection_name:str="detect_cache"):
+        self.lru = LRUCache(max_items=max_entries)
+        self.db = db
+        self.collection_name = collection_name
+
+    @staticmethod
+    def make_key(image_hash:str, model_version:str, confidence_threshold:float) -> str:
+        return f"{image_hash}:{model_version}:{confidence_threshold:.3f}"
+
+    def get(self, key:str) -> list:
+        """
+        캐시된 탐지 결과 반환. 없으면 None
+        """
+        detections = self.lru.get(key)
+        if detections is None and self.db:
+            try:
+                found = next(self.db.iter_data_from_query(self.collection_name, {"key": key}, {"detections": 1}, limit=1), None)
+            except Exception as e:
+                print(f"탐지 캐시 조회 실패 : {e}")
+                found = None
+            if found:
+                detections = found["detections"]
+                self.lru.put(key, detections)
+        # 호출한 쪽에서 결과를 고쳐도 캐시가 바뀌지 않게 복사해서 반환
+        return copy.deepcopy(detections) if detections is not None else None
+
+    def put(self, key:str, detections:list, image_hash:str=None, model_version:str=None, confidence_threshold:float=None):
+        self.lru.put(key, copy.deepcopy(detections))
+        if self.db:
+            try:
+                self.db.upsert_data(self.collection_name, {"key": key}, {"key": key,
+                                                           "image_hash": image_hash,
+                                                           "model_version": model_version,
+                                                           "confidence_threshold": confidence_threshold,
+                                                           "detections": detections,
+                                                           "create_time": datetime.now()})
+            except Exception as e:
+                print(f"탐지 캐시 저장 실패 : {e}")
@@ -0,0 +1,152 @@
+import ast
+import os
+import shutil
+import cv2
+import numpy as np
+import onnxruntime as ort
+
+
+def export_onnx(model_path:str, onnx_path:str, int8:bool=False, calibration_dir:str=None, imgsz:int=640) -> str:
+    """
+    .pt YOLO 모델을 ONNX로 한 번 변환해서 onnx_path에 저장하고 경로 반환.
+    int8이면 변환된 모델을 int8로 양자화한다.
+    - calibration_dir이 있으면 해당 폴더 이미지로 정적(static) 양자화
+    - 없으면 동적(dynamic) 양자화
+    변환에만 ultralytics(PyTorch)가 필요하고, 추론에는 필요 없다.
+    """
+    from ultralytics import YOLO
+
+    fp32_path = os.path.splitext(model_path)[0] + ".onnx"
+    if not os.path.exists(fp32_path):
+        exported = YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=False, simplify=True)
+        if os.path.abspath(str(exported)) != os.path.abspath(fp32_path):
+            shutil.move(str(exported), fp32_path)
+
+    if not int8:
+        if os.path.abspath(fp32_path) != os.path.abspath(onnx_path):
+            shutil.copyfile(fp32_path, onnx_path)
+        return onnx_path
+
+    from onnxruntime.quantization import quantize_dynamic, quantize_static, QuantType, QuantFormat
+    if calibration_dir:
+        quantize_static(fp32_path, onnx_path,
+                        calibration_data_reader=CalibrationReader(fp32_path, calibration_dir),
+                        quant_format=QuantFormat.QDQ,
+                        activation_type=QuantType.QUInt8,
+                        weight_type=QuantType.QInt8)
+    else:
+        quantize_dynamic(fp32_path, onnx_path, weight_type=QuantType.QUInt8)
+    return onnx_path
+
+
+def letterbox(image:np.ndarray, input_size:tuple) -> tuple:
+    """
+    비율을 유지한 채로 input_size에 맞게 줄이고 남는 부분은 회색(114)으로 채움.
+    :return: (NCHW float32 blob, 축소 비율, (pad_w, pad_h))
+    """
+    input_h, input_w = input_size
+    h, w = image.shape[:2]
+    ratio = min(input_w / w, input_h / h)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    pad_w, pad_h = (input_w - new_w) / 2, (input_h - new_h) / 2
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(pad_h - 0.1)), int(round(pad_h + 0.1))
+    left, right = int(round(pad_w - 0.1)), int(round(pad_w + 0.1))
+    padded = cv2.copyMakeBorder(resized, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    blob = cv2.cvtColor(padded, cv2.COLOR_BGR2RGB).transpose(2, 0, 1)[np.newaxis].astype(np.float32) / 255.0
+    return np.ascontiguousarray(blob), ratio, (left, top)
+
+
+class CalibrationReader:
+    """
+    정적 int8 양자화에 쓰는 calibration 이미지 reader
+    """
+    def __init__(self, onnx_path:str, image_dir:str, max_images:int=100):
+        session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+        model_input = session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_size = tuple(model_input.shape[2:4])
+        files = sorted(os.listdir(image_dir))[:max_images]
+        self.paths = iter([os.path.join(image_dir, name) for name in files])
+
+    def get_next(self):
+        for path in self.paths:
+            image = cv2.imread(path)
+            if image is not None:
+                return {self.input_name: letterbox(image, self.input_size)[0]}
+        return None
+
+
+class ONNXYOLODetect:
+    """
+    ONNX Runtime으로 YOLO 추론을 수행하는 클래스.
+    PyTorch를 import하지 않으므로 CPU 노드에서 로드/추론이 빠르다.
+    detect_objects 결과 형태는 YOLODetect와 같다.
+    """
+    def __init__(self, onnx_path:str, confidence_threshold:float=0.5, iou_threshold:float=0.45,
+                 providers:list=None, num_threads:int=None):
+        """
+        :param onnx_path: export_onnx로 만든 ONNX 모델 경로
+        :param providers: ONNX Runtime execution provider 목록 (ex. ["OpenVINOExecutionProvider", "CPUExecutionProvider"])
+        :param num_threads: intra-op 스레드 수 (None이면 ONNX Runtime 기본값)
+        """
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(onnx_path,
+                                            sess_options=options,
+                                            providers=providers if providers else ["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        shape = model_input.shape
+        self.input_size = (shape[2], shape[3]) if isinstance(shape[2], int) and isinstance(shape[3], int) else (640, 640)
+        self.confidence_threshold = confidence_threshold
+        self.iou_threshold = iou_threshold
+        # ultralytics가 export할 때 metadata에 class 이름을 dict 문자열로 넣어둔다
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata["names"]) if "names" in metadata else {}
+
+    def detect_objects(self, image_path) -> list:
+        image = cv2.imread(image_path)
+        if image is None:
+            raise FileNotFoundError(image_path)
+        return self.detect_image(image)
+
+    def detect_image(self, image:np.ndarray) -> list:
+        blob, ratio, (pad_w, pad_h) = letterbox(image, self.input_size)
+        # 출력 형태 (1, 4 + class 수, 후보 수) -> (후보 수, 4 + class 수)
+        output = self.session.run(None, {self.input_name: blob})[0][0].T
+        class_scores = output[:, 4:]
+        class_ids = class_scores.argmax(axis=1)
+        confidences = class_scores[np.arange(len(class_ids)), class_ids]
+        keep = confidences >= self.confidence_threshold
+        if not keep.any():
+            return []
+        boxes, class_ids, confidences = output[keep, :4], class_ids[keep], confidences[keep]
+
+        # (cx, cy, w, h) -> 원본 이미지 좌표의 (x1, y1, x2, y2)
+        h, w = image.shape[:2]
+        x1 = np.clip((boxes[:, 0] - boxes[:, 2] / 2 - pad_w) / ratio, 0, w)
+        y1 = np.clip((boxes[:, 1] - boxes[:, 3] / 2 - pad_h) / ratio, 0, h)
+        x2 = np.clip((boxes[:, 0] + boxes[:, 2] / 2 - pad_w) / ratio, 0, w)
+        y2 = np.clip((boxes[:, 1] + boxes[:, 3] / 2 - pad_h) / ratio, 0, h)
+
+        # class별 NMS - class마다 좌표를 떨어뜨려서 NMS 한 번으로 처리
+        offset = class_ids * float(max(w, h) + 1)
+        nms_boxes = np.stack([x1 + offset, y1 + offset, x2 - x1, y2 - y1], axis=1)
+        indices = cv2.dnn.NMSBoxes(nms_boxes.tolist(), confidences.tolist(),
+                                   self.confidence_threshold, self.iou_threshold)
+        detected_objects = []
+        for i in np.array(indices).flatten():
+            detected_objects.append({
+                "object_name": self.names.get(int(class_ids[i]), str(int(class_ids[i]))),
+                "confidence": round(float(confidences[i]), 2),
+                "bounding_box": {
+                    "x1": round(float(x1[i]), 2),
+                    "y1": round(float(y1[i]), 2),
+                    "x2": round(float(x2[i]), 2),
+                    "y2": round(float(y2[i]), 2)
+                }
+            })
+        return detected_objects
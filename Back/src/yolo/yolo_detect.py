@@ -1,28 +1,128 @@
-from ultralytics import YOLO
 import cv2
+import hashlib
 import json
+import os
+import numpy as np
+from .detect_cache import DetectCache
 
 class YOLODetect:
-    def __init__(self, model_path="yolo\\yolo11n.pt", confidence_threshold=0.5):
+    def __init__(self, model_path="yolo\\yolo11n.pt", confidence_threshold=0.5,
+                 backend="torch", int8=False, onnx_path=None, calibration_dir=None, providers=None,
+                 cache:DetectCache=None):
         """
         YOLO 객체 탐지 클래스
         :param model_path: 사용할 YOLO 모델 경로
         :param confidence_threshold: 객체 탐지 임계값
+        :param backend: "torch" 또는 "onnx". onnx는 처음 한 번 모델을 ONNX로 변환해두고 ONNX Runtime으로 추론
+        :param int8: onnx 백엔드에서 int8 양자화 모델 사용 여부
+        :param onnx_path: ONNX 모델 경로. 없으면 model_path 옆에 만든다
+        :param calibration_dir: int8 정적 양자화에 사용할 이미지 폴더
+        :param providers: ONNX Runtime execution provider 목록
+        :param cache: 탐지 결과 캐시. 같은 이미지 + 모델 버전 + 임계값이면 추론을 건너뜀
+        onnx 백엔드 준비/추론에 실패하면 PyTorch로 대체한다.
         """
-        self.model = YOLO(model_path)
+        self.model_path = model_path
         self.confidence_threshold = confidence_threshold
+        self.model = None
+        self.onnx_model = None
+        self.onnx_path = None
+        self.cache = cache
+        self.model_versions = {}
+        self.backend = "torch"
+        if backend == "onnx":
+            try:
+                self.onnx_model = self.load_onnx(int8=int8,
+                                                 onnx_path=onnx_path,
+                                                 calibration_dir=calibration_dir,
+                                                 providers=providers)
+                self.backend = "onnx"
+            except Exception as e:
+                print(f"ONNX 백엔드 준비 실패, PyTorch로 대체합니다 : {e}")
+        if self.onnx_model is None:
+            self.load_torch()
+
+    def load_torch(self):
+        # ultralytics(PyTorch)는 import가 무거우므로 필요할 때만 불러오기
+        from ultralytics import YOLO
+        self.model = YOLO(self.model_path)
+        return self.model
+
+    def load_onnx(self, int8=False, onnx_path=None, calibration_dir=None, providers=None):
+        from .onnx_detect import ONNXYOLODetect, export_onnx
+        if not onnx_path:
+            onnx_path = os.path.splitext(self.model_path)[0] + (".int8.onnx" if int8 else ".onnx")
+        if not os.path.exists(onnx_path):
+            print(f"ONNX 모델 변환 중 : {onnx_path}")
+            export_onnx(self.model_path, onnx_path, int8=int8, calibration_dir=calibration_dir)
+        self.onnx_path = onnx_path
+        return ONNXYOLODetect(onnx_path,
+                              confidence_threshold=self.confidence_threshold,
+                              providers=providers)
+
+    def model_version(self) -> str:
+        """
+        현재 추론에 쓰는 모델의 버전 문자열 (백엔드 + 모델 파일 해시).
+        모델 파일이 바뀌거나 백엔드가 바뀌면 캐시 key도 바뀐다.
+        """
+        path = self.onnx_path if self.onnx_model is not None else self.model_path
+        if path not in self.model_versions:
+            digest = "unknown"
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()[:16]
+            self.model_versions[path] = f"{self.backend}:{os.path.basename(path)}:{digest}"
+        return self.model_versions[path]
 
     def detect_objects(self, image_path) -> list:
         """
         이미지에서 객체를 탐지하고 JSON 형식으로 반환
+        캐시가 있으면 같은 이미지는 추론 없이 캐시된 결과 반환
         :param image_path: 처리할 이미지 파일 경로
         :return: 탐지된 객체 목록 (JSON 형식)
         """
-        image = cv2.imread(image_path)
+        image_bytes = None
+        if os.path.exists(image_path):
+            with open(image_path, "rb") as f:
+                image_bytes = f.read()
+        image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR) if image_bytes else None
         if image is None:
             print(f"오류: '{image_path}' 이미지를 찾을 수 없습니다.")
             return json.dumps({"error": "Image not found"}, indent=4)
 
+        if self.cache is None:
+            return self.detect_image(image)
+
+        image_hash = hashlib.sha256(image_bytes).hexdigest()
+        model_version = self.model_version()
+        key = self.cache.make_key(image_hash, model_version, self.confidence_threshold)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        detected_objects = self.detect_image(image)
+        # 추론 도중 torch로 대체됐으면 key의 모델 버전과 달라졌으므로 저장하지 않음
+        if self.model_version() == model_version:
+            self.cache.put(key, detected_objects,
+                           image_hash=image_hash,
+                           model_version=model_version,
+                           confidence_threshold=self.confidence_threshold)
+        return detected_objects
+
+    def detect_image(self, image) -> list:
+        """
+        cv2로 읽은 이미지에서 현재 백엔드로 객체 탐지
+        """
+        if self.onnx_model is not None:
+            try:
+                return self.onnx_model.detect_image(image)
+            except Exception as e:
+                print(f"ONNX 추론 실패, PyTorch로 대체합니다 : {e}")
+                self.onnx_model = None
+                self.backend = "torch"
+        if self.model is None:
+            self.load_torch()
+        return self.detect_with_torch(image)
+
+    def detect_with_torch(self, image) -> list:
         # 객체 탐지 수행
         results = self.model(image)
 
@@ -7,9 +7,11 @@ sys.path.append(str(project_root))
 print(project_root)
 
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from router import index, profile, progress
+from router import index, profile, progress, cache
+from utils.get_data import getData
 
 """
 페이지 흐름
@@ -22,7 +24,14 @@ home
     ->progress/{id} : 대화 세션 상세정보
 """
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app:FastAPI):
+    # Back 서버 호출용 httpx.AsyncClient를 서버 실행 동안 하나만 만들어서 연결 재사용
+    await getData.start()
+    yield
+    await getData.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # staticFiles 관리하기
 app.mount("/static", StaticFiles(directory="static"), name="static") 
@@ -56,6 +65,10 @@ progress
         progress_create_page() : 세션 생성 페이지
     post /progress/create
         progress_create_request(type, topic, participants) : 세션 생성 요청 페이지
+
+cache
+    post /cache/invalidate
+        invalidate_cache(event, ids) : Back 변경 이벤트를 받아 조회 캐시 비우기
     
 
 """
@@ -65,6 +78,8 @@ app.include_router(index.router)
 app.include_router(profile.router)
 #progress
 app.include_router(progress.router)
+#cache
+app.include_router(cache.router)
 
 # 실행 코드
 # python -m uvicorn main:app --host 0.0.0.0 --port 8001 --reload
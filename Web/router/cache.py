@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Header, HTTPException
+from schema.schema import CacheInvalidateRequestData
+from utils.get_data import getData
+
+router = APIRouter()
+
+"""
+post /cache/invalidate
+    invalidate_cache(event, ids) : Back 변경 이벤트(EventPublisher)를 받아 조회 캐시 비우기
+get /cache/stats
+    cache_stats() : 캐시 항목 수, hit/miss
+"""
+
+@router.post("/cache/invalidate")
+async def invalidate_cache(request_data:CacheInvalidateRequestData, x_cache_token:str = Header(None)):
+    if getData.CACHE_TOKEN and x_cache_token != getData.CACHE_TOKEN:
+        raise HTTPException(status_code=403, detail="invalid cache token")
+    getData.invalidate(request_data.event, request_data.ids)
+    return {"result":True}
+
+@router.get("/cache/stats")
+async def cache_stats():
+    return getData.read_cache.stats()
@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Request, UploadFile, File, Query
 from fastapi.responses import FileResponse
 from fastapi.templating import Jinja2Templates
-import httpx
 from schema.schema import ProfileCreateRequestData
 import os
 from utils.get_data import getData
@@ -26,50 +25,40 @@ profile
 #profile 페이지
 @router.get("/profile")
 async def profile_page(request:Request):
-    profiles = getData.get_profile_list()
+    profiles = await getData.get_profile_list()
     return templates.TemplateResponse("profile/list.html", {"request":request, "profiles":profiles})
 
 #profile 상세보기
 @router.get("/profile/detail")
 async def get_profile_detail(request:Request, id:str = Query(...)):
-    profile = getData.get_profile_detail(id)
+    profile = await getData.get_profile_detail(id)
     return templates.TemplateResponse("profile/detail.html", {"request":request, "profile":profile})
 
 # profile 만들기 페이지
 @router.get("/profile/create")
 async def profile_create_page(request:Request):
-    ai_list = getData.get_ai_list()
+    ai_list = await getData.get_ai_list()
     return templates.TemplateResponse("profile/create.html",{"request":request, "ai_list":ai_list})
 
 #profile 만들기 요청
 @router.post("/profile/create")
 async def profile_create_request(request_data:ProfileCreateRequestData):
-    url = f"{getData.PROGRESS_SERVER}/profile/create"
-    headers = {"Content-Type": "application/json"}
-    with httpx.Client() as client:
-        response = client.post(
-            timeout=60.0,
-            url=url,
-            headers=headers,
-            json=request_data.model_dump()
-        )
-    return response.json()
+    result = await getData.post_json("/profile/create", "create", json=request_data.model_dump())
+    getData.invalidate("profile")
+    return result
 
 #profile의 객체 탐지
 @router.post("/profile/objectdetect")
 async def object_detect_request(image:UploadFile = File(...)):
-    url = f"{getData.PROGRESS_SERVER}/profile/objectdetect"
-    with httpx.Client() as client:
-        response = client.post(
-            url, files = {"file":(image.filename, image.file, image.content_type)}
-        )
-    return response.json()
+    content = await image.read()
+    return await getData.post_json("/profile/objectdetect", "detect",
+                                   files = {"file":(image.filename, content, image.content_type)})
 
 
 
 @router.get("/profile/image/{filename}")
-def get_image(filename:str):
-    return getData.img_filename_to_file(filename)
+def get_image(request:Request, filename:str, variant:str = Query("original")):
+    return getData.img_filename_to_file(filename, variant, request.headers.get("if-none-match"))
 
     # profile_img_path = "static/image/profile"
     # realpath = os.path.abspath(profile_img_path)
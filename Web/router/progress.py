@@ -1,8 +1,6 @@
-from fastapi import APIRouter, Request, UploadFile, File, Form
+from fastapi import APIRouter, Request, UploadFile, File, Form, Query
 from fastapi.templating import Jinja2Templates
-import httpx
 from utils.get_data import getData
-from common_data import PROGRESS_SERVER, get_profile_list
 from schema.schema import ProgressCreateRequestData
 import re
 
@@ -23,46 +21,40 @@ post /progress/create
 
 @router.get("/progress")
 async def progress_page(request:Request):
-    progress_list = getData.get_progress_list()
+    progress_list = await getData.get_progress_list()
     return templates.TemplateResponse("/progress/list.html", {"request":request, "progress":progress_list})
 
 @router.get("/progress/detail")
 async def progress_detail(request:Request, id:str):
-    progress = getData.get_progress_detail(id)
+    progress = await getData.get_progress_detail(id)
     return templates.TemplateResponse("progress/detail.html", {"request":request,"progress":progress})
 
 @router.get("/progress/data")
-async def progress_data(request:Request, id:str):
-    progress = getData.get_progress_detail(id)
+async def progress_data(request:Request, id:str, since:int = Query(None, ge=0)):
+    # since가 있으면 since번째 이후 발언만 반환
+    progress = await getData.get_progress_detail(id, since)
     return progress
 
 
 
 
 @router.get("/progress/autogenerate")
-async def progress_auto_generate(request:Request, topic:str=None):
-    url = f"{PROGRESS_SERVER}/progress/autogenerate"
-    if topic:
-        url += f"?topic={topic}"
-    with httpx.Client() as client:
-        response = client.get(url=url)
-    return response.json()
+async def progress_auto_generate(request:Request, topic:str=None, format:str=None, max_concurrent:int=None,
+                                 budget_tokens:int=None, double:bool=None):
+    # 지정한 값만 Back으로 넘김 (나머지는 Back config 기본값)
+    params = {key: value for key, value in {"topic":topic, "format":format, "max_concurrent":max_concurrent,
+                                            "budget_tokens":budget_tokens, "double":double}.items()
+              if value is not None} or None
+    return await getData.get_json("/progress/autogenerate", "create", params=params)
 
 @router.get("/progress/create")
 async def progress_create_page(request:Request):
-    profiles = get_profile_list()
+    profiles = await getData.get_profile_list()
     return templates.TemplateResponse("progress/create.html", {"request":request, "profiles":profiles})
 
 @router.post("/progress/create")
 async def progress_create_request(progressData:ProgressCreateRequestData):
-    url = f"{PROGRESS_SERVER}/progress/create"
     print(progressData.model_dump())
-    with httpx.Client() as client:
-        response = client.post(
-            timeout=60.0,
-            url=url,
-            headers = {"Content-Type": "application/json"},
-            json=progressData.model_dump()
-        )
-        print(response)
-    return response.json()
\ No newline at end of file
+    result = await getData.post_json("/progress/create", "create", json=progressData.model_dump())
+    getData.invalidate("progress")
+    return result
\ No newline at end of file
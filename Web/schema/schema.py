@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Dict
+from typing import Dict, List
 
 class ProfileCreateRequestData(BaseModel):
     selected_object:str
@@ -11,3 +11,7 @@ class ProgressCreateRequestData(BaseModel):
     topic:str
     participants:Dict[str, dict]
 
+class CacheInvalidateRequestData(BaseModel):
+    event:str
+    ids:List[str] = []
+
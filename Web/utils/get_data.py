@@ -1,71 +1,172 @@
 import httpx
 from dotenv import load_dotenv
+import asyncio
 import os
 from utils.mongodb_connection import MongoDBConnection
 from utils.image_manager import ImageManager
+from utils.image_store import ImageStore
+from utils.image_cache import ImageCache
+from utils.log_renderer import render_logs
+from utils.read_model_cache import ReadModelCache
+from utils.progress_archiver import ProgressArchiver
 from fastapi.responses import FileResponse
 import base64
-import re
-from datetime import datetime
+import itertools
+from bson.objectid import ObjectId
+
+ARCHIVE_COLLECTION = ProgressArchiver.COLLECTION
 
 class GetData():
+    # Back 서버 호출 종류별 timeout(초). 생성 요청은 LLM 호출이 끼어 있어서 길게 잡는다
+    TIMEOUTS = {
+        "default": 10.0,
+        "create": 60.0,
+        "detect": 30.0,
+    }
+    CONNECT_TIMEOUT = 5.0
+    PROGRESS_LIST_PROJECTION = {"topic": 1, "type": 1, "status": 1, "participants": 1, "result": 1}
+    MAX_LOG_SLICE = 100000  # since 조회에서 한 번에 가져올 최대 debate_log 개수
+    # 조회 결과 캐시 TTL(초). Back 변경 이벤트가 오면 TTL 전에도 비워진다
+    CACHE_TTLS = {
+        "ai_list": 3600.0,
+        "profile_list": 300.0,
+        "profile_detail": 300.0,
+        "progress_list": 10.0,
+    }
+    # Back 이벤트 종류 -> 비울 캐시 목록 (progress가 끝나면 프로필 전적도 바뀜)
+    EVENT_MODELS = {
+        "ai": ["ai_list"],
+        "profile": ["profile_list", "profile_detail"],
+        "progress": ["progress_list", "profile_list", "profile_detail"],
+    }
+
     def __init__(self):
         load_dotenv()
         self.PROGRESS_SERVER = os.getenv("PROGRESS_SERVER")
         if not self.PROGRESS_SERVER:
             self.PROGRESS_SERVER = "127.0.0.1:8000"
 
+        self.client = None  # start()에서 만드는 app 전체 공용 httpx.AsyncClient
+        self.read_cache = ReadModelCache(self.CACHE_TTLS)
+        self.CACHE_TOKEN = os.getenv("CACHE_TOKEN")  # Back EventPublisher와 같은 값이면 invalidate 허용
         self.mongodb_connection = None
         self.image_manager = None
+        self.archiver = None  # 보관(progress_archive)된 토론 읽기
         mongoUri = os.getenv("MONGO_URI")
         mongoDBName = os.getenv("DB_NAME")
 
         self.IMAGE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../static/image"))
         self.PROFILE_IMG_PATH = os.path.join(self.IMAGE_PATH, "profile")
+        os.makedirs(self.PROFILE_IMG_PATH, exist_ok=True)
+        self.image_store = ImageStore(self.PROFILE_IMG_PATH)
+        self.image_cache = ImageCache(self.image_store)
         
         if mongoUri and mongoDBName:
             self.mongodb_connection = MongoDBConnection(mongoUri, mongoDBName)
             self.image_manager = ImageManager(self.mongodb_connection,
                                         self.PROFILE_IMG_PATH)
+            self.archiver = ProgressArchiver(self.mongodb_connection)
         else:
             print(".env에 MONGO_URI, DB_NAME 설정 필요")
 
+    async def start(self, max_connections:int=100, max_keepalive_connections:int=20):
+        """
+        Back 서버 호출에 쓰는 httpx.AsyncClient 생성. (main.py lifespan에서 호출)
+        연결을 keep-alive로 재사용하고, h2가 설치되어 있으면 HTTP/2 사용
+        """
+        if self.client:
+            return
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+        self.client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_keepalive_connections),
+            timeout=self.timeout("default"),
+        )
+
+    async def close(self):
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    def timeout(self, kind:str="default") -> httpx.Timeout:
+        return httpx.Timeout(self.TIMEOUTS.get(kind, self.TIMEOUTS["default"]), connect=self.CONNECT_TIMEOUT)
+
+    async def request(self, method:str, path:str, kind:str="default", **kwargs) -> httpx.Response:
+        """
+        공용 client로 Back 서버(PROGRESS_SERVER)에 요청
+        :param path: "/profile/list" 처럼 PROGRESS_SERVER 뒤에 붙는 경로
+        :param kind: TIMEOUTS의 key
+        """
+        if not self.client:
+            await self.start()
+        return await self.client.request(method, f"{self.PROGRESS_SERVER}{path}",
+                                         timeout=self.timeout(kind), **kwargs)
+
+    async def get_json(self, path:str, kind:str="default", **kwargs):
+        response = await self.request("GET", path, kind, **kwargs)
+        return response.json()
+
+    async def post_json(self, path:str, kind:str="default", **kwargs):
+        response = await self.request("POST", path, kind, **kwargs)
+        return response.json()
+
+    def invalidate(self, event:str, ids:list=None):
+        """
+        Back에서 온 변경 이벤트로 관련 캐시 비우기
+        ids는 event 종류의 id라서 같은 종류의 detail(ex. profile -> profile_detail)에만 key로 씀.
+        다른 종류(ex. progress가 끝나서 바뀐 profile_detail)는 어느 프로필인지 모르므로 전체를 비움
+        """
+        for name in self.EVENT_MODELS.get(event, []):
+            if ids and name == f"{event}_detail":
+                for id in ids:
+                    self.read_cache.invalidate(name, id)
+            else:
+                self.read_cache.invalidate(name)
+
+    async def get_profile_list(self) -> dict:
+        return await self.read_cache.get("profile_list", self.load_profile_list)
 
-    def get_profile_list(self) -> dict:
+    async def load_profile_list(self) -> dict:
         # mongodb_connection 없는 경우
         if not self.mongodb_connection:
-            url = f"{self.PROGRESS_SERVER}/profile/list"
-            with httpx.Client() as client:
-                response = client.get(url = url)
-            return response.json()
-        else:
-            #image를 id에서 파일로 고쳐서 반환해야함
-            obj_all = self.mongodb_connection.select_data_from_query("object")
-            result = {str(obj["_id"]) : {key : value for key, value in obj.items()}
-                for obj in obj_all}
-            for id, obj in result.items():
-                img_id = obj.get("img")
-                result[id]["stats"] = self.get_stats_by_id(self.mongodb_connection.get_collection("progress"), id)
-                if img_id:
-                    img_filename = self.img_id_to_filename(str(img_id))
-                    result[id]["img"] = img_filename
-            return result
-    
-    def get_profile_detail(self, id:str):
-        if not self.mongodb_connection:
-            url = f"{self.PROGRESS_SERVER}/profile/detail?id={id}"
-            with httpx.Client() as client:
-                response = client.get(url=url)
-            return response.json()
-        else:
-            profile = self.mongodb_connection.select_data_from_id("object",id)
-            profile["_id"] = id
-            img_id = profile.get("img")
-            profile["stats"] = self.get_stats_by_id(self.mongodb_connection.get_collection("progress"), id)
+            return await self.get_json("/profile/list")
+        # pymongo 호출은 event loop를 막지 않게 스레드에서 실행
+        return await asyncio.to_thread(self.get_profile_list_from_db)
+
+    def get_profile_list_from_db(self) -> dict:
+        #image를 id에서 파일로 고쳐서 반환해야함
+        result = {str(obj["_id"]) : {key : value for key, value in obj.items()}
+            for obj in self.mongodb_connection.iter_data_from_query("object")}
+        for id, obj in result.items():
+            img_id = obj.get("img")
+            result[id]["stats"] = self.get_stats_by_id(self.mongodb_connection.get_collection("progress"), id)
             if img_id:
                 img_filename = self.img_id_to_filename(str(img_id))
-                profile["img"] = img_filename
-            return profile
+                result[id]["img"] = img_filename
+        return result
+    
+    async def get_profile_detail(self, id:str):
+        return await self.read_cache.get("profile_detail", lambda: self.load_profile_detail(id), key=id)
+
+    async def load_profile_detail(self, id:str):
+        if not self.mongodb_connection:
+            return await self.get_json("/profile/detail", params={"id":id})
+        return await asyncio.to_thread(self.get_profile_detail_from_db, id)
+
+    def get_profile_detail_from_db(self, id:str):
+        profile = self.mongodb_connection.select_data_from_id("object",id)
+        profile["_id"] = id
+        img_id = profile.get("img")
+        profile["stats"] = self.get_stats_by_id(self.mongodb_connection.get_collection("progress"), id)
+        if img_id:
+            img_filename = self.img_id_to_filename(str(img_id))
+            profile["img"] = img_filename
+        return profile
 
     def img_id_to_filename(self, id:str) -> str:
         image_from_db = self.mongodb_connection.select_data_from_id("image", id) 
@@ -76,59 +177,120 @@ class GetData():
                 f.write(image_byte)
         return image_from_db["filename"]
 
-    def img_filename_to_file(self, image_filename:str):
-        image = os.path.join(self.PROFILE_IMG_PATH, image_filename)
-        if os.path.exists(image):
-            return FileResponse(image, media_type="image/png")
-        image_from_db = self.mongodb_connection.select_data_from_query("image",{"filename":image_filename})[0]
-        if image_from_db:
-            with open(image, "wb") as f:
-                f.write(bytes(image_from_db["data"]))
-            return FileResponse(image, media_type="image/png")
+    def img_filename_to_file(self, image_filename:str, variant:str="original", if_none_match:str=None):
+        """
+        로컬에 저장된 이미지 파일을 반환. 없으면 mongoDB에서 받아서 저장 후 반환.
+        variant(thumb, webp, thumb_webp)를 요청하면 원본으로 만들어 캐싱된 파생 이미지를 반환.
+        ETag가 같으면 304, 자주 요청되는 이미지는 메모리 캐시에서 바로 반환.
+        """
+        response = self.image_cache.response(image_filename, variant, if_none_match, self.load_image_path)
+        if response:
+            return response
         return FileResponse(os.path.join(self.IMAGE_PATH,"default.png"), media_type="image/png")
 
-    def get_ai_list(self) -> dict:
-        url = f"{self.PROGRESS_SERVER}/ai"
-        with httpx.Client() as client:
-            responce = client.get(url=url)
-        return responce.json()
+    def load_image_path(self, image_filename:str, variant:str) -> str:
+        image = os.path.join(self.PROFILE_IMG_PATH, image_filename)
+        if not os.path.exists(image) and self.mongodb_connection:
+            image_from_db = next(self.mongodb_connection.iter_data_from_query("image", {"filename":image_filename}, {"data":1}, limit=1), None)
+            if image_from_db:
+                with open(image, "wb") as f:
+                    f.write(base64.b64decode(image_from_db["data"]))
+        if not os.path.exists(image):
+            return None
+        return self.image_store.variant_path(image_filename, variant) or image
+
+    async def get_ai_list(self) -> dict:
+        return await self.read_cache.get("ai_list", lambda: self.get_json("/ai"))
 
-    def get_progress_list(self) -> dict:
+    async def get_progress_list(self) -> dict:
+        return await self.read_cache.get("progress_list", self.load_progress_list)
+
+    async def load_progress_list(self) -> dict:
         if not self.mongodb_connection:
-            url = f"{self.PROGRESS_SERVER}/progress/list"
-            with httpx.Client() as client:
-                response = client.get(url=url)
-            return response.json()
-        else:
-            progress_all = self.mongodb_connection.select_data_from_query("progress")
-            result = {str(progress["_id"]) : {key : value for key, value in progress.items()}
-                for progress in reversed(progress_all)}
-            return result
-    
+            return await self.get_json("/progress/list")
+        return await asyncio.to_thread(self.get_progress_list_from_db)
 
-    def get_progress_detail(self, id:str) -> dict:
+    def get_progress_list_from_db(self) -> dict:
+        # 목록에는 debate_log가 필요 없으므로 빼고, 최신순(_id 역순)으로 받아옴
+        progress_all = self.mongodb_connection.iter_data_from_query("progress",
+                                                                    projection=self.PROGRESS_LIST_PROJECTION,
+                                                                    sort=[("_id", -1)])
+        result = {str(progress["_id"]) : {key : value for key, value in progress.items()}
+            for progress in progress_all}
+        # 보관된 오래된 토론은 요약 문서만 뒤에 붙임
+        for progress in self.archiver.iter_summaries(self.PROGRESS_LIST_PROJECTION):
+            result.setdefault(str(progress["_id"]), progress)
+        return result
+
+    async def get_progress_detail(self, id:str, since:int=None) -> dict:
+        """
+        since가 있으면 since번째 이후 debate_log만 담아서 반환 (status, participants, log_length 포함)
+        """
         if not self.mongodb_connection:
-            url = f"{self.PROGRESS_SERVER}/progress/detail?id={id}"
-            with httpx.Client() as client:
-                response = client.get(url=url)
-            progress = response.json()
+            params = {"id":id} if since is None else {"id":id, "since":since}
+            progress = await self.get_json("/progress/detail", params=params)
+        elif since is None:
+            progress = await asyncio.to_thread(self.mongodb_connection.select_data_from_id, "progress", id)
+            if not progress:
+                progress = await asyncio.to_thread(self.archiver.load, id)
         else:
-            progress = self.mongodb_connection.select_data_from_id("progress",id)
+            progress = await asyncio.to_thread(self.get_progress_since_from_db, id, since)
         if progress:
-            progress["_id"] = str(progress["_id"])
-            for position, participant in progress["participants"].items():
-                img_id = participant.get("img")
-                if img_id:
-                    img_filename = self.img_id_to_filename(str(img_id))
-                    participant["img"] = img_filename
-            ## ** **를 굵은 글씨로 바꿔서 반환
-            for log in progress.get("debate_log"):
-                speaker = progress["participants"].get(log["speaker"])
-                if speaker:
-                    log["name"] = speaker['name']
-                log["message"] = format_to_bold(log["message"])
-                log["timestamp"] = format_datetime(str(log["timestamp"]))
+            # 이미지 파일 복원(mongoDB 조회, 파일 쓰기)도 스레드에서
+            await asyncio.to_thread(self.format_progress, progress)
+        return progress
+
+    def get_progress_since_from_db(self, id:str, since:int) -> dict:
+        """
+        debate_log 전체를 받아오지 않고 DB에서 since 이후만 잘라서 가져옴
+        """
+        found = list(self.mongodb_connection.get_collection("progress").aggregate([
+            {"$match": {"_id": ObjectId(id)}},
+            {"$project": {
+                "status": 1,
+                "participants": 1,
+                "log_length": {"$size": {"$ifNull": ["$debate_log", []]}},
+                "debate_log": {"$slice": [{"$ifNull": ["$debate_log", []]}, since, self.MAX_LOG_SLICE]},
+            }},
+        ]))
+        if found:
+            progress = found[0]
+        else:
+            # 보관된 토론이면 압축을 풀어서 잘라줌 (종료된 토론이라 한 번만 요청됨)
+            progress = self.archiver.load(id)
+            if not progress:
+                return {}
+            debate_log = progress.get("debate_log") or []
+            progress["log_length"] = len(debate_log)
+            progress["debate_log"] = debate_log[since:]
+        progress["since"] = since
         return progress
+
+    def format_progress(self, progress:dict):
+        progress["_id"] = str(progress["_id"])
+        for position, participant in progress["participants"].items():
+            img_id = participant.get("img")
+            if img_id:
+                img_filename = self.img_id_to_filename(str(img_id))
+                participant["img"] = img_filename
+        ## 저장할 때 만들어둔 rendered(HTML 변환 메시지, 표시 시간)를 그대로 사용
+        ## 예전 문서라 rendered가 없으면 여기서 만들고 DB에 채워 넣음
+        debate_log = progress.get("debate_log") or []
+        missing = render_logs(debate_log)
+        if missing and self.mongodb_connection:
+            offset = progress.get("since") or 0
+            try:
+                self.mongodb_connection.get_collection("progress").update_one(
+                    {"_id": ObjectId(progress["_id"])},
+                    {"$set": {f"debate_log.{offset + index}.rendered": debate_log[index]["rendered"] for index in missing}})
+            except Exception as e:
+                print(f"rendered 저장 실패 : {e}")
+        for log in debate_log:
+            speaker = progress["participants"].get(log["speaker"])
+            if speaker:
+                log["name"] = speaker['name']
+            log["message"] = log["rendered"]["message"]
+            log["timestamp"] = log["rendered"]["timestamp"]
     
     
     # 특정 이름의 ID를 조회하는 헬퍼 함수
@@ -138,15 +300,17 @@ class GetData():
         - participants.pos.name 또는 participants.neg.name에서 이름 검색
         - 중복 이름이 없다고 가정하고 첫 번째 매칭 결과 반환
         """
-        # pos에서 이름 검색
-        pos_result = collection.find_one({"participants.pos.id": target_id})
-        if pos_result:
-            return pos_result["participants"]["pos"]["name"]
+        # 보관(progress_archive)된 토론도 같은 모양의 participants를 가지고 있으므로 같이 검색
+        for target_collection in (collection, collection.database[ARCHIVE_COLLECTION]):
+            # pos에서 이름 검색
+            pos_result = target_collection.find_one({"participants.pos.id": target_id}, {"participants": 1})
+            if pos_result:
+                return pos_result["participants"]["pos"]["name"]
 
-        # neg에서 이름 검색
-        neg_result = collection.find_one({"participants.neg.id": target_id})
-        if neg_result:
-            return neg_result["participants"]["neg"]["name"]
+            # neg에서 이름 검색
+            neg_result = target_collection.find_one({"participants.neg.id": target_id}, {"participants": 1})
+            if neg_result:
+                return neg_result["participants"]["neg"]["name"]
 
         return None  # 이름에 해당하는 ID를 찾지 못한 경우
 
@@ -169,13 +333,16 @@ class GetData():
                 "message": f"No participant found with name: {target_name}"
             }
 
-        # 해당 사용자가 pos 또는 neg로 참여한 모든 문서를 찾음
-        cursor = collection.find({
+        # 해당 사용자가 pos 또는 neg로 참여한 모든 문서를 찾음 (보관된 토론 요약 포함)
+        query = {
             "$or": [
                 {"participants.pos.id": target_id},
                 {"participants.neg.id": target_id}
             ]
-        })
+        }
+        projection = {"participants": 1, "result": 1, "score": 1}
+        cursor = itertools.chain(collection.find(query, projection),
+                                 collection.database[ARCHIVE_COLLECTION].find(query, projection))
 
         total_debates = 0
         wins = 0
@@ -258,36 +425,4 @@ class GetData():
             "avg_persuasion": int(avg_persuasion)
         }
 
-def format_to_bold(text:str) -> str:
-    """
-    **굵은 글씨**를 <strong>굵은글씨</strong>으로 바꿔주는 함수
-    짝이 맞지 않는 경우 마지막에 ** 추가.
-    """
-    count = text.count("**")
-    if count % 2 != 0:
-        text += "**"  # 강제로 닫는 태그 추가
-    return re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', text)
-
-def format_datetime(timestamp: str) -> str:
-    """ 년-월-일 시:분:초.밀리초 또는 년-월-일T시:분:초.밀리초Z 형식을 변환 """
-    try:
-        # ISO 형식인지 확인 (T 포함 여부)
-        if "T" in timestamp:
-            if "." in timestamp:
-                dt = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%fZ")
-            else:
-                dt = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%SZ")
-        else:
-            if "." in timestamp:
-                dt = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S.%f")
-            else:
-                dt = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
-
-        return dt.strftime("%Y-%m-%d %H:%M:%S")  # 밀리초 제거 후 변환
-    except ValueError:
-        print(f"Invalid timestamp format: {timestamp}")
-        return timestamp  # 에러 발생 시 원본 반환
-    
-    
-    
 getData = GetData()
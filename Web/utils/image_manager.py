@@ -1,6 +1,8 @@
 import base64
+import io
 from fastapi import UploadFile, File
 from .mongodb_connection import MongoDBConnection
+from .image_store import ImageStore
 from datetime import datetime
 import shutil
 import os
@@ -10,20 +12,29 @@ class ImageManager:
     def __init__(self, db:MongoDBConnection, img_path:str):
         self.db = db
         self.img_path = img_path
+        # 해시 이름 기반 로컬 저장소 - 중복 제거 + 썸네일/webp 생성
+        self.image_store = ImageStore(img_path)
     
 
     def save_image_in_mongoDB_from_local(self, image_name:str) -> dict:
         """
         image_name과 self.img_path를 조합해서 저장된 이미지를 mongoDB에 올리기기
+        같은 이미지(sha256)가 이미 올라가 있으면 새로 올리지 않고 기존 id 반환
         {"result": "success" or "error", "file_id":mongoDB에 업로드된 ID}
         """
         full_path = os.path.join(self.img_path, image_name)
         if not os.path.exists(full_path):
             return {"result":"error"}
         with open(full_path, "rb") as image_file:
-            encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
+            image_bytes = image_file.read()
 
-        image_data = {"filename" : f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{image_name}", "data": encoded_string}
+        digest = self.image_store.hash_bytes(image_bytes)
+        duplicated = self.db.select_data_from_query('image', {"sha256": digest})
+        if duplicated:
+            return {"result":"success", "file_id": str(duplicated[0]["_id"])}
+
+        encoded_string = base64.b64encode(image_bytes).decode('utf-8')
+        image_data = {"filename" : self.image_store.filename_of(digest), "sha256": digest, "data": encoded_string}
         result = self.db.insert_data('image', image_data)
         return {"result":"success", "file_id": str(result)}
 
@@ -35,20 +46,22 @@ class ImageManager:
                 return {"error": "File not found"}
             
             image = base64.b64decode(image_data["data"])
-            with open(f"{self.img_path}\\{image_data['filename']}", "wb") as file:
+            save_path = os.path.join(self.img_path, image_data['filename'])
+            with open(save_path, "wb") as file:
                 file.write(image)
-            return {"result":True, "data": f"{self.img_path}\\{image_data['filename']}"}
+            return {"result":True, "data": save_path}
         
         except Exception as e:
             return {"result":False, "data":e}
         
     def save_image_in_local_from_form(self, file:UploadFile=File(...)) -> dict:
-        new_filename = f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{file.filename}.png"
-        save_path = f"{self.img_path}\\{new_filename}"
+        """
+        form으로 받은 이미지를 해시 이름으로 저장.
+        같은 사진을 여러 번 올려도 파일은 하나만 남는다.
+        """
         try:
-            with open(save_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-
+            new_filename = self.image_store.save(file.file.read())
+            save_path = os.path.join(self.img_path, new_filename)
             return {"result":True, "data":save_path, "filename":new_filename}
         except Exception as e:
             print(e)
@@ -56,18 +69,16 @@ class ImageManager:
         
     def crop_image(self, image_path:str, data:dict) -> str:
         """
-        로컬의 이미지를 잘라서 저장하고 자른 이미지파일 경로 반환
-        
+        로컬의 이미지를 잘라서 저장하고 자른 이미지파일 이름 반환
+        잘라낸 이미지도 해시 이름으로 저장되므로 같은 crop은 중복 저장되지 않음
         """
-        image_name = image_path.split("\\")[-1]
-        target_image = Image.open(image_path)
-        bbox = data["bounding_box"]
-        x1 = int(bbox["x1"])
-        x2 = int(bbox["x2"])
-        y1 = int(bbox["y1"])
-        y2 = int(bbox["y2"])
-        cropped_image = target_image.crop((x1, y1, x2, y2))
-        cropped_image_name = f"cropped_{data['object_name']}_{image_name}"
-        cropped_image_path = os.path.join(self.img_path, cropped_image_name)
-        cropped_image.save(cropped_image_path)
-        return cropped_image_name
\ No newline at end of file
+        with Image.open(image_path) as target_image:
+            bbox = data["bounding_box"]
+            x1 = int(bbox["x1"])
+            x2 = int(bbox["x2"])
+            y1 = int(bbox["y1"])
+            y2 = int(bbox["y2"])
+            cropped_image = target_image.crop((x1, y1, x2, y2))
+            buffer = io.BytesIO()
+            cropped_image.save(buffer, format="PNG")
+        return self.image_store.save(buffer.getvalue())
@@ -0,0 +1,114 @@
+import hashlib
+import io
+import os
+from PIL import Image
+
+class ImageStore:
+    """
+    이미지 내용의 sha256 해시를 파일 이름으로 사용하는 로컬 이미지 저장소.
+    - 같은 이미지는 한 번만 저장된다 (중복 제거)
+    - 저장 시점에 썸네일, webp 등 파생 이미지(variant)를 미리 만들어 둔다
+    - 해시 이름이 아닌 예전 파일도 요청 시점에 variant를 만들어서 캐싱한다
+    """
+    # variant 이름 : (최대 변 길이 - None이면 원본 크기, 저장 포맷)
+    VARIANTS = {
+        "original"  : (None, None),
+        "thumb"     : (128, "PNG"),
+        "webp"      : (None, "WEBP"),
+        "thumb_webp": (128, "WEBP"),
+    }
+    MEDIA_TYPES = {".png": "image/png", ".webp": "image/webp"}
+
+    def __init__(self, img_path:str):
+        self.img_path = img_path
+
+    @staticmethod
+    def hash_bytes(data:bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def filename_of(digest:str) -> str:
+        """해시값으로 원본 파일 이름 만들기"""
+        return f"{digest}.png"
+
+    @staticmethod
+    def digest_of(filename:str) -> str:
+        """
+        파일 이름에서 해시값 꺼내기. 해시 이름이 아니면 None 반환
+        """
+        stem = os.path.splitext(os.path.basename(filename))[0]
+        if len(stem) == 64 and all(c in "0123456789abcdef" for c in stem):
+            return stem
+        return None
+
+    def variant_filename(self, filename:str, variant:str) -> str:
+        """
+        원본 파일 이름과 variant로 파생 이미지 파일 이름 만들기
+        ex) abc.png + thumb_webp -> abc_thumb.webp
+        """
+        size, image_format = self.VARIANTS.get(variant, (None, None))
+        if image_format is None:
+            return filename
+        stem = os.path.splitext(filename)[0]
+        suffix = "_thumb" if size else ""
+        return f"{stem}{suffix}.{image_format.lower()}"
+
+    def media_type(self, filename:str) -> str:
+        return self.MEDIA_TYPES.get(os.path.splitext(filename)[1].lower(), "image/png")
+
+    def save(self, data:bytes) -> str:
+        """
+        이미지 bytes를 해시 이름으로 저장하고 파일 이름 반환.
+        이미 같은 이미지가 있으면 다시 쓰지 않는다.
+        """
+        filename = self.filename_of(self.hash_bytes(data))
+        full_path = os.path.join(self.img_path, filename)
+        if not os.path.exists(full_path):
+            # 쓰는 도중 죽어도 반쯤 쓴 파일이 남지 않도록 임시 파일에 쓰고 교체
+            temp_path = f"{full_path}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, full_path)
+        self.make_variants(filename)
+        return filename
+
+    def make_variants(self, filename:str) -> dict:
+        """
+        원본 이미지로 모든 variant를 만들어 두고 {variant: 경로} 반환
+        """
+        result = {}
+        for variant in self.VARIANTS.keys():
+            path = self.variant_path(filename, variant)
+            if path:
+                result[variant] = path
+        return result
+
+    def variant_path(self, filename:str, variant:str="original") -> str:
+        """
+        variant 이미지의 로컬 경로 반환. 없으면 원본으로 만들어서 캐싱.
+        원본도 로컬에 없으면 None 반환.
+        """
+        if variant not in self.VARIANTS:
+            variant = "original"
+        original_path = os.path.join(self.img_path, filename)
+        target_path = os.path.join(self.img_path, self.variant_filename(filename, variant))
+        if os.path.exists(target_path):
+            return target_path
+        if not os.path.exists(original_path):
+            return None
+        size, image_format = self.VARIANTS[variant]
+        try:
+            with Image.open(original_path) as image:
+                image = image.convert("RGBA")
+                if size:
+                    image.thumbnail((size, size))
+                buffer = io.BytesIO()
+                image.save(buffer, format=image_format)
+            temp_path = f"{target_path}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(buffer.getvalue())
+            os.replace(temp_path, target_path)
+            return target_path
+        except Exception as e:
+            print(f"이미지 variant 생성 실패 ({filename}, {variant}) : {e}")
+            return original_path
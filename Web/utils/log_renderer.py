@@ -0,0 +1,70 @@
+import html
+import re
+from datetime import datetime
+
+"""
+debate_log 한 줄을 화면에 보여줄 형태로 미리 바꿔두는 함수 모음.
+발언은 한 번 저장되면 바뀌지 않으므로 append할 때 한 번만 변환해서 log["rendered"]에 넣어둔다.
+rendered = {"message": HTML escape 후 **굵은 글씨**를 <strong>으로 바꾼 문자열, "timestamp": "년-월-일 시:분:초"}
+"""
+
+BOLD_PATTERN = re.compile(r'\*\*(.*?)\*\*', re.DOTALL)
+
+
+def format_to_bold(text:str) -> str:
+    """
+    **굵은 글씨**를 <strong>굵은글씨</strong>으로 바꿔주는 함수
+    짝이 맞지 않는 경우 마지막에 ** 추가.
+    """
+    count = text.count("**")
+    if count % 2 != 0:
+        text += "**"  # 강제로 닫는 태그 추가
+    return BOLD_PATTERN.sub(r'<strong>\1</strong>', text)
+
+
+def format_datetime(timestamp) -> str:
+    """ datetime 또는 년-월-일 시:분:초.밀리초 / 년-월-일T시:분:초.밀리초Z 형식을 년-월-일 시:분:초로 변환 """
+    if isinstance(timestamp, datetime):
+        return timestamp.strftime("%Y-%m-%d %H:%M:%S")
+    timestamp = str(timestamp)
+    try:
+        # ISO 형식인지 확인 (T 포함 여부)
+        if "T" in timestamp:
+            if "." in timestamp:
+                dt = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%fZ")
+            else:
+                dt = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%SZ")
+        else:
+            if "." in timestamp:
+                dt = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S.%f")
+            else:
+                dt = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+
+        return dt.strftime("%Y-%m-%d %H:%M:%S")  # 밀리초 제거 후 변환
+    except ValueError:
+        print(f"Invalid timestamp format: {timestamp}")
+        return timestamp  # 에러 발생 시 원본 반환
+
+
+def render_log(log:dict) -> dict:
+    """
+    log에 rendered가 없으면 만들어서 넣고 rendered 반환
+    """
+    if not log.get("rendered"):
+        log["rendered"] = {
+            "message": format_to_bold(html.escape(str(log.get("message", "")), quote=False)),
+            "timestamp": format_datetime(log.get("timestamp")),
+        }
+    return log["rendered"]
+
+
+def render_logs(debate_log:list) -> list:
+    """
+    rendered가 없던 로그의 index 목록 반환 (예전 문서를 나중에 채워 넣을 때 사용)
+    """
+    missing = []
+    for index, log in enumerate(debate_log):
+        if not log.get("rendered"):
+            render_log(log)
+            missing.append(index)
+    return missing
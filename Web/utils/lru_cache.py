@@ -0,0 +1,77 @@
+from collections import OrderedDict
+import threading
+
+class LRUCache:
+    """
+    크기 제한이 있는 LRU 캐시.
+    max_items(개수) 또는 max_bytes(sizeof로 계산한 용량) 중 하나라도 넘으면
+    가장 오래 사용되지 않은 항목부터 제거한다.
+    FastAPI의 sync endpoint는 threadpool에서 돌기 때문에 lock으로 보호한다.
+    """
+    def __init__(self, max_items:int=None, max_bytes:int=None, sizeof=None):
+        """
+        :param max_items: 최대 항목 수 (None이면 제한 없음)
+        :param max_bytes: 최대 용량 (None이면 제한 없음)
+        :param sizeof: 항목 값의 용량을 계산하는 함수. max_bytes를 쓸 때 필요
+        """
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof if sizeof else (lambda value: 0)
+        self.data = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.data:
+                self.misses += 1
+                return default
+            self.data.move_to_end(key)
+            self.hits += 1
+            return self.data[key]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        with self.lock:
+            # 한 항목이 전체 용량보다 크면 캐시하지 않음
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            if key in self.data:
+                self.current_bytes -= self.sizeof(self.data.pop(key))
+            self.data[key] = value
+            self.current_bytes += size
+            self._evict()
+
+    def pop(self, key, default=None):
+        with self.lock:
+            if key not in self.data:
+                return default
+            value = self.data.pop(key)
+            self.current_bytes -= self.sizeof(value)
+            return value
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.current_bytes = 0
+
+    def _evict(self):
+        while self.data and (
+            (self.max_items is not None and len(self.data) > self.max_items) or
+            (self.max_bytes is not None and self.current_bytes > self.max_bytes)):
+            _, value = self.data.popitem(last=False)
+            self.current_bytes -= self.sizeof(value)
+
+    def stats(self) -> dict:
+        return {"items": len(self.data),
+                "bytes": self.current_bytes,
+                "hits": self.hits,
+                "misses": self.misses}
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __len__(self):
+        return len(self.data)
@@ -45,6 +45,21 @@ class MongoDBConnection:
             result.append(data)
         return result
 
+    #select_data_from_query의 generator 버전. 리스트로 모으지 않고 batch_size개씩 받아오면서 하나씩 넘겨줌
+    #projection: 가져올 필드 ({"debate_log": 0} 처럼 빼기도 가능), sort: [(필드, 1 또는 -1)], limit: 0이면 제한 없음
+    def iter_data_from_query(self, collection_name:str, query:dict=None, projection:dict=None,
+                             sort:list=None, limit:int=0, batch_size:int=100):
+        cursor = self.db[collection_name].find(query or {}, projection, batch_size=batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        try:
+            for data in cursor:
+                yield data
+        finally:
+            cursor.close()
+
     #RDBMS 쿼리문에서의 Update문을 대체.
     def update_data(self, collection_name: str, data:dict):
         return self.db[collection_name].update_one({"_id":data["_id"]}, {"$set":data})
@@ -0,0 +1,99 @@
+import bson
+import zstandard
+from bson.binary import Binary
+from bson.objectid import ObjectId
+from datetime import datetime, timedelta, timezone
+
+
+class ProgressArchiver:
+    """
+    오래된 종료 토론을 progress 컬렉션에서 progress_archive 컬렉션으로 옮기는 클래스.
+    - 요약 문서: topic, type, status, result, score, participants(id, name, ai) - 전적 조회 쿼리가 그대로 동작하는 모양
+    - 나머지(debate_log, judgement_reason, participants 전체 등)는 BSON으로 묶어서 zstd 압축 blob 하나로 저장
+    - load(id)는 요약 + 압축 해제한 내용을 합쳐서 원래 progress 문서 모양으로 돌려줌
+    """
+    COLLECTION = "progress_archive"
+    CODEC = "zstd+bson"
+    SUMMARY_FIELDS = ("type", "topic", "status", "result", "score", "create_time", "end_time")
+    PARTICIPANT_FIELDS = ("id", "name", "ai")
+
+    def __init__(self, db, max_age_days:float=30, level:int=10, batch_size:int=100):
+        """
+        :param db: MongoDBConnection
+        :param max_age_days: 생성된 지 이 기간이 지난 종료 토론을 보관 (ObjectId 생성 시각 기준)
+        :param level: zstd 압축 레벨
+        :param batch_size: 한 번에 옮길 최대 문서 수
+        """
+        self.db = db
+        self.max_age_days = max_age_days
+        self.level = level
+        self.batch_size = batch_size
+
+    @staticmethod
+    def decompress(blob:bytes) -> dict:
+        return bson.decode(zstandard.ZstdDecompressor().decompress(blob))
+
+    def to_archive(self, progress:dict) -> dict:
+        """
+        progress 문서 -> 보관용 문서 (요약 + 압축 blob)
+        """
+        archive = {"_id": progress["_id"]}
+        for field in self.SUMMARY_FIELDS:
+            if field in progress:
+                archive[field] = progress[field]
+        archive["participants"] = {position: {key: participant.get(key) for key in self.PARTICIPANT_FIELDS}
+                                   for position, participant in (progress.get("participants") or {}).items()}
+        body = {key: value for key, value in progress.items() if key not in archive or key == "participants"}
+        body.pop("_id", None)
+        raw = bson.encode(body)
+        archive["blob"] = Binary(zstandard.ZstdCompressor(level=self.level).compress(raw))
+        archive["codec"] = self.CODEC
+        archive["raw_size"] = len(raw)
+        archive["archived_time"] = datetime.now()
+        return archive
+
+    def from_archive(self, archive:dict) -> dict:
+        """
+        보관용 문서 -> 원래 progress 문서 모양
+        """
+        progress = {key: value for key, value in archive.items()
+                    if key not in ("blob", "codec", "raw_size", "archived_time")}
+        if archive.get("blob") is not None:
+            progress.update(self.decompress(bytes(archive["blob"])))
+        return progress
+
+    def archive_old(self, now:datetime=None) -> list:
+        """
+        max_age_days보다 오래된 종료 토론을 batch_size개까지 옮기고 옮긴 id(str) 목록 반환.
+        보관 문서를 먼저 쓰고(upsert) 원본을 지우므로 중간에 멈춰도 다음 실행에서 이어서 처리됨
+        """
+        now = now or datetime.now(timezone.utc)
+        cutoff = ObjectId.from_datetime(now - timedelta(days=self.max_age_days))
+        query = {"_id": {"$lt": cutoff}, "status.type": "end"}
+        archived = []
+        for progress in self.db.iter_data_from_query("progress", query, limit=self.batch_size):
+            try:
+                archive = self.to_archive(progress)
+                self.db.get_collection(self.COLLECTION).replace_one({"_id": archive["_id"]}, archive, upsert=True)
+                self.db.get_collection("progress").delete_one({"_id": progress["_id"]})
+                archived.append(str(progress["_id"]))
+            except Exception as e:
+                print(f"progress 보관 실패 ({progress.get('_id')}) : {e}")
+        return archived
+
+    def load(self, id:str) -> dict:
+        """
+        보관된 토론을 원래 progress 문서 모양으로 반환. 없으면 None
+        """
+        archive = self.db.get_collection(self.COLLECTION).find_one({"_id": ObjectId(id)})
+        if not archive:
+            return None
+        return self.from_archive(archive)
+
+    def iter_summaries(self, projection:dict=None):
+        """
+        보관된 토론의 요약 문서만 (blob 없이) 최신순으로
+        """
+        return self.db.iter_data_from_query(self.COLLECTION,
+                                            projection=projection or {"blob": 0},
+                                            sort=[("_id", -1)])
@@ -0,0 +1,81 @@
+import asyncio
+import copy
+import time
+
+
+class ReadModelCache:
+    """
+    Web 페이지에서 쓰는 조회 결과(프로필 목록, AI 목록, progress 목록 등)를 TTL 동안 메모리에 들고 있는 캐시.
+    - name(조회 종류)마다 TTL을 따로 둔다
+    - 같은 key를 동시에 요청하면 한 번만 불러오고 나머지는 그 결과를 기다림
+    - Back에서 변경 이벤트가 오면 invalidate(name)으로 바로 비움
+    """
+    def __init__(self, ttls:dict, default_ttl:float=30.0):
+        """
+        :param ttls: {name: TTL(초)}
+        """
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.entries = {}  # (name, key) -> (만료 시각, 값)
+        self.locks = {}  # (name, key) -> [asyncio.Lock, 사용 중인 요청 수] (다 쓰면 지워서 key 수만큼 쌓이지 않음)
+        self.loading = set()  # 지금 불러오는 중인 (name, key)
+        self.stale = set()  # 불러오는 중에 invalidate된 (name, key) - 그 결과는 저장하지 않음
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, name:str, loader, key=None):
+        """
+        캐시에 있으면 복사본 반환, 없거나 만료됐으면 await loader()로 불러와서 저장
+        :param loader: 인자 없는 async 함수
+        """
+        cache_key = (name, key)
+        entry = self.entries.get(cache_key)
+        if entry and entry[0] > time.monotonic():
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+        holder = self.locks.setdefault(cache_key, [asyncio.Lock(), 0])
+        holder[1] += 1
+        try:
+            async with holder[0]:
+                # 기다리는 동안 다른 요청이 채웠을 수 있음
+                entry = self.entries.get(cache_key)
+                if entry and entry[0] > time.monotonic():
+                    self.hits += 1
+                    return copy.deepcopy(entry[1])
+                self.misses += 1
+                self.loading.add(cache_key)
+                try:
+                    value = await loader()
+                finally:
+                    self.loading.discard(cache_key)
+                    stale = cache_key in self.stale
+                    self.stale.discard(cache_key)
+                # 불러오는 동안 invalidate됐으면 이전 데이터일 수 있으므로 저장하지 않음
+                if value and not stale:
+                    self.entries[cache_key] = (time.monotonic() + self.ttls.get(name, self.default_ttl), value)
+                return copy.deepcopy(value)
+        finally:
+            holder[1] -= 1
+            if not holder[1]:
+                self.locks.pop(cache_key, None)
+
+    def invalidate(self, name:str, key=None):
+        """
+        key가 없으면 name에 해당하는 항목 전체를 비움
+        """
+        if key is not None:
+            self.entries.pop((name, key), None)
+            if (name, key) in self.loading:
+                self.stale.add((name, key))
+            return
+        for cache_key in [cache_key for cache_key in self.entries if cache_key[0] == name]:
+            self.entries.pop(cache_key, None)
+        self.stale.update(cache_key for cache_key in self.loading if cache_key[0] == name)
+
+    def clear(self):
+        self.entries.clear()
+        self.stale.update(self.loading)
+
+    def stats(self) -> dict:
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,284 @@
+"""
+토론 엔진 처리량 벤치마크. 가짜 AI(FakeAI)와 메모리 SQLite로 외부 서비스(Mongo, API 키, 검색) 없이 실행한다.
+debate / debate_2 / debate_3 토론을 종류별로 N개씩 동시에 만들고, Back의 auto_progressing처럼 ProgressManager.run_step으로 끝까지 진행한 뒤
+- 분당 끝난 토론 수
+- step 지연 p50 / p95 / p99 (토론 종류별)
+- event loop 지연 (loop를 막는 동기 호출이 얼마나 되는지)
+- 저장소 쓰기 횟수, 바이트 (Mongo에 보낼 양과 같음)
+- 최대 RSS
+를 출력하고, 결과를 JSON 한 줄로 --out 파일에 추가한다 (커밋별로 비교).
+
+실행 (프로젝트 폴더에서)
+python tests/benchmark.py --sessions 4
+python tests/benchmark.py --types debate_2 --sessions 16 --latency-mean 0.2 --tokens-per-second 0
+python tests/benchmark.py --sessions 8 --journal --error-rate 0.05 --out data/benchmark/results.jsonl
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+import numpy as np
+import yaml
+from bson import json_util
+from bson.objectid import ObjectId
+from Back.src.ai.ai_factory import AI_Factory
+from Back.src.utils.participant_factory import ParticipantFactory
+from Back.src.utils.progress_manager import ProgressManager
+from Back.src.utils.step_journal import StepJournal
+from Back.src.utils.storage_backend import create_storage
+
+TYPES = ("debate", "debate_2", "debate_3")
+
+
+class OfflineScrapper:
+    """
+    WebScrapper 대신 사용 - 검색하지 않고 기사 없음
+    """
+    def get_articles(self, topic:str) -> list:
+        return []
+
+
+class NoVectorStore:
+    """
+    VectorStoreHandler 대신 사용 - 임베딩 모델 없이 vectorstore None (FakeAI는 vectorstore 없이도 응답)
+    """
+    def vectorstoring(self, articles:list):
+        return None
+
+
+class WriteCounter:
+    """
+    저장소 연결의 쓰기 메서드를 감싸서 호출 횟수와 보낸 문서 크기(Extended JSON 기준 바이트)를 셈
+    """
+    METHODS = ("insert_data", "insert_many_data", "update_data", "upsert_data")
+
+    def __init__(self, db):
+        self.lock = threading.Lock()
+        self.ops = {}
+        self.bytes = 0
+        for name in self.METHODS:
+            setattr(db, name, self.wrap(name, getattr(db, name)))
+
+    def wrap(self, name:str, method):
+        def counted(collection_name, *args, **kwargs):
+            size = len(json_util.dumps(args))
+            with self.lock:
+                key = f"{name}:{collection_name}"
+                self.ops[key] = self.ops.get(key, 0) + 1
+                self.bytes += size
+            return method(collection_name, *args, **kwargs)
+        return counted
+
+    def stats(self) -> dict:
+        return {"ops": sum(self.ops.values()), "bytes": self.bytes, "by_method": dict(sorted(self.ops.items()))}
+
+
+def load_config() -> dict:
+    with open(project_root / "config" / "config.yaml", "r", encoding="utf-8") as file:
+        return yaml.safe_load(file)
+
+
+def fake_config(config:dict, args) -> dict:
+    """
+    config.yaml의 fake_ai에 명령행 옵션을 덮어씀. 모든 AI(GEMINI 심판 포함)를 FakeAI로 대체
+    """
+    fake = dict(config.get("fake_ai") or {})
+    fake.update({"enabled": True, "override_all": True, "seed": args.seed})
+    latency = dict(fake.get("latency") or {})
+    if args.latency_mean is not None:
+        latency["mean"] = args.latency_mean
+        latency["std"] = args.latency_mean / 2
+    if args.latency_distribution:
+        latency["distribution"] = args.latency_distribution
+    fake["latency"] = latency
+    if args.tokens_per_second is not None:
+        fake["tokens_per_second"] = args.tokens_per_second
+    if args.error_rate is not None:
+        fake["error_rate"] = args.error_rate
+    return fake
+
+
+def summary(values:list) -> dict:
+    if not values:
+        return {"count": 0, "p50": None, "p95": None, "p99": None, "max": None}
+    p50, p95, p99 = np.percentile(np.asarray(values), [50, 95, 99])
+    return {"count": len(values), "p50": round(float(p50), 4), "p95": round(float(p95), 4),
+            "p99": round(float(p99), 4), "max": round(float(max(values)), 4)}
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        # Windows에는 resource 모듈이 없음
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 byte 단위
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+async def monitor_loop_lag(interval:float, samples:list, stop:asyncio.Event):
+    # interval마다 깨어나기로 한 시각보다 얼마나 늦게 깨어났는지 = event loop가 막혀 있던 시간
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - start - interval))
+
+
+async def run_session(progress_manager:ProgressManager, id:str, latencies:list, max_steps:int, max_errors:int) -> dict:
+    """
+    토론 하나를 끝날 때까지 run_step (auto_progressing과 같이 실패한 step은 다음 차례에 다시 시도, max_errors번 실패하면 포기)
+    """
+    steps, errors = 0, 0
+    progress = progress_manager.progress_pool[id]
+    while progress.data["status"].get("type") != "end" and steps < max_steps and errors < max_errors:
+        start = time.perf_counter()
+        try:
+            await progress_manager.run_step(id)
+            steps += 1
+            latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            errors += 1
+            print(f"{id} step 오류 : {e}")
+        await asyncio.sleep(0)
+    return {"finished": progress.data["status"].get("type") == "end", "steps": steps, "errors": errors}
+
+
+async def run(args) -> dict:
+    config = load_config()
+    fake = fake_config(config, args)
+    db, async_db = create_storage({"backend": "sqlite", "sqlite_path": args.sqlite})
+    db.ensure_indexes()
+    writes = WriteCounter(db)
+
+    ai_factory = AI_Factory({}, fake_config=fake)
+    if args.vectorstore:
+        from Back.src.utils.vectorstorehandler import VectorStoreHandler
+        vectorstore_handler = VectorStoreHandler(chunk_size=config["VectorStoreHandler"]["chunk_size"],
+                                                 chunk_overlap=config["VectorStoreHandler"]["chunk_overlap"])
+    else:
+        vectorstore_handler = NoVectorStore()
+    step_journal = StepJournal(os.path.join(tempfile.mkdtemp(), "step_journal.jsonl")) if args.journal else None
+    progress_manager = ProgressManager(participant_factory=ParticipantFactory(vectorstore_handler, ai_factory),
+                                       web_scrapper=OfflineScrapper(),
+                                       mongoDBConnection=db,
+                                       topic_checker=ai_factory.create_ai_instance("GEMINI"),
+                                       vectorstore_handler=vectorstore_handler,
+                                       generate_text_config=config["generate_text_config"],
+                                       asyncMongoDBConnection=async_db,
+                                       step_journal=step_journal)
+
+    lag_samples = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_loop_lag(args.lag_interval, lag_samples, stop))
+    started = time.perf_counter()
+
+    # 토론 생성 (job_worker처럼 스레드에서)
+    orders = []
+    for progress_type in args.types:
+        for i in range(args.sessions):
+            participants = {side: {"_id": str(ObjectId()), "name": f"{side}-{i}", "ai": f"FAKE:{progress_type}-{side}-{i}",
+                                   "img": None, "object_attribute": ""} for side in ("pos", "neg")}
+            orders.append((progress_type, participants, f"benchmark topic {progress_type} {i}"))
+    created = await asyncio.gather(*[asyncio.to_thread(progress_manager.create_progress, *order) for order in orders])
+    sessions = [(order[0], result["id"]) for order, result in zip(orders, created) if result["result"]]
+    create_seconds = time.perf_counter() - started
+
+    # 모든 토론 동시에 진행
+    latencies = {progress_type: [] for progress_type in args.types}
+    results = await asyncio.gather(*[run_session(progress_manager, id, latencies[progress_type], args.max_steps, args.max_errors)
+                                     for progress_type, id in sessions])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor
+
+    finished = [result for result in results if result["finished"]]
+    finished_by_type = {progress_type: 0 for progress_type in args.types}
+    for (progress_type, id), result in zip(sessions, results):
+        finished_by_type[progress_type] += result["finished"]
+    ai_stats = {"calls": 0, "errors": 0, "tokens": 0}
+    instances = [participant.ai_instance for progress_type, id in sessions
+                 for participant in progress_manager.progress_pool[id].participant.values()]
+    for instance in instances + [progress_manager.topic_checker]:
+        stats = instance.stats() if hasattr(instance, "stats") else {}
+        for key in ai_stats:
+            ai_stats[key] += stats.get(key, 0)
+    if step_journal:
+        step_journal.close()
+    db.close_connection()
+
+    return {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "options": {"types": args.types, "sessions": args.sessions, "journal": args.journal,
+                    "vectorstore": args.vectorstore, "sqlite": args.sqlite, "fake_ai": fake},
+        "elapsed_seconds": round(elapsed, 3),
+        "create_seconds": round(create_seconds, 3),
+        "debates": {"requested": len(orders), "created": len(sessions), "finished": len(finished),
+                    "finished_by_type": finished_by_type, "step_errors": sum(result["errors"] for result in results)},
+        "debates_per_minute": round(len(finished) / elapsed * 60, 2) if elapsed else None,
+        "step_latency": {progress_type: summary(values) for progress_type, values in latencies.items()},
+        "loop_lag": summary(lag_samples),
+        "writes": writes.stats(),
+        "ai": ai_stats,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="토론 엔진 처리량 벤치마크 (FakeAI + 메모리 SQLite)")
+    parser.add_argument("--types", nargs="+", choices=TYPES, default=list(TYPES), help="실행할 토론 종류")
+    parser.add_argument("--sessions", type=int, default=4, help="토론 종류별 동시 토론 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-mean", type=float, default=None, help="FakeAI 평균 지연(초). 없으면 config의 fake_ai")
+    parser.add_argument("--latency-distribution", default=None, help="fixed | uniform | normal | lognormal | exponential")
+    parser.add_argument("--tokens-per-second", type=float, default=None, help="FakeAI 초당 토큰 수 (0이면 생성 시간 없음)")
+    parser.add_argument("--error-rate", type=float, default=None, help="FakeAI 호출 실패 확률")
+    parser.add_argument("--max-steps", type=int, default=50, help="토론 하나의 최대 step 수 (무한 반복 방지)")
+    parser.add_argument("--max-errors", type=int, default=3, help="토론 하나에서 이만큼 step이 실패하면 포기")
+    parser.add_argument("--lag-interval", type=float, default=0.05, help="event loop 지연 측정 간격(초)")
+    parser.add_argument("--journal", action="store_true", help="step 저널(fsync) 켜고 측정")
+    parser.add_argument("--vectorstore", action="store_true", help="실제 VectorStoreHandler 사용 (임베딩 모델 필요)")
+    parser.add_argument("--sqlite", default=":memory:", help="SQLite 경로 (기본 메모리)")
+    parser.add_argument("--out", default=str(project_root / "data" / "benchmark" / "results.jsonl"),
+                        help="결과를 한 줄씩 추가할 JSONL 파일")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+
+    print(f"\n토론 {result['debates']['finished']}/{result['debates']['requested']} 개 완료, "
+          f"{result['elapsed_seconds']}초, 분당 {result['debates_per_minute']} 개")
+    for progress_type, latency in result["step_latency"].items():
+        print(f"{progress_type:<10} 완료 {result['debates']['finished_by_type'][progress_type]:>3} 개  step {latency['count']:>5} 회  p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}")
+    print(f"event loop 지연  p50 {result['loop_lag']['p50']}  p99 {result['loop_lag']['p99']}  max {result['loop_lag']['max']}")
+    print(f"저장소 쓰기 {result['writes']['ops']} 회, {result['writes']['bytes']} byte  /  최대 RSS {result['peak_rss_mb']} MB")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "a", encoding="utf-8") as file:
+        file.write(json.dumps(result, ensure_ascii=False) + "\n")
+    print(f"결과 저장 : {args.out}")
+
+
+if __name__ == "__main__":
+    main()